@@ -6,6 +6,13 @@ Fetches abstracts and PDFs from multiple sources including Semantic Scholar, arX
 
 import pandas as pd
 import requests
+import http_client
+import negative_cache
+from negative_cache import get_negative_cache
+from semantic_scholar_batch import SemanticScholarBatch, paper_identifier
+from arxiv_client import ArxivClient, extract_arxiv_id
+import hedged_lookup
+from title_normalization import title_similarity
 import time
 import os
 import re
@@ -19,8 +26,10 @@ from bs4 import BeautifulSoup
 import hashlib
 
 class AbstractDigger:
-    def __init__(self, output_dir: str = "/Users/reddy/2025/ResearchHelper/results"):
+    def __init__(self, output_dir: str = "/Users/reddy/2025/ResearchHelper/results", force_retry: bool = False):
         self.output_dir = output_dir
+        # Ignore the negative cache and walk the full source cascade for every paper
+        self.force_retry = force_retry
         self.pdf_dir = os.path.join(output_dir, "pdf")
         os.makedirs(self.pdf_dir, exist_ok=True)
 
@@ -28,28 +37,11 @@ class AbstractDigger:
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
 
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_delay = 1.0  # seconds between requests
-
-        # Session for persistent connections
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'ResearchHelper/1.0 (mailto:researcher@example.com)'
-        })
-
-    def rate_limit(self):
-        """Implement rate limiting between API calls"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_delay:
-            time.sleep(self.min_delay - time_since_last)
-        self.last_request_time = time.time()
+        # Shared connection-pooled session (per-host rate limits are applied by http_client)
+        self.session = http_client.get_session({'User-Agent': http_client.API_USER_AGENT})
 
     def search_semantic_scholar(self, title: str) -> Dict:
         """Search Semantic Scholar API for paper information"""
-        self.rate_limit()
-
         try:
             # Clean title for search
             clean_title = re.sub(r'[^\w\s]', ' ', title).strip()
@@ -84,58 +76,42 @@ class AbstractDigger:
                         'source': 'Semantic Scholar',
                         'confidence': 'medium'
                     }
+            elif response.status_code != 404:
+                # Throttled or unavailable: not an answer, so not a miss either
+                return {'found': False, 'abstract': '', 'source': 'Semantic Scholar', 'confidence': 'none',
+                        'error': f"HTTP {response.status_code}"}
 
         except Exception as e:
             self.logger.error(f"Semantic Scholar search error for '{title}': {e}")
+            return {'found': False, 'abstract': '', 'source': 'Semantic Scholar', 'confidence': 'none', 'error': str(e)}
 
         return {'found': False, 'abstract': '', 'source': 'Semantic Scholar', 'confidence': 'none'}
 
     def search_arxiv(self, title: str) -> Dict:
         """Search arXiv API for paper information"""
-        self.rate_limit()
-
         try:
             # Clean title for arXiv search
             clean_title = re.sub(r'[^\w\s]', ' ', title).strip()
-            search_query = quote(clean_title)
 
-            url = f"http://export.arxiv.org/api/query?search_query=ti:{search_query}&max_results=5"
-
-            response = self.session.get(url, timeout=30)
-            if response.status_code == 200:
-                # Parse XML response
-                from xml.etree import ElementTree as ET
-                root = ET.fromstring(response.content)
-
-                for entry in root.findall('{http://www.w3.org/2005/Atom}entry'):
-                    entry_title = entry.find('{http://www.w3.org/2005/Atom}title').text.strip()
-                    if self.title_similarity(title, entry_title) > 0.8:
-                        summary = entry.find('{http://www.w3.org/2005/Atom}summary').text.strip()
-                        pdf_link = None
-
-                        # Get PDF link
-                        for link in entry.findall('{http://www.w3.org/2005/Atom}link'):
-                            if link.get('type') == 'application/pdf':
-                                pdf_link = link.get('href')
-                                break
-
-                        return {
-                            'found': True,
-                            'abstract': summary,
-                            'pdf_url': pdf_link,
-                            'source': 'arXiv',
-                            'confidence': 'high'
-                        }
+            # Entries are parsed as the feed streams in; stop at the first good match
+            for entry in ArxivClient(session=self.session).search(f"ti:{clean_title}", max_results=5):
+                if self.title_similarity(title, entry['title']) > 0.8:
+                    return {
+                        'found': True,
+                        'abstract': entry['abstract'],
+                        'pdf_url': entry['pdf_url'],
+                        'source': 'arXiv',
+                        'confidence': 'high'
+                    }
 
         except Exception as e:
             self.logger.error(f"arXiv search error for '{title}': {e}")
+            return {'found': False, 'abstract': '', 'source': 'arXiv', 'confidence': 'none', 'error': str(e)}
 
         return {'found': False, 'abstract': '', 'source': 'arXiv', 'confidence': 'none'}
 
     def search_crossref(self, title: str, doi: str = None) -> Dict:
         """Search CrossRef API for paper information"""
-        self.rate_limit()
-
         try:
             if doi:
                 # Search by DOI
@@ -174,9 +150,14 @@ class AbstractDigger:
                                     'source': 'CrossRef',
                                     'confidence': 'high'
                                 }
+            elif response.status_code != 404:
+                # Throttled or unavailable: not an answer, so not a miss either
+                return {'found': False, 'abstract': '', 'source': 'CrossRef', 'confidence': 'none',
+                        'error': f"HTTP {response.status_code}"}
 
         except Exception as e:
             self.logger.error(f"CrossRef search error for '{title}': {e}")
+            return {'found': False, 'abstract': '', 'source': 'CrossRef', 'confidence': 'none', 'error': str(e)}
 
         return {'found': False, 'abstract': '', 'source': 'CrossRef', 'confidence': 'none'}
 
@@ -185,8 +166,6 @@ class AbstractDigger:
         if not url:
             return {'found': False, 'abstract': '', 'source': 'Web Scraping', 'confidence': 'none'}
 
-        self.rate_limit()
-
         try:
             response = self.session.get(url, timeout=30)
             if response.status_code == 200:
@@ -217,6 +196,7 @@ class AbstractDigger:
 
         except Exception as e:
             self.logger.error(f"Web scraping error for '{title}': {e}")
+            return {'found': False, 'abstract': '', 'source': 'Web Scraping', 'confidence': 'none', 'error': str(e)}
 
         return {'found': False, 'abstract': '', 'source': 'Web Scraping', 'confidence': 'none'}
 
@@ -226,8 +206,6 @@ class AbstractDigger:
             return False, "No PDF URL provided"
 
         try:
-            self.rate_limit()
-
             response = self.session.get(pdf_url, timeout=60, stream=True)
             if response.status_code == 200:
                 # Create filename
@@ -252,22 +230,26 @@ class AbstractDigger:
 
         return False, f"HTTP {response.status_code}"
 
+    def is_known_missing(self, title: str, doi: str = '', force_retry: bool = False) -> bool:
+        """True if a previous run found no abstract for this paper and the entry has not expired"""
+        cache = get_negative_cache()
+        if cache is None:
+            return False
+        return cache.should_skip(negative_cache.ABSTRACT, doi, title, force_retry or self.force_retry)
+
+    def record_abstract_outcome(self, title: str, doi: str, attempts: List[Dict]):
+        """Clear the negative cache on success; record a miss only if every source answered cleanly"""
+        cache = get_negative_cache()
+        if cache is None:
+            return
+        if any(attempt.get('found') for attempt in attempts):
+            cache.clear(negative_cache.ABSTRACT, doi, title)
+        elif not any(attempt.get('error') for attempt in attempts):
+            cache.record_miss(negative_cache.ABSTRACT, doi, title)
+
     def title_similarity(self, title1: str, title2: str) -> float:
         """Calculate similarity between two titles"""
-        if not title1 or not title2:
-            return 0.0
-
-        # Simple word-based similarity
-        words1 = set(re.findall(r'\w+', title1.lower()))
-        words2 = set(re.findall(r'\w+', title2.lower()))
-
-        if not words1 or not words2:
-            return 0.0
-
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-
-        return len(intersection) / len(union)
+        return title_similarity(title1, title2)
 
     def categorize_paper(self, title: str, abstract: str) -> Dict:
         """Categorize paper based on title and abstract"""
@@ -333,7 +315,59 @@ class AbstractDigger:
             'limitations': '; '.join(limitations[:2]) if limitations else 'Not explicitly mentioned'
         }
 
-    def process_papers(self, csv_path: str) -> pd.DataFrame:
+    def batch_lookup_abstracts(self, df: pd.DataFrame, indices: List) -> Dict:
+        """
+        Resolve rows that carry a DOI or arXiv ID through the Semantic Scholar batch
+        endpoint; returns {row index: result} for the papers Semantic Scholar knows
+        """
+        ids = {}
+        for idx in indices:
+            paper_id = paper_identifier(df.at[idx, 'doi'] if 'doi' in df.columns else '',
+                                        df.at[idx, 'url'] if 'url' in df.columns else '')
+            if paper_id:
+                ids[idx] = paper_id
+        if not ids:
+            return {}
+
+        batch = SemanticScholarBatch(
+            session=self.session,
+            fields='paperId,title,abstract,authors,journal,year,venue,citationCount,openAccessPdf,url,externalIds',
+            log=self.logger.info
+        )
+        found = batch.lookup_abstracts(ids.values())
+        results = {}
+        for idx, paper_id in ids.items():
+            if paper_id in found:
+                results[idx] = dict(found[paper_id], confidence='high' if found[paper_id]['found'] else 'none')
+        self.logger.info(f"Batch lookup: {sum(r['found'] for r in results.values())}/{len(ids)} identified papers "
+                         f"resolved in {batch.requests_made} requests")
+        return results
+
+    def batch_lookup_arxiv(self, df: pd.DataFrame, indices: List) -> Dict:
+        """
+        Resolve rows whose arXiv ID can be read from the DOI, URL or title with
+        batched id_list queries; returns {row index: result} for the IDs arXiv knows
+        """
+        ids = {}
+        for idx in indices:
+            arxiv_id = extract_arxiv_id(df.at[idx, 'doi'] if 'doi' in df.columns else '',
+                                        df.at[idx, 'url'] if 'url' in df.columns else '',
+                                        df.at[idx, 'title'])
+            if arxiv_id:
+                ids[idx] = arxiv_id
+        if not ids:
+            return {}
+
+        client = ArxivClient(session=self.session, log=self.logger.info)
+        found = client.lookup_abstracts(ids.values())
+        results = {idx: dict(found[arxiv_id], confidence='high') for idx, arxiv_id in ids.items() if arxiv_id in found}
+        self.logger.info(f"arXiv id_list lookup: {len(results)}/{len(ids)} arXiv papers "
+                         f"resolved in {client.requests_made} requests")
+        return results
+
+    def process_papers(self, csv_path: str, force_retry: bool = False, bulk_lookup: bool = True,
+                       resolution_mode: str = hedged_lookup.HEDGED,
+                       hedge_delay: float = hedged_lookup.DEFAULT_HEDGE_DELAY) -> pd.DataFrame:
         """Process papers from CSV file"""
         # Read input CSV
         df = pd.read_csv(csv_path)
@@ -356,6 +390,19 @@ class AbstractDigger:
 
         success_count = 0
         pdf_count = 0
+        skipped_count = 0
+
+        # Papers with a DOI or arXiv ID are resolved in bulk; title search is the fallback
+        pending = [idx for idx, row in df.iterrows()
+                   if len(str(row.get('abstract', '') or '').strip()) <= 50]
+        known_missing = {idx for idx in pending
+                         if self.is_known_missing(df.at[idx, 'title'], df.at[idx, 'doi'] if 'doi' in df.columns else '',
+                                                  force_retry)}
+        batch_results, arxiv_results = {}, {}
+        if bulk_lookup:
+            batch_results = self.batch_lookup_abstracts(df, [idx for idx in pending if idx not in known_missing])
+            arxiv_results = self.batch_lookup_arxiv(df, [idx for idx in pending if idx not in known_missing
+                                                         and not batch_results.get(idx, {}).get('found')])
 
         for idx, row in df.iterrows():
             title = row.get('title', '')
@@ -376,34 +423,42 @@ class AbstractDigger:
                     'source': 'Existing',
                     'confidence': 'high'
                 }
+            elif idx in known_missing:
+                # No abstract was found on a previous run; skip the cascade until the entry expires
+                abstract_info = {'found': False, 'abstract': '', 'source': 'Negative cache', 'confidence': 'none'}
+                skipped_count += 1
             else:
-                # Try to fetch abstract from multiple sources
-                abstract_info = None
-
-                # Try Semantic Scholar first
-                if not abstract_info or not abstract_info['found']:
-                    abstract_info = self.search_semantic_scholar(title)
-
-                # Try arXiv
-                if not abstract_info['found']:
-                    arxiv_result = self.search_arxiv(title)
-                    if arxiv_result['found']:
-                        abstract_info = arxiv_result
-                        # Try to download PDF from arXiv
-                        if arxiv_result.get('pdf_url'):
-                            pdf_success, pdf_path = self.download_pdf(paper_id, arxiv_result['pdf_url'])
-                            if pdf_success:
-                                df.at[idx, 'pdf_downloaded'] = True
-                                df.at[idx, 'pdf_path'] = pdf_path
-                                pdf_count += 1
-
-                # Try CrossRef
-                if not abstract_info['found']:
-                    abstract_info = self.search_crossref(title, doi)
-
-                # Try web scraping as last resort
-                if not abstract_info['found'] and url:
-                    abstract_info = self.web_scrape_abstract(title, url)
+                # Sources in priority order, with the host each queries (None: answer already
+                # in hand); a batch hit skips the Semantic Scholar title search
+                lookups = []
+                if idx in batch_results:
+                    lookups.append(('Semantic Scholar', lambda result=batch_results[idx]: result, None))
+                else:
+                    lookups.append(('Semantic Scholar', lambda: self.search_semantic_scholar(title),
+                                    'api.semanticscholar.org'))
+                arxiv_result = arxiv_results.get(idx)
+                if arxiv_result:
+                    lookups.append(('arXiv', lambda: arxiv_result, None))
+                else:
+                    lookups.append(('arXiv', lambda: self.search_arxiv(title), 'export.arxiv.org'))
+                lookups.append(('CrossRef', lambda: self.search_crossref(title, doi), 'api.crossref.org'))
+                if url:
+                    lookups.append(('Web Scraping', lambda: self.web_scrape_abstract(title, url),
+                                    urlparse(str(url)).hostname))
+
+                # Race them (or try them in turn in 'sequential' mode); the first abstract wins
+                abstract_info, attempts = hedged_lookup.resolve(lookups, resolution_mode, hedge_delay)
+                if abstract_info is None:
+                    abstract_info = attempts[-1] if attempts else {'found': False}
+                elif abstract_info['source'] == 'arXiv' and abstract_info.get('pdf_url'):
+                    # Try to download PDF from arXiv
+                    pdf_success, pdf_path = self.download_pdf(paper_id, abstract_info['pdf_url'])
+                    if pdf_success:
+                        df.at[idx, 'pdf_downloaded'] = True
+                        df.at[idx, 'pdf_path'] = pdf_path
+                        pdf_count += 1
+
+                self.record_abstract_outcome(title, doi, attempts)
 
             # Update dataframe with abstract information
             if abstract_info and abstract_info['found']:
@@ -456,6 +511,7 @@ class AbstractDigger:
         self.logger.info(f"Total papers processed: {len(final_df)}")
         self.logger.info(f"Papers with abstracts: {success_count}")
         self.logger.info(f"PDFs downloaded: {pdf_count}")
+        self.logger.info(f"Skipped (no abstract on a previous run): {skipped_count}")
         self.logger.info(f"Success rate: {success_count/len(final_df)*100:.1f}%")
         self.logger.info(f"PDF download rate: {pdf_count/len(final_df)*100:.1f}%")
 
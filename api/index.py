@@ -13,33 +13,26 @@ import urllib.parse
 import json
 import tempfile
 import os
+import sys
+
+# Shared modules live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+from crossref_fetcher import MAX_TOTAL_RESULTS, CrossRefFetcher, build_works_params
+from result_cache import fetch_key, get_result_cache
+from title_normalization import title_similarity
+from semantic_scholar_batch import SemanticScholarBatch, paper_identifier
 
 app = Flask(__name__)
 CORS(app)
 
 def get_session():
-    """Create a session with proper headers"""
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    })
-    return session
+    """Return the shared connection-pooled session with browser headers"""
+    return http_client.get_session({'User-Agent': http_client.BROWSER_USER_AGENT})
 
 def calculate_similarity(title1, title2):
     """Calculate similarity between titles"""
-    if not title1 or not title2:
-        return 0.0
-    
-    words1 = set(title1.lower().split())
-    words2 = set(title2.lower().split())
-    
-    if not words1 or not words2:
-        return 0.0
-    
-    intersection = len(words1.intersection(words2))
-    union = len(words1.union(words2))
-    
-    return intersection / union if union > 0 else 0.0
+    return title_similarity(title1, title2)
 
 def search_semantic_scholar(title):
     """Search Semantic Scholar for abstract"""
@@ -68,8 +61,6 @@ def search_semantic_scholar(title):
                             'abstract': paper['abstract'],
                             'source': 'Semantic Scholar'
                         }
-        
-        time.sleep(1)
     except Exception as e:
         print(f"Semantic Scholar error: {e}")
     
@@ -145,79 +136,61 @@ def fetch_papers():
         additional_keyword = data.get('additional_keyword', '').strip()
         from_year = int(data.get('from_year', 2020))
         to_year = int(data.get('to_year', 2025))
-        total_results = min(int(data.get('total_results', 20)), 100)
+        total_results = max(1, int(data.get('total_results', 20)))
+        if total_results > MAX_TOTAL_RESULTS:
+            return jsonify({'success': False, 'error': f'total_results may be at most {MAX_TOTAL_RESULTS}'}), 400
         title_filter = data.get('title_filter', True)
         paper_type_filter = data.get('paper_type_filter', True)
         
-        papers = []
-        session = get_session()
-        
-        rows_per_request = 20
-        offset = 0
-        fetched_count = 0
-        max_attempts = total_results * 3
-        processed_count = 0
+        # Repeat searches are answered from the query-result cache (prefix slices for smaller totals)
+        result_cache = get_result_cache()
+        cache_key = fetch_key(keyword, additional_keyword, from_year, to_year, paper_type_filter, title_filter)
+        cached = result_cache.lookup(cache_key, total_results) if data.get('use_cache', True) else None
+        if cached is not None:
+            papers = cached[0]
+            return jsonify({
+                'success': True,
+                'papers': papers,
+                'total': len(papers),
+                'cached': True,
+                'message': f'Successfully fetched {len(papers)} papers'
+            })
         
         keyword_lower = keyword.lower().strip()
         additional_keyword_lower = additional_keyword.lower().strip()
         
-        while fetched_count < total_results and processed_count < max_attempts:
-            try:
-                remaining = total_results - fetched_count
-                current_rows = min(rows_per_request, remaining * 2)
-                
-                if additional_keyword.strip():
-                    url = f'https://api.crossref.org/works?query.title={urllib.parse.quote(keyword)}+{urllib.parse.quote(additional_keyword)}'
-                else:
-                    url = f'https://api.crossref.org/works?query.title={urllib.parse.quote(keyword)}'
-                
-                url += f'&filter=from-pub-date:{from_year},until-pub-date:{to_year}'
-                if paper_type_filter:
-                    url += ',type:journal-article,type:proceedings-article'
-                url += f'&rows={current_rows}&offset={offset}&sort=relevance'
-                
-                response = session.get(url, timeout=30)
-                if not response.ok:
-                    break
-                
-                data_response = response.json()
-                items = data_response.get('message', {}).get('items', [])
-                
-                if not items:
-                    break
-                
-                for item in items:
-                    processed_count += 1
-                    if fetched_count >= total_results:
-                        break
-                    
-                    title = ''
-                    if item.get('title') and len(item['title']) > 0:
-                        title = item['title'][0] if isinstance(item['title'], list) else item['title']
-                    
-                    if title_filter and title:
-                        title_lower = title.lower()
-                        keyword_in_title = keyword_lower in title_lower
-                        additional_in_title = not additional_keyword_lower or additional_keyword_lower in title_lower
-                        
-                        if not (keyword_in_title and additional_in_title):
-                            continue
-                    
-                    paper = extract_paper_info(item, fetched_count + 1)
-                    papers.append(paper)
-                    fetched_count += 1
-                
-                offset += current_rows
-                time.sleep(0.2)
-                
-            except Exception as e:
-                print(f"Error fetching batch: {e}")
-                break
+        def passes_title_filter(item):
+            title = ''
+            if item.get('title') and len(item['title']) > 0:
+                title = item['title'][0] if isinstance(item['title'], list) else item['title']
+            if title_filter and title:
+                title_lower = title.lower()
+                keyword_in_title = keyword_lower in title_lower
+                additional_in_title = not additional_keyword_lower or additional_keyword_lower in title_lower
+                return keyword_in_title and additional_in_title
+            return True
+        
+        # Title-filtered fetches size each page from the observed pass rate and quote
+        # multi-word keywords; unfiltered ones keep several pages in flight
+        fetcher = CrossRefFetcher(session=get_session(), log=print)
+        params = build_works_params(keyword, additional_keyword, from_year, to_year, paper_type_filter,
+                                    phrase=bool(title_filter))
+        if title_filter:
+            items = fetcher.fetch_adaptive(params, total_results, accept=passes_title_filter)
+        else:
+            items = fetcher.fetch(params, total_results, max_scanned=total_results)
+        papers = [extract_paper_info(item, idx) for idx, item in enumerate(items, 1)]
+        # Only a complete scan is cached; a short list is final only if CrossRef ran out
+        if fetcher.last_scan['failed']:
+            print("[DEBUG] Not caching results: a CrossRef page failed")
+        else:
+            result_cache.store(cache_key, papers, requested=total_results, exhausted=fetcher.last_scan['ran_out'])
         
         return jsonify({
             'success': True,
             'papers': papers,
             'total': len(papers),
+            'cached': False,
             'message': f'Successfully fetched {len(papers)} papers'
         })
         
@@ -300,13 +273,24 @@ def process_complete():
                 seen_titles.append(title)
                 unique_papers.append(paper)
         
+        # Resolve papers with a DOI or arXiv ID in bulk; title search covers the rest
+        batch_ids = {}
+        for i, paper in enumerate(unique_papers):
+            if not paper.get('abstract') or len(paper['abstract'].strip()) < 50:
+                paper_id = paper_identifier(paper.get('doi', ''), paper.get('url', ''))
+                if paper_id:
+                    batch_ids[i] = paper_id
+        batch_found = SemanticScholarBatch(session=get_session(), log=print).lookup_abstracts(batch_ids.values()) if batch_ids else {}
+        
         # Process each unique paper
         processed_papers = []
         
         for i, paper in enumerate(unique_papers):
             # Extract abstract if not available
             if not paper.get('abstract') or len(paper['abstract'].strip()) < 50:
-                result = search_semantic_scholar(paper.get('title', ''))
+                result = batch_found.get(batch_ids.get(i))
+                if result is None:
+                    result = search_semantic_scholar(paper.get('title', ''))
                 if result['found']:
                     paper['abstract'] = result['abstract']
                     paper['abstract_source'] = result['source']
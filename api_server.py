@@ -21,6 +21,11 @@ CORS(app)
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import http_client
+from rate_limiter import get_rate_limiter
+from circuit_breaker import OPEN, get_breakers
+from result_cache import get_result_cache, multi_keyword_key
+
 # Import our pipeline components
 try:
     from multi_keyword_fetcher import MultiKeywordPaperFetcher
@@ -46,11 +51,15 @@ def index():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, including per-source circuit breaker state"""
+    breakers = get_breakers().stats()
     return jsonify({
-        'status': 'healthy',
+        'status': 'degraded' if any(b['state'] == OPEN for b in breakers.values()) else 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'pipeline_available': PIPELINE_AVAILABLE
+        'pipeline_available': PIPELINE_AVAILABLE,
+        'circuit_breakers': breakers,
+        'rate_limits': get_rate_limiter().stats(),
+        'offline': http_client.offline_mode()
     })
 
 @app.route('/api/fetch-multi-keyword', methods=['POST'])
@@ -71,20 +80,46 @@ def fetch_multi_keyword():
             if not config.get('primary_keyword'):
                 return jsonify({'error': f'Configuration {i+1}: Primary keyword is required'}), 400
 
-        # Run multi-keyword fetch
-        combined_csv_path = pipeline_fetcher.fetch_multi_keyword_papers(keyword_configs)
-
-        # Read the results
-        df = pd.read_csv(combined_csv_path)
-        papers = df.to_dict('records')
+        # Identical configuration lists are answered from the query-result cache
+        result_cache = get_result_cache()
+        # Opt-in: the index records what this request fetched, so a repeated UI flow would come back empty
+        use_corpus_index = bool(data.get('use_corpus_index', False))
+        cache_key = multi_keyword_key(keyword_configs) + (bool(use_corpus_index),)
+        cached = result_cache.lookup(cache_key) if data.get('use_cache', True) else None
+        from_cache = cached is not None and os.path.exists(cached[1].get('csv_path', ''))
+        if from_cache:
+            papers, meta = cached
+            combined_csv_path = meta['csv_path']
+            already_in_corpus = meta.get('already_in_corpus', 0)
+        else:
+            # Run multi-keyword fetch (configurations run concurrently; per-config CSVs are optional)
+            report = {}
+            combined_csv_path = pipeline_fetcher.fetch_multi_keyword_papers(
+                keyword_configs,
+                save_intermediate=data.get('save_intermediate'),
+                max_parallel=data.get('max_parallel'),
+                use_corpus_index=use_corpus_index,
+                report=report
+            )
+
+            # Read the results
+            df = pd.read_csv(combined_csv_path)
+            papers = df.to_dict('records')
+            already_in_corpus = report['already_in_corpus']
+            # A list missing an unavailable source's papers is not replayed to later requests
+            if not any(outcome['failed'] for status in report['source_status'] for outcome in status.values()):
+                result_cache.store(cache_key, papers, meta={'csv_path': combined_csv_path,
+                                                            'already_in_corpus': already_in_corpus})
 
         return jsonify({
             'status': 'success',
             'message': f'Fetched {len(papers)} unique papers from {len(keyword_configs)} configurations',
             'papers': papers,
             'csv_path': combined_csv_path,
+            'cached': from_cache,
             'statistics': {
                 'total_papers': len(papers),
+                'already_in_corpus': already_in_corpus,
                 'configurations_processed': len(keyword_configs)
             }
         })
@@ -113,7 +148,11 @@ def process_complete():
         print(f"Processing {len(keyword_configs)} keyword configurations")
 
         # Step 1: Fetch papers
-        combined_csv_path = pipeline_fetcher.fetch_multi_keyword_papers(keyword_configs)
+        combined_csv_path = pipeline_fetcher.fetch_multi_keyword_papers(
+            keyword_configs,
+            save_intermediate=data.get('save_intermediate'),
+            max_parallel=data.get('max_parallel')
+        )
         df = pd.read_csv(combined_csv_path)
 
         stats = {
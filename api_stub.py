@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Offline Record/Replay Harness
+Records real CrossRef, Semantic Scholar, arXiv, Unpaywall and publisher
+responses into fixture files, and replays them from a local stub HTTP server
+with configurable latency, 429 rate, timeouts and truncated bodies.
+
+Recording: set RESEARCHHELPER_RECORD_DIR=<dir> (and RESEARCHHELPER_CACHE=0, so
+every lookup reaches the wire) and run the pipeline or a Flask app as usual.
+
+Replay: start the stub and point the shared HTTP client at it with
+RESEARCHHELPER_API_STUB=http://127.0.0.1:8765; every module that uses
+http_client sessions is redirected, the rate limiter and breakers still see
+the original hosts.
+
+    python api_stub.py --fixtures fixtures/ --latency 0.2 --rate-429 0.1
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from response_cache import ResponseCache
+
+DEFAULT_PORT = 8765
+STATS_PATH = '/__stub__/stats'
+
+# Hop-by-hop and encoding headers are not replayed: bodies are stored decoded
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+logger = logging.getLogger(__name__)
+
+
+# ---- URL mapping ----
+
+def stub_url(stub_base: str, url: str) -> str:
+    """Rewrite https://host/path?q to <stub_base>/https/host/path?q"""
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ''
+    return f"{stub_base.rstrip('/')}/{parts.scheme}/{parts.netloc}{parts.path or '/'}{query}"
+
+
+def original_url(path: str) -> Optional[str]:
+    """Inverse of stub_url for a request path received by the stub"""
+    scheme, _, rest = path.lstrip('/').partition('/')
+    if scheme not in ('http', 'https') or not rest:
+        return None
+    return f"{scheme}://{rest}"
+
+
+# ---- fixtures ----
+
+def _body_bytes(body) -> bytes:
+    if body is None:
+        return b''
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    if isinstance(body, bytes):
+        return body
+    return b''  # Streamed uploads are not part of the key
+
+
+class FixtureStore:
+    """One JSON file per recorded request, grouped in a directory per host"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(method: str, url: str, body: bytes = b'') -> str:
+        signature = f"{method.upper()} {ResponseCache.normalize_url(url)} {hashlib.sha256(body).hexdigest()}"
+        return hashlib.sha256(signature.encode('utf-8')).hexdigest()
+
+    def path_for(self, method: str, url: str, body: bytes = b'') -> str:
+        host = (urlsplit(url).hostname or 'unknown').lower()
+        return os.path.join(self.directory, host, f"{self.make_key(method, url, body)}.json")
+
+    def save(self, request, response, content: Optional[bytes] = None):
+        """Record a requests response (content defaults to response.content, which stays available to the caller)"""
+        if content is None:
+            content = response.content
+        try:
+            body, encoding = content.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode('ascii'), 'base64'
+        fixture = {
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS},
+            'body_encoding': encoding,
+            'body': body,
+            'recorded_at': time.time()
+        }
+        path = self.path_for(request.method, request.url, _body_bytes(request.body))
+        with self.lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(fixture, f)
+            os.replace(tmp_path, path)
+
+    def load(self, method: str, url: str, body: bytes = b'') -> Optional[Dict]:
+        """Fixture for a request with its body decoded to bytes, or None"""
+        path = self.path_for(method, url, body)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            fixture = json.load(f)
+        if fixture['body_encoding'] == 'base64':
+            fixture['body'] = base64.b64decode(fixture['body'])
+        else:
+            fixture['body'] = fixture['body'].encode('utf-8')
+        return fixture
+
+
+# ---- fault injection ----
+
+DEFAULT_FAULTS = {
+    'latency': 0.0,          # Seconds added to every response
+    'jitter': 0.0,           # Extra uniform random latency, 0..jitter seconds
+    'rate_429': 0.0,         # Fraction of requests answered 429
+    'retry_after': 1,        # Retry-After seconds sent with injected 429s
+    'timeout_rate': 0.0,     # Fraction of requests that hang, then drop the connection
+    'timeout_seconds': 60.0,
+    'truncate_rate': 0.0,    # Fraction of bodies cut off halfway
+}
+
+
+class StubConfig:
+    """Fault settings, with optional per-host overrides"""
+
+    def __init__(self, faults: Optional[Dict] = None, hosts: Optional[Dict[str, Dict]] = None,
+                 seed: Optional[int] = None):
+        self.faults = {**DEFAULT_FAULTS, **(faults or {})}
+        self.hosts = {host.lower(): {**self.faults, **overrides} for host, overrides in (hosts or {}).items()}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, seed: Optional[int] = None, **faults) -> 'StubConfig':
+        """Load {"default": {...}, "hosts": {"api.crossref.org": {...}}}; keyword faults override the default"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls({**data.get('default', {}), **faults}, data.get('hosts'), seed)
+
+    def for_host(self, host: str) -> Dict:
+        return self.hosts.get((host or '').lower(), self.faults)
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def delay(self, faults: Dict) -> float:
+        with self.lock:
+            return faults['latency'] + (self.random.uniform(0, faults['jitter']) if faults['jitter'] else 0)
+
+
+# ---- server ----
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Replays fixtures for /<scheme>/<host>/<path> requests"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._replay()
+
+    def do_HEAD(self):
+        self._replay()
+
+    def do_POST(self):
+        self._replay()
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send(self, status: int, headers: Dict[str, str], body: bytes, truncate: bool = False):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        if truncate:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body[:len(body) // 2] if truncate else body)
+        if truncate:
+            self.close_connection = True
+
+    def _replay(self):
+        server = self.server
+        if self.path == STATS_PATH:
+            self._send(200, {'Content-Type': 'application/json'}, json.dumps(server.stats()).encode('utf-8'))
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = original_url(self.path)
+        if url is None:
+            self._send(400, {'Content-Type': 'application/json'},
+                       json.dumps({'error': 'expected /<scheme>/<host>/<path>'}).encode('utf-8'))
+            return
+
+        faults = server.config.for_host(urlsplit(url).hostname)
+        if server.config.roll(faults['timeout_rate']):
+            server.count('timeouts')
+            time.sleep(faults['timeout_seconds'])
+            self.close_connection = True
+            return
+        if server.config.roll(faults['rate_429']):
+            server.count('throttled')
+            self._send(429, {'Retry-After': str(faults['retry_after']), 'Content-Type': 'application/json'},
+                       b'{"message": "Too Many Requests (stub)"}')
+            return
+
+        delay = server.config.delay(faults)
+        if delay > 0:
+            time.sleep(delay)
+
+        method = 'GET' if self.command == 'HEAD' and server.head_as_get else self.command
+        fixture = server.store.load(self.command, url, body) or (
+            server.store.load(method, url, body) if method != self.command else None)
+        if fixture is None:
+            server.count('missing')
+            logger.warning(f"No fixture for {self.command} {url}")
+            self._send(404, {'Content-Type': 'application/json', 'X-Stub-Missing': '1'},
+                       json.dumps({'error': 'no fixture', 'url': url}).encode('utf-8'))
+            return
+
+        truncate = server.config.roll(faults['truncate_rate'])
+        server.count('truncated' if truncate else 'served')
+        self._send(fixture['status'], fixture['headers'], fixture['body'], truncate)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub server; also usable in-process via start()/stop()"""
+
+    daemon_threads = True
+
+    def __init__(self, store: FixtureStore, config: Optional[StubConfig] = None,
+                 host: str = '127.0.0.1', port: int = DEFAULT_PORT, head_as_get: bool = True):
+        super().__init__((host, port), StubHandler)
+        self.store = store
+        self.config = config or StubConfig()
+        self.head_as_get = head_as_get
+        self.counters = {'served': 0, 'missing': 0, 'throttled': 0, 'timeouts': 0, 'truncated': 0}
+        self.counters_lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, outcome: str):
+        with self.counters_lock:
+            self.counters[outcome] += 1
+
+    def stats(self) -> Dict:
+        with self.counters_lock:
+            return dict(self.counters)
+
+    def start(self) -> str:
+        """Serve in a background thread; returns the base URL for RESEARCHHELPER_API_STUB"""
+        self.thread = threading.Thread(target=self.serve_forever, name='api-stub', daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def _parse_args() -> Tuple[argparse.Namespace, Dict]:
+    parser = argparse.ArgumentParser(description='Replay recorded API fixtures with injected faults')
+    parser.add_argument('--fixtures', required=True, help='Fixture directory written in record mode')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--config', help='JSON file with "default" and per-host "hosts" fault settings')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible fault injection')
+    for name, default in DEFAULT_FAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), dest=name)
+    args = parser.parse_args()
+    faults = {name: getattr(args, name) for name in DEFAULT_FAULTS if getattr(args, name) is not None}
+    return args, faults
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args, faults = _parse_args()
+    if args.config:
+        config = StubConfig.from_file(args.config, args.seed, **faults)
+    else:
+        config = StubConfig(faults, seed=args.seed)
+
+    server = StubServer(FixtureStore(args.fixtures), config, args.host, args.port)
+    print(f"API stub replaying {args.fixtures} on {server.base_url}")
+    print(f"Point the pipeline at it with RESEARCHHELPER_API_STUB={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Stub stats: {json.dumps(server.stats())}")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
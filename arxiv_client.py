@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+arXiv Metadata Client
+Extracts arXiv IDs from DOIs, URLs and titles without network calls, looks up
+abstracts and PDF links for many IDs at once with id_list= queries, and parses
+the Atom feed entry by entry as it streams in
+"""
+
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, Optional
+from xml.etree import ElementTree as ET
+
+import http_client
+
+ARXIV_API_URL = 'http://export.arxiv.org/api/query'
+ATOM = '{http://www.w3.org/2005/Atom}'
+DEFAULT_BATCH_SIZE = int(os.environ.get('RESEARCHHELPER_ARXIV_BATCH_SIZE', '100'))
+
+# New-style (2007+) IDs like 2101.00001 and old-style IDs like hep-th/9901001 or math.GT/0309136
+_ID = r'(\d{4}\.\d{4,5}|[a-z][a-z\-]*(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?'
+_DOI_RE = re.compile(r'10\.48550/arxiv\.' + _ID, re.IGNORECASE)
+_URL_RE = re.compile(r'arxiv\.org/(?:abs|pdf|html)/' + _ID, re.IGNORECASE)
+_TEXT_RE = re.compile(r'\barxiv:\s*' + _ID, re.IGNORECASE)
+
+
+def extract_arxiv_id(doi: str = '', url: str = '', title: str = '') -> Optional[str]:
+    """arXiv ID (without version) from an arXiv DOI, an arxiv.org URL or an 'arXiv:' tag in the title"""
+    for value, pattern in ((doi, _DOI_RE), (url, _URL_RE), (title, _TEXT_RE), (doi, _TEXT_RE)):
+        if isinstance(value, str) and value:
+            match = pattern.search(value)
+            if match:
+                return match.group(1)
+    return None
+
+
+def pdf_url_for(arxiv_id: str) -> str:
+    return f"https://arxiv.org/pdf/{arxiv_id}.pdf"
+
+
+def _text(node: Optional[ET.Element]) -> str:
+    """Element text with whitespace (including the feed's line wrapping) collapsed"""
+    return ' '.join(node.text.split()) if node is not None and node.text else ''
+
+
+def _entry_to_dict(entry: ET.Element) -> Dict:
+    def text(tag):
+        return _text(entry.find(ATOM + tag))
+
+    entry_id = text('id')
+    match = _URL_RE.search(entry_id)
+    pdf_url = None
+    for link in entry.findall(ATOM + 'link'):
+        if link.get('type') == 'application/pdf' or link.get('title') == 'pdf':
+            pdf_url = link.get('href')
+            break
+    return {
+        'arxiv_id': match.group(1) if match else '',
+        'title': text('title'),
+        'abstract': text('summary'),
+        'published': text('published'),
+        'updated': text('updated'),
+        'authors': [_text(author.find(ATOM + 'name')) for author in entry.findall(ATOM + 'author')],
+        'pdf_url': pdf_url or (pdf_url_for(match.group(1)) if match else None)
+    }
+
+
+def iter_feed_entries(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """Parse an Atom feed incrementally, yielding each <entry> as a dict and discarding it"""
+    parser = ET.XMLPullParser(events=('end',))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if elem.tag == ATOM + 'entry':
+                yield _entry_to_dict(elem)
+                elem.clear()
+    parser.close()
+    for _, elem in parser.read_events():
+        if elem.tag == ATOM + 'entry':
+            yield _entry_to_dict(elem)
+
+
+class ArxivClient:
+    """Streaming client for the arXiv export API"""
+
+    def __init__(self, session=None, batch_size: int = DEFAULT_BATCH_SIZE, timeout: int = 30,
+                 log: Optional[Callable[[str], None]] = None):
+        self.session = session or http_client.get_session({'User-Agent': http_client.API_USER_AGENT})
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.log = log or (lambda msg: None)
+        self.requests_made = 0
+
+    def query(self, params: Dict) -> Iterator[Dict]:
+        """Yield entries for an export API query; raises on HTTP errors"""
+        response = self.session.get(ARXIV_API_URL, params=params, timeout=self.timeout, stream=True)
+        self.requests_made += 1
+        try:
+            if response.status_code != 200:
+                raise RuntimeError(f"arXiv API returned status {response.status_code}")
+            yield from iter_feed_entries(response.iter_content(chunk_size=16384))
+        finally:
+            response.close()
+
+    def search(self, search_query: str, max_results: int = 5) -> Iterator[Dict]:
+        return self.query({'search_query': search_query, 'max_results': max_results})
+
+    def fetch_by_ids(self, arxiv_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Entries keyed by arXiv ID, looked up batch_size IDs per request; unknown IDs are left out"""
+        unique_ids = list(dict.fromkeys(i for i in arxiv_ids if i))
+        results = {}
+        for start in range(0, len(unique_ids), self.batch_size):
+            chunk = unique_ids[start:start + self.batch_size]
+            self.log(f"[DEBUG] arXiv id_list lookup: {len(chunk)} IDs")
+            try:
+                for entry in self.query({'id_list': ','.join(chunk), 'max_results': len(chunk)}):
+                    # Malformed IDs come back as a single entry titled 'Error'
+                    if entry['arxiv_id'] and entry['title'] != 'Error':
+                        results[entry['arxiv_id']] = entry
+            except Exception as e:
+                self.log(f"[ERROR] arXiv batch error: {e}")
+        return results
+
+    def lookup_abstracts(self, arxiv_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Abstract lookup results in the same shape as search_arxiv, keyed by arXiv ID"""
+        return {
+            arxiv_id: {
+                'found': bool(entry['abstract']),
+                'abstract': entry['abstract'],
+                'pdf_url': entry['pdf_url'],
+                'source': 'arXiv'
+            }
+            for arxiv_id, entry in self.fetch_by_ids(arxiv_ids).items()
+        }
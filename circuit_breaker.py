@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Per-Source Circuit Breakers
+Stops calling an external host (CrossRef, Semantic Scholar, arXiv, Unpaywall,
+doi.org, publisher sites) after repeated timeouts, connection errors or 5xx
+responses, so a degraded source fails in milliseconds instead of a full timeout
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = int(os.environ.get('RESEARCHHELPER_BREAKER_FAILURES', '5'))
+DEFAULT_RESET_TIMEOUT = float(os.environ.get('RESEARCHHELPER_BREAKER_COOLDOWN', '30'))
+MAX_RESET_TIMEOUT = 600.0
+
+
+def is_failure_status(status: Optional[int]) -> bool:
+    """Server-side errors count against a source; 4xx answers mean it is up"""
+    return status is not None and status >= 500
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive failures. After the
+    cool-down one probe request is let through (half-open): success closes the
+    breaker, failure re-opens it with a doubled cool-down.
+    """
+
+    def __init__(self, host: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+        self.counters = {'successes': 0, 'failures': 0, 'rejected': 0, 'trips': 0}
+        self.last_error = ''
+
+    def allow(self) -> bool:
+        """True if a request may be sent now (and, when half-open, claims the probe)"""
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            self.counters['rejected'] += 1
+            return False
+
+    def release_probe(self):
+        """Free a claimed half-open probe that ended without an outcome (cancelled or never sent)"""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probe_in_flight = False
+
+    def record_success(self):
+        with self.lock:
+            self.counters['successes'] += 1
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self.reset_timeout = self.base_reset_timeout
+
+    def record_failure(self, error: str = ''):
+        with self.lock:
+            self.counters['failures'] += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN:
+                # Probe failed: stay away twice as long
+                self.probe_in_flight = False
+                self.reset_timeout = min(MAX_RESET_TIMEOUT, self.reset_timeout * 2)
+                self._trip()
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._trip()
+
+    def _trip(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.counters['trips'] += 1
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            retry_in = 0.0
+            if self.state == OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'retry_in_seconds': round(retry_in, 1),
+                'last_error': self.last_error,
+                **self.counters
+            }
+
+
+class BreakerRegistry:
+    """One breaker per host, created on first use"""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        host = (urlparse(url).hostname or url).lower()
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+                self.breakers[host] = breaker
+            return breaker
+
+    def stats(self) -> Dict[str, Dict]:
+        with self.lock:
+            breakers = dict(self.breakers)
+        return {host: breaker.snapshot() for host, breaker in breakers.items()}
+
+    def reset(self):
+        with self.lock:
+            self.breakers.clear()
+
+
+_registry = BreakerRegistry()
+
+
+def get_breakers() -> BreakerRegistry:
+    """Process-wide breaker registry shared by every session"""
+    return _registry
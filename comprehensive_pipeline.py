@@ -5,20 +5,28 @@ Orchestrates the complete pipeline: multi-keyword fetch -> deduplicate -> abstra
 """
 
 import pandas as pd
+import hashlib
 import os
 import sys
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 import logging
 import json
 
 # Import our custom modules
-from multi_keyword_fetcher import MultiKeywordPaperFetcher
+from multi_keyword_fetcher import IncrementalDeduplicator, MultiKeywordPaperFetcher, sources_complete, sources_ok
+from negative_cache import normalize_doi
+from query_watermarks import get_watermarks, query_key
+from corpus_index import get_corpus_index
 from abstract_digger import AbstractDigger
 from enhanced_pdf_downloader import EnhancedPDFDownloader
 from category_keyword_extractor import CategoryKeywordExtractor
 
 class ComprehensivePaperPipeline:
+    # Columns refreshed on corpus papers when an incremental fetch returns them again
+    METADATA_FIELDS = ['title', 'authors', 'journal', 'year', 'volume', 'issue', 'pages', 'publisher', 'url', 'type']
+
     def __init__(self, output_dir: str = "/Users/reddy/2025/ResearchHelper/results"):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
@@ -43,13 +51,15 @@ class ComprehensivePaperPipeline:
             'abstracts_enhanced': 0,
             'pdfs_downloaded': 0,
             'papers_categorized': 0,
+            'papers_updated': 0,
             'final_csv_path': ''
         }
 
     def run_complete_pipeline(self, keyword_configs: List[Dict],
                             enable_pdf_download: bool = True,
                             enable_abstract_enhancement: bool = True,
-                            enable_categorization: bool = True) -> Dict:
+                            enable_categorization: bool = True,
+                            incremental: bool = False) -> Dict:
         """
         Run the complete research paper pipeline
 
@@ -58,6 +68,9 @@ class ComprehensivePaperPipeline:
             enable_pdf_download: Whether to download PDFs
             enable_abstract_enhancement: Whether to enhance abstracts
             enable_categorization: Whether to categorize papers
+            incremental: Only fetch works new or updated since each query's last
+                         successful run, process just the new papers and merge them
+                         into the corpus CSV kept for this set of queries
 
         Returns:
             Dictionary with pipeline results and statistics
@@ -65,24 +78,53 @@ class ComprehensivePaperPipeline:
 
         self.stats['start_time'] = datetime.now()
         self.stats['total_configurations'] = len(keyword_configs)
+        run_started = time.time()
+        # Filled in by the fetch: corpus-index run, per-source scan outcomes
+        fetch_report = {}
+        corpus_path = self._corpus_path(keyword_configs) if incremental else None
 
         self.logger.info("🚀 Starting Comprehensive Research Paper Pipeline")
         self.logger.info(f"Configurations: {len(keyword_configs)}")
         self.logger.info(f"PDF Download: {'Enabled' if enable_pdf_download else 'Disabled'}")
         self.logger.info(f"Abstract Enhancement: {'Enabled' if enable_abstract_enhancement else 'Disabled'}")
         self.logger.info(f"Categorization: {'Enabled' if enable_categorization else 'Disabled'}")
+        if incremental:
+            self.logger.info(f"Incremental: merging into {corpus_path}")
 
         try:
             # Step 1: Multi-keyword paper fetching and deduplication
             self.logger.info("\n📋 STEP 1: Multi-keyword paper fetching and deduplication")
-            combined_csv_path = self.fetcher.fetch_multi_keyword_papers(keyword_configs)
+            if incremental:
+                watermarks = get_watermarks()
+                fetch_configs = [dict(config, since=watermarks.get(query_key(config))) for config in keyword_configs]
+                # The corpus CSV tracks what this query set has seen, so the global corpus index is not used
+                combined_csv_path = self.fetcher.fetch_multi_keyword_papers(fetch_configs, allow_empty=True,
+                                                                            use_corpus_index=False,
+                                                                            report=fetch_report)
+            else:
+                # Recorded papers are forgotten again if a later step fails (see below)
+                combined_csv_path = self.fetcher.fetch_multi_keyword_papers(keyword_configs, use_corpus_index=True,
+                                                                            report=fetch_report)
 
             # Read to get counts
             df = pd.read_csv(combined_csv_path)
             self.stats['papers_fetched'] = len(df)
+
+            corpus = None
+            if incremental:
+                corpus = self._load_corpus(corpus_path)
+                df, corpus = self._split_delta(df, corpus)
+                combined_csv_path = combined_csv_path.replace('.csv', '_new.csv')
+                df.to_csv(combined_csv_path, index=False)
+                self.logger.info(f"New papers since last run: {len(df)} "
+                                 f"({self.stats['papers_updated']} existing papers updated)")
             self.stats['papers_after_deduplication'] = len(df)
 
             current_csv = combined_csv_path
+            if df.empty:
+                # Nothing new (every paper already in the corpus): skip processing
+                self.logger.info("No new papers to process")
+                enable_abstract_enhancement = enable_pdf_download = enable_categorization = False
 
             # Step 2: Abstract enhancement (if enabled)
             if enable_abstract_enhancement:
@@ -128,6 +170,22 @@ class ComprehensivePaperPipeline:
             self.logger.info("\n✨ STEP 5: Final processing and cleanup")
             final_csv_path = self._finalize_csv(current_csv)
 
+            if incremental:
+                final_csv_path = self._merge_into_corpus(final_csv_path, corpus, corpus_path)
+                # A first run sets the baseline unless a source failed (its top max_results
+                # are the corpus); a delta run that failed or was cut off at max_results keeps
+                # the old watermark, so the next run asks again for the works it missed
+                watermarks = get_watermarks()
+                for config, status in zip(fetch_configs, fetch_report['source_status']):
+                    baseline = config['since'] is None
+                    if sources_ok(status) if baseline else sources_complete(status):
+                        watermarks.set(query_key(config), run_started, self.stats['papers_after_deduplication'])
+                    else:
+                        incomplete = [name for name, outcome in status.items()
+                                      if outcome['failed'] or not (baseline or outcome['ran_out'])]
+                        self.logger.warning(f"Watermark of '{config.get('primary_keyword', '')}' not advanced: "
+                                            f"{', '.join(incomplete) or 'no sources'} failed or hit max_results")
+
             self.stats['final_csv_path'] = final_csv_path
             self.stats['end_time'] = datetime.now()
 
@@ -144,6 +202,10 @@ class ComprehensivePaperPipeline:
         except Exception as e:
             self.logger.error(f"Pipeline failed: {e}")
             self.stats['end_time'] = datetime.now()
+            # Papers of a failed run were never processed: let the next run pick them up again
+            corpus = get_corpus_index()
+            if corpus is not None and fetch_report.get('run_id'):
+                corpus.forget_run(fetch_report['run_id'])
             return {
                 'success': False,
                 'error': str(e),
@@ -151,6 +213,60 @@ class ComprehensivePaperPipeline:
                 'message': f'Pipeline failed: {e}'
             }
 
+    def _corpus_path(self, keyword_configs: List[Dict]) -> str:
+        """Corpus CSV shared by incremental runs of the same set of queries"""
+        keys = sorted(query_key(config) for config in keyword_configs)
+        digest = hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.output_dir, f"corpus_{digest}.csv")
+
+    def _load_corpus(self, corpus_path: str) -> Optional[pd.DataFrame]:
+        if not os.path.exists(corpus_path):
+            self.logger.info("No corpus yet: this run builds it")
+            return None
+        corpus = pd.read_csv(corpus_path, dtype=str).fillna('')
+        self.logger.info(f"Loaded corpus: {len(corpus)} papers")
+        return corpus
+
+    def _split_delta(self, delta: pd.DataFrame, corpus: Optional[pd.DataFrame]):
+        """
+        Separate fetched papers into new ones and updates of corpus papers.
+        Updates (same DOI) refresh the corpus row's bibliographic metadata in place;
+        the rest are kept if they are not title-duplicates of a corpus paper.
+        """
+        delta = delta.fillna('')
+        if corpus is None or delta.empty:
+            return delta, corpus
+
+        doi_rows = {normalize_doi(doi): idx for idx, doi in corpus['doi'].items() if normalize_doi(doi)}
+        deduplicator = IncrementalDeduplicator()
+        deduplicator.seed(corpus.to_dict('records'))
+
+        new_rows = []
+        for record in delta.to_dict('records'):
+            doi = normalize_doi(record.get('doi', ''))
+            if doi and doi in doi_rows:
+                row = doi_rows[doi]
+                for field in self.METADATA_FIELDS:
+                    value = str(record.get(field, '')).strip()
+                    if value and field in corpus.columns:
+                        corpus.at[row, field] = value
+                self.stats['papers_updated'] += 1
+            elif deduplicator.add(record):
+                new_rows.append(record)
+        return pd.DataFrame(new_rows, columns=delta.columns), corpus
+
+    def _merge_into_corpus(self, final_csv_path: str, corpus: Optional[pd.DataFrame], corpus_path: str) -> str:
+        """Append this run's processed papers to the corpus, continuing its paper_id numbering"""
+        new_df = pd.read_csv(final_csv_path, dtype=str).fillna('')
+        if corpus is not None:
+            numbers = corpus['paper_id'].str.extract(r'(\d+)$')[0].dropna().astype(int)
+            start = numbers.max() + 1 if not numbers.empty else 1
+            new_df['paper_id'] = [f"paper_{idx:03d}" for idx in range(start, start + len(new_df))]
+            new_df = pd.concat([corpus, new_df], ignore_index=True)
+        new_df.to_csv(corpus_path, index=False)
+        self.logger.info(f"Corpus saved: {corpus_path} ({len(new_df)} papers)")
+        return corpus_path
+
     def _finalize_csv(self, csv_path: str) -> str:
         """Final processing of the CSV to ensure all columns are present and clean"""
         df = pd.read_csv(csv_path)
@@ -217,7 +333,8 @@ class ComprehensivePaperPipeline:
 def main():
     """Main function for command line usage"""
     if len(sys.argv) < 2:
-        print("Usage: python comprehensive_pipeline.py <config_file.json>")
+        print("Usage: python comprehensive_pipeline.py <config_file.json> [--incremental]")
+        print("  --incremental  fetch only works new or updated since the last run and merge them into the corpus")
         print("\nExample config file format:")
         print(json.dumps([
             {
@@ -256,7 +373,8 @@ def main():
         keyword_configs=keyword_configs,
         enable_pdf_download=True,
         enable_abstract_enhancement=True,
-        enable_categorization=True
+        enable_categorization=True,
+        incremental='--incremental' in sys.argv[2:]
     )
 
     if result['success']:
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Persistent Corpus Index
+Remembers every paper a run has already let through (by canonical DOI and by
+canonical-title signature) together with the run that first saw it, so later
+fetches, deduplications and CSV merges only pass on papers that are new.
+Each lookup is a primary-key probe, O(1) per paper however large the corpus.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from negative_cache import DEFAULT_CACHE_DIR, normalize_doi
+from title_normalization import fingerprint
+
+# Titles shorter than this ("Editorial", "Introduction") are too generic to identify a paper
+MIN_SIGNATURE_WORDS = 4
+
+ALREADY_IN_CORPUS = 'already in corpus'
+
+logger = logging.getLogger(__name__)
+
+
+def paper_signatures(paper: Dict) -> List[str]:
+    """Index keys of a paper: doi:<canonical DOI> and title:<canonical title>"""
+    keys = []
+    doi = normalize_doi(paper.get('doi', ''))
+    if doi:
+        keys.append(f"doi:{doi}")
+    title = fingerprint(paper.get('title', ''))
+    if len(title.words) >= MIN_SIGNATURE_WORDS:
+        keys.append(f"title:{title.canonical}")
+    return keys
+
+
+class CorpusIndex:
+    """SQLite table of paper signatures -> provenance (run, source, first seen)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.stats_counters = {'looked_up': 0, 'known': 0, 'recorded': 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS corpus_papers (
+                signature TEXT PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                doi TEXT NOT NULL,
+                first_seen REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_corpus_papers_run ON corpus_papers(run_id)')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS corpus_runs (
+                run_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                label TEXT NOT NULL,
+                started_at REAL NOT NULL
+            )
+        ''')
+
+    def start_run(self, source: str, label: str = '') -> str:
+        """Register a run (e.g. source='fetch_multi_keyword') and return its ID"""
+        run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        with self.lock:
+            self.conn.execute('INSERT INTO corpus_runs (run_id, source, label, started_at) VALUES (?, ?, ?, ?)',
+                              (run_id, source, label, time.time()))
+        return run_id
+
+    def lookup(self, paper: Dict) -> Optional[Dict]:
+        """Provenance of the run that first saw this paper, or None if it is new"""
+        keys = paper_signatures(paper)
+        with self.lock:
+            self.stats_counters['looked_up'] += 1
+            for key in keys:
+                row = self.conn.execute(
+                    'SELECT p.run_id, r.source, p.first_seen FROM corpus_papers p '
+                    'LEFT JOIN corpus_runs r ON r.run_id = p.run_id WHERE p.signature = ?', (key,)
+                ).fetchone()
+                if row:
+                    self.stats_counters['known'] += 1
+                    return {'run_id': row[0], 'source': row[1] or '', 'first_seen': row[2],
+                            'matched_on': key.split(':', 1)[0]}
+        return None
+
+    def record(self, papers: Iterable[Dict], run_id: str) -> int:
+        """Remember papers as seen by run_id (signatures already present keep their provenance)"""
+        now = time.time()
+        rows = [(key, run_id, str(paper.get('title', '') or ''), normalize_doi(paper.get('doi', '')), now)
+                for paper in papers for key in paper_signatures(paper)]
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                before = self.conn.total_changes
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO corpus_papers (signature, run_id, title, doi, first_seen) '
+                    'VALUES (?, ?, ?, ?, ?)', rows)
+                added = self.conn.total_changes - before
+                self.conn.execute('COMMIT')
+            except sqlite3.Error:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.stats_counters['recorded'] += added
+        return added
+
+    def partition(self, papers: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        (new, known): known papers are tagged corpus_status='already in corpus'
+        plus the first_seen_run that let them through
+        """
+        new, known = [], []
+        for paper in papers:
+            provenance = self.lookup(paper)
+            if provenance is None:
+                new.append(paper)
+            else:
+                paper['corpus_status'] = ALREADY_IN_CORPUS
+                paper['first_seen_run'] = provenance['run_id']
+                known.append(paper)
+        return new, known
+
+    def filter_new(self, papers: List[Dict], source: str, label: str = '') -> Tuple[List[Dict], List[Dict], str]:
+        """Partition papers and record the new ones under a fresh run; returns (new, known, run_id)"""
+        new, known = self.partition(papers)
+        run_id = self.start_run(source, label)
+        self.record(new, run_id)
+        return new, known, run_id
+
+    def forget_run(self, run_id: str) -> int:
+        """Drop what a run recorded (e.g. when its pipeline failed before processing the papers)"""
+        with self.lock:
+            removed = self.conn.execute('DELETE FROM corpus_papers WHERE run_id = ?', (run_id,)).rowcount
+            self.conn.execute('DELETE FROM corpus_runs WHERE run_id = ?', (run_id,))
+        return removed
+
+    def stats(self) -> Dict:
+        with self.lock:
+            signatures = self.conn.execute('SELECT COUNT(*) FROM corpus_papers').fetchone()[0]
+            runs = self.conn.execute('SELECT COUNT(*) FROM corpus_runs').fetchone()[0]
+            counters = dict(self.stats_counters)
+        counters.update({'signatures': signatures, 'runs': runs})
+        return counters
+
+
+_index: Optional[CorpusIndex] = None
+_index_lock = threading.Lock()
+_index_failed = False
+
+
+def get_corpus_index() -> Optional[CorpusIndex]:
+    """Process-wide corpus index, or None when disabled (RESEARCHHELPER_CORPUS_INDEX=0) or unavailable"""
+    global _index, _index_failed
+    if _index is not None or _index_failed:
+        return _index
+    if os.environ.get('RESEARCHHELPER_CORPUS_INDEX', '1') == '0':
+        _index_failed = True
+        return None
+    with _index_lock:
+        if _index is None and not _index_failed:
+            cache_dir = os.environ.get('RESEARCHHELPER_CACHE_DIR', DEFAULT_CACHE_DIR)
+            try:
+                _index = CorpusIndex(os.path.join(cache_dir, 'corpus_index.sqlite'))
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Corpus index disabled: {e}")
+                _index_failed = True
+    return _index
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+CrossRef Fetch Engine
+Pages through the CrossRef /works API with several pages in flight at once,
+stopping (and cancelling outstanding pages) as soon as enough papers are accepted.
+Deep scans switch to cursor paging, and every page is projected with select= to
+the fields the paper extractors read. Pages are decoded as they stream in
+(crossref_stream), one item at a time. Broad queries can be split into
+publication-date shards that are fetched in parallel and ranked globally.
+"""
+
+import math
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import http_client
+from crossref_stream import iter_response_works
+
+CROSSREF_WORKS_URL = 'https://api.crossref.org/works'
+DEFAULT_MAX_IN_FLIGHT = int(os.environ.get('RESEARCHHELPER_CROSSREF_IN_FLIGHT', '4'))
+DEFAULT_ROWS_PER_PAGE = 20
+
+# Scans deeper than this use cursor=* paging (CrossRef caps offset at 10,000 and
+# slows down the deeper an offset goes). Kept below MAX_TOTAL_RESULTS so the
+# largest unfiltered /api/fetch requests page by cursor too
+DEFAULT_CURSOR_THRESHOLD = 500
+DEFAULT_CURSOR_ROWS = 500
+MAX_ROWS = 1000
+MAX_OFFSET = 10000
+
+# Fields read by extract_paper_info / _extract_crossref_paper; everything else
+# (references, funders, licenses...) is left out of the response
+SELECT_FIELDS = [
+    'DOI', 'title', 'author', 'abstract', 'container-title', 'published-print',
+    'published-online', 'volume', 'issue', 'page', 'publisher', 'URL', 'type', 'score'
+]
+
+# Sharded fetches: months per publication-date shard (0 = no sharding) and how
+# shard results are merged
+DEFAULT_SHARD_MONTHS = int(os.environ.get('RESEARCHHELPER_CROSSREF_SHARD_MONTHS', '0'))
+RANK_RELEVANCE = 'relevance'    # CrossRef score across all shards
+RANK_NEWEST = 'newest'          # Publication date, newest first
+RANK_INTERLEAVE = 'interleave'  # Round-robin over shards (newest shard first), each in relevance order
+RANKINGS = (RANK_RELEVANCE, RANK_NEWEST, RANK_INTERLEAVE)
+
+_DATE_FILTER_RE = re.compile(r'(from|until)-pub-date:[^,]*')
+
+# Filtered scans: items scanned per request before giving up, and the accept
+# rate assumed before the first page comes back
+DEFAULT_SCAN_BUDGET = int(os.environ.get('RESEARCHHELPER_CROSSREF_SCAN_BUDGET', '5000'))
+PRIOR_PASS_RATE = 0.5
+
+# Largest total_results an API caller may ask for (larger requests are rejected)
+MAX_TOTAL_RESULTS = int(os.environ.get('RESEARCHHELPER_MAX_RESULTS', '1000'))
+
+
+def build_works_params(keyword: str, additional_keyword: str = '', from_year: int = 2020,
+                       to_year: int = 2025, paper_type_filter: bool = True,
+                       select: bool = True, phrase: bool = False,
+                       since: Optional[str] = None) -> Dict[str, str]:
+    """
+    Query parameters for a title search restricted to a publication-year range.
+    phrase=True quotes multi-word keywords, so CrossRef ranks titles containing
+    the exact phrase first (used when results are title-filtered locally).
+    since (YYYY-MM-DD) limits results to works indexed (new or updated) from that date.
+    """
+    if phrase:
+        terms = [term.strip() for term in (keyword, additional_keyword) if term.strip()]
+        query = ' '.join(f'"{term}"' if ' ' in term else term for term in terms)
+    else:
+        query = f"{keyword} {additional_keyword}".strip() if additional_keyword.strip() else keyword
+    filters = f'from-pub-date:{from_year},until-pub-date:{to_year}'
+    if paper_type_filter:
+        filters += ',type:journal-article,type:proceedings-article'
+    if since:
+        filters += f',from-index-date:{since}'
+    params = {
+        'query.title': query,
+        'filter': filters,
+        'sort': 'relevance'
+    }
+    if select:
+        params['select'] = ','.join(SELECT_FIELDS)
+    return params
+
+
+def date_shards(from_year: int, to_year: int, months_per_shard: int = 12) -> List[Tuple[str, str]]:
+    """Split from_year..to_year into (from-pub-date, until-pub-date) windows, newest first"""
+    months_per_shard = max(1, months_per_shard)
+    shards = []
+    start = from_year * 12
+    last = to_year * 12 + 11
+    while start <= last:
+        end = min(start + months_per_shard - 1, last)
+        shards.append((f"{start // 12}-{start % 12 + 1:02d}", f"{end // 12}-{end % 12 + 1:02d}"))
+        start = end + 1
+    return shards[::-1]
+
+
+def shard_params(params: Dict[str, str], from_date: str, until_date: str) -> Dict[str, str]:
+    """Copy of works params with the publication-date filter narrowed to one shard"""
+    filters = _DATE_FILTER_RE.sub('', params.get('filter', ''))
+    filters = ','.join(part for part in filters.split(',') if part)
+    window = f"from-pub-date:{from_date},until-pub-date:{until_date}"
+    return dict(params, filter=f"{window},{filters}" if filters else window)
+
+
+def _publication_date(item: Dict) -> Tuple[int, ...]:
+    for field in ('published-print', 'published-online'):
+        parts = (item.get(field) or {}).get('date-parts') or [[]]
+        if parts[0] and parts[0][0]:
+            return tuple(int(part) for part in parts[0] if part is not None)
+    return (0,)
+
+
+def rank_shards(shard_items: List[List[Dict]], ranking: str = RANK_RELEVANCE) -> List[Dict]:
+    """Merge per-shard item lists (newest shard first) into one global ranking"""
+    if ranking == RANK_INTERLEAVE:
+        merged = []
+        for rank in range(max((len(items) for items in shard_items), default=0)):
+            merged.extend(items[rank] for items in shard_items if rank < len(items))
+        return merged
+    merged = [item for items in shard_items for item in items]
+    if ranking == RANK_NEWEST:
+        return sorted(merged, key=_publication_date, reverse=True)
+    return sorted(merged, key=lambda item: item.get('score') or 0, reverse=True)
+
+
+class YieldEstimator:
+    """
+    Running accept rate of a filtered scan, used to size the next page so that
+    it is expected to cover the remaining results in one request
+    """
+
+    PRIOR_WEIGHT = 2  # The prior counts as this many observed items
+    MIN_RATE = 0.01
+
+    def __init__(self, wanted: int, prior_rate: float = PRIOR_PASS_RATE, headroom: float = 1.25,
+                 min_rows: int = DEFAULT_ROWS_PER_PAGE, max_rows: int = MAX_ROWS):
+        self.wanted = wanted
+        self.prior_rate = prior_rate
+        self.headroom = headroom
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.scanned = 0
+        self.accepted = 0
+
+    def record(self, accepted: bool):
+        self.scanned += 1
+        self.accepted += accepted
+
+    @property
+    def rate(self) -> float:
+        rate = (self.accepted + self.prior_rate * self.PRIOR_WEIGHT) / (self.scanned + self.PRIOR_WEIGHT)
+        return max(self.MIN_RATE, rate)
+
+    def next_rows(self) -> int:
+        remaining = max(1, self.wanted - self.accepted)
+        rows = math.ceil(remaining / self.rate * self.headroom)
+        return max(self.min_rows, min(self.max_rows, rows))
+
+
+def new_scan() -> Dict[str, bool]:
+    """Outcome flags a scan fills in; neither is set when it stops at a result count or scan budget"""
+    return {'ran_out': False, 'failed': False}
+
+
+class CrossRefFetcher:
+    """Concurrent offset pager (shallow scans) and cursor pager (deep scans) over CrossRef /works"""
+
+    def __init__(self, session=None, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 rows_per_page: int = DEFAULT_ROWS_PER_PAGE, timeout: int = 30,
+                 log: Optional[Callable[[str], None]] = None,
+                 cursor_threshold: int = DEFAULT_CURSOR_THRESHOLD,
+                 cursor_rows: int = DEFAULT_CURSOR_ROWS):
+        self.session = session or http_client.get_session({'User-Agent': http_client.API_USER_AGENT})
+        self.max_in_flight = max(1, max_in_flight)
+        self.rows_per_page = min(rows_per_page, MAX_ROWS)
+        self.timeout = timeout
+        self.cursor_threshold = min(cursor_threshold, MAX_OFFSET)
+        self.cursor_rows = min(cursor_rows, MAX_ROWS)
+        self.log = log or (lambda msg: None)
+        self.pages_requested = 0
+        # How the last fetch ended: ran_out (CrossRef had no more items) or failed (a page errored)
+        self.last_scan = new_scan()
+
+    def stream_items(self, params: Dict[str, str], meta: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Yield one page's items as they are decoded, projected to the select= fields
+        (all fields without select=). Message-level values such as next-cursor are
+        put in meta; raises on HTTP errors.
+        """
+        response = self.session.get(CROSSREF_WORKS_URL, params=params, timeout=self.timeout, stream=True)
+        if not response.ok:
+            response.close()
+            raise RuntimeError(f"CrossRef API returned status {response.status_code}")
+        fields = params['select'].split(',') if params.get('select') else None
+        return iter_response_works(response, fields, meta)
+
+    def fetch_page(self, params: Dict[str, str], offset: int, rows: int) -> List[Dict]:
+        """Fetch one offset page of items; raises on HTTP errors"""
+        self.log(f"[DEBUG] Fetching batch: offset={offset}, rows={rows}")
+        return list(self.stream_items(dict(params, rows=rows, offset=offset)))
+
+    def iter_items(self, params: Dict[str, str], max_scanned: Optional[int] = None,
+                   outcome: Optional[Dict[str, bool]] = None) -> Iterator[Dict]:
+        """
+        Yield items in relevance order. Shallow scans use concurrent offset pages;
+        unbounded scans or scans deeper than cursor_threshold use cursor paging.
+        Page errors end the scan early; outcome (see new_scan) records why it ended.
+        """
+        if max_scanned is None or max_scanned > self.cursor_threshold:
+            yield from self._iter_cursor(params, max_scanned, outcome=outcome)
+        else:
+            yield from self._iter_offset(params, max_scanned, outcome)
+
+    def _iter_cursor(self, params: Dict[str, str], max_scanned: Optional[int],
+                     page_rows: Optional[int] = None,
+                     estimator: Optional[YieldEstimator] = None,
+                     outcome: Optional[Dict[str, bool]] = None) -> Iterator[Dict]:
+        """
+        Sequential cursor=* paging with large pages; no depth limit. With an
+        estimator (fed by the consumer), each page is sized from the accept rate
+        observed so far.
+        """
+        outcome = outcome if outcome is not None else new_scan()
+        cursor = '*'
+        scanned = 0
+        while cursor:
+            rows = estimator.next_rows() if estimator else page_rows or self.cursor_rows
+            if max_scanned is not None:
+                rows = max(1, min(rows, max_scanned - scanned))
+            self.log(f"[DEBUG] Fetching cursor batch: rows={rows}")
+            meta = {}
+            page_items = 0
+            # Items are handed on as they are decoded, before the rest of the page arrives
+            items = None
+            try:
+                items = self.stream_items(dict(params, rows=rows, cursor=cursor), meta)
+                self.pages_requested += 1
+                for item in items:
+                    page_items += 1
+                    scanned += 1
+                    yield item
+                    if max_scanned is not None and scanned >= max_scanned:
+                        return
+            except Exception as e:
+                self.log(f"[ERROR] Error fetching cursor batch after {scanned} items: {e}")
+                outcome['failed'] = True
+                return
+            finally:
+                if items is not None:
+                    items.close()
+            self.log(f"[DEBUG] Items fetched in this batch: {page_items}")
+            if not page_items:
+                self.log("[DEBUG] No more items returned from CrossRef API.")
+                outcome['ran_out'] = True
+                return
+            if page_items < rows:
+                outcome['ran_out'] = True
+                return
+            cursor = meta.get('next-cursor')
+        outcome['ran_out'] = True
+
+    def _iter_offset(self, params: Dict[str, str], max_scanned: Optional[int],
+                     outcome: Optional[Dict[str, bool]] = None) -> Iterator[Dict]:
+        """
+        Offset paging with up to max_in_flight later pages already being requested.
+        Closing the generator cancels pages not yet started.
+        """
+        outcome = outcome if outcome is not None else new_scan()
+        rows = self.rows_per_page
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        pending = deque()
+        next_offset = 0
+        exhausted = False
+        scanned = 0
+
+        def submit_more():
+            nonlocal next_offset
+            while (not exhausted and len(pending) < self.max_in_flight
+                   and (max_scanned is None or next_offset < max_scanned)):
+                pending.append((next_offset, executor.submit(self.fetch_page, params, next_offset, rows)))
+                self.pages_requested += 1
+                next_offset += rows
+
+        try:
+            submit_more()
+            while pending:
+                offset, future = pending.popleft()
+                try:
+                    items = future.result()
+                except Exception as e:
+                    self.log(f"[ERROR] Error fetching batch at offset {offset}: {e}")
+                    outcome['failed'] = True
+                    break
+
+                self.log(f"[DEBUG] Items fetched in this batch: {len(items)}")
+                if len(items) < rows:
+                    # Last page: later offsets can only be empty
+                    exhausted = True
+                    outcome['ran_out'] = True
+                    for _, later in pending:
+                        later.cancel()
+                    pending.clear()
+
+                for item in items:
+                    scanned += 1
+                    yield item
+                    if max_scanned is not None and scanned >= max_scanned:
+                        return
+
+                if not items:
+                    self.log("[DEBUG] No more items returned from CrossRef API.")
+                    outcome['ran_out'] = True
+                    break
+                submit_more()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def fetch(self, params: Dict[str, str], total_results: int,
+              accept: Optional[Callable[[Dict], bool]] = None,
+              max_scanned: Optional[int] = None) -> List[Dict]:
+        """Collect up to total_results accepted items, stopping early once satisfied (see last_scan)"""
+        self.last_scan = new_scan()
+        accepted = []
+        items = self.iter_items(params, max_scanned, self.last_scan)
+        try:
+            for item in items:
+                if accept is None or accept(item):
+                    accepted.append(item)
+                    if len(accepted) >= total_results:
+                        break
+        finally:
+            items.close()
+        return accepted
+
+    def fetch_adaptive(self, params: Dict[str, str], total_results: int,
+                       accept: Optional[Callable[[Dict], bool]] = None,
+                       max_scanned: Optional[int] = DEFAULT_SCAN_BUDGET) -> List[Dict]:
+        """
+        Collect up to total_results accepted items with as few requests as possible:
+        each cursor page is sized from the filter pass rate observed so far (a
+        filter passing 1 in 10 rows gets pages ten times the remaining count).
+        Stops once satisfied, when CrossRef runs out, or after max_scanned items (see last_scan).
+        """
+        self.last_scan = new_scan()
+        estimator = YieldEstimator(total_results, prior_rate=PRIOR_PASS_RATE if accept else 1.0)
+        accepted = []
+        items = self._iter_cursor(params, max_scanned, estimator=estimator, outcome=self.last_scan)
+        try:
+            for item in items:
+                passed = accept is None or accept(item)
+                estimator.record(passed)
+                if passed:
+                    accepted.append(item)
+                    if len(accepted) >= total_results:
+                        break
+        finally:
+            items.close()
+        self.log(f"[DEBUG] Accepted {estimator.accepted} of {estimator.scanned} scanned items "
+                 f"({estimator.accepted / max(1, estimator.scanned):.0%}) in {self.pages_requested} requests")
+        return accepted
+
+    def fetch_sharded(self, params: Dict[str, str], shards: List[Tuple[str, str]], total_results: int,
+                      accept: Optional[Callable[[Dict], bool]] = None, ranking: str = RANK_RELEVANCE,
+                      overfetch: float = 1.0, max_scanned: Optional[int] = DEFAULT_SCAN_BUDGET) -> List[Dict]:
+        """
+        Run one cursor scan per publication-date shard in parallel and merge them.
+
+        Each shard first collects a quota of ceil(total_results * overfetch / shards)
+        accepted items, sizing its pages from its own filter pass rate; if some shards run dry, the shortfall is spread over the
+        shards that still have items, so total_results is honored whenever the
+        shards hold that many. Cursor paging has no depth limit, so each shard can
+        go as deep as its quota needs, up to its share of max_scanned (never less
+        than the results asked for); no shard is topped up once the budget is spent.
+        """
+        self.last_scan = new_scan()
+        if not shards:
+            self.last_scan['ran_out'] = True
+            return []
+        if ranking not in RANKINGS:
+            raise ValueError(f"Unknown ranking '{ranking}' (expected one of {', '.join(RANKINGS)})")
+
+        target = max(total_results, math.ceil(total_results * overfetch))
+        quota = math.ceil(target / len(shards))
+        budget = None if max_scanned is None else max(max_scanned, target)
+        shard_budget = None if budget is None else math.ceil(budget / len(shards))
+        estimators = [YieldEstimator(quota) for _ in shards]
+        outcomes = [new_scan() for _ in shards]
+        iterators = [self._iter_cursor(shard_params(params, start, end), shard_budget, estimator=estimator,
+                                       outcome=outcome)
+                     for (start, end), estimator, outcome in zip(shards, estimators, outcomes)]
+        shard_items: List[List[Dict]] = [[] for _ in shards]
+        exhausted = [False] * len(shards)
+
+        def pull(index: int, wanted: int):
+            collected = 0
+            estimators[index].wanted = len(shard_items[index]) + wanted
+            for item in iterators[index]:
+                passed = accept is None or accept(item)
+                estimators[index].record(passed)
+                if passed:
+                    shard_items[index].append(item)
+                    collected += 1
+                    if collected >= wanted:
+                        return
+            exhausted[index] = True
+
+        executor = ThreadPoolExecutor(max_workers=min(len(shards), self.max_in_flight))
+        try:
+            wanted = {index: quota for index in range(len(shards))}
+            while wanted:
+                list(executor.map(lambda index: pull(index, wanted[index]), wanted))
+                shortfall = target - sum(len(items) for items in shard_items)
+                open_shards = [index for index in range(len(shards)) if not exhausted[index]]
+                if shortfall <= 0 or not open_shards:
+                    break
+                scanned = sum(estimator.scanned for estimator in estimators)
+                if budget is not None and scanned >= budget:
+                    self.log(f"[DEBUG] Scan budget of {budget} items spent; {shortfall} items short")
+                    break
+                self.log(f"[DEBUG] Shards short by {shortfall} items; topping up {len(open_shards)} shards")
+                wanted = {index: math.ceil(shortfall / len(open_shards)) for index in open_shards}
+        finally:
+            executor.shutdown(wait=True)
+            for iterator in iterators:
+                iterator.close()
+
+        self.last_scan = {'ran_out': all(outcome['ran_out'] for outcome in outcomes),
+                          'failed': any(outcome['failed'] for outcome in outcomes)}
+        self.log("[DEBUG] Shard results: " + ', '.join(
+            f"{start}..{end}: {len(items)}" for (start, end), items in zip(shards, shard_items)))
+        return rank_shards(shard_items, ranking)[:total_results]
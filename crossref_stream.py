@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Streaming CrossRef Decoder
+Decodes a CrossRef /works response incrementally: each entry of message.items
+is yielded as soon as its closing brace arrives, and only the requested fields
+are decoded (reference lists and other bulky fields are skipped, never built).
+Peak memory is one item plus one network chunk instead of the whole page.
+"""
+
+import codecs
+import json
+import re
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'\s*')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_SCALAR = re.compile(r'[^,}\]\s]+')
+
+
+class _Reader:
+    """Text buffer over a byte-chunk iterator; consumed text is discarded as parsing advances"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.scan_state: Optional[Tuple[int, int]] = None  # (depth, offset) of an unfinished container scan
+
+    def fill(self) -> bool:
+        """Append the next chunk; False once the input is exhausted"""
+        while not self.eof:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.eof = True
+                text = self.decoder.decode(b'', final=True)
+            else:
+                text = self.decoder.decode(chunk)
+            if text:
+                if self.pos:
+                    self.buf = self.buf[self.pos:]
+                    if self.scan_state:
+                        self.scan_state = (self.scan_state[0], self.scan_state[1] - self.pos)
+                    self.pos = 0
+                self.buf += text
+                return True
+        return False
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of input)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Malformed CrossRef response: expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def _value_end(self, start: int) -> Optional[int]:
+        """End offset of the JSON value starting at start, or None if it is not complete yet"""
+        buf = self.buf
+        char = buf[start]
+        if char == '"':
+            match = _STRING.match(buf, start)
+            return match.end() if match else None
+        if char in '{[':
+            # Resume where the previous (incomplete) scan of this value stopped
+            depth, index = self.scan_state or (0, start)
+            while True:
+                match = _STRUCTURAL.search(buf, index)
+                if match is None:
+                    self.scan_state = (depth, len(buf))
+                    return None
+                token = match.group()
+                if token == '"':
+                    string = _STRING.match(buf, match.start())
+                    if string is None:
+                        self.scan_state = (depth, match.start())
+                        return None
+                    index = string.end()
+                    continue
+                depth += 1 if token in '{[' else -1
+                index = match.end()
+                if depth == 0:
+                    return index
+        match = _SCALAR.match(buf, start)
+        if match is None or (match.end() == len(buf) and not self.eof):
+            return None
+        return match.end()
+
+    def read_raw(self) -> str:
+        """Consume the next complete JSON value and return its text"""
+        if not self.peek():
+            raise ValueError('Malformed CrossRef response: unexpected end of input')
+        while True:
+            end = self._value_end(self.pos)
+            if end is not None:
+                self.scan_state = None
+                text = self.buf[self.pos:end]
+                self.pos = end
+                return text
+            if not self.fill():
+                raise ValueError('Malformed CrossRef response: truncated value')
+
+    def read_value(self):
+        return json.loads(self.read_raw())
+
+    def skip_value(self):
+        self.read_raw()
+
+    def read_key(self) -> str:
+        key = self.read_value()
+        self.expect(':')
+        return key
+
+    def iter_members(self) -> Iterator[str]:
+        """Walk an object: yields each key, leaving the reader at its value"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            yield self.read_key()
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Malformed CrossRef response: expected ',' or '}}' at offset {self.pos - 1}")
+
+    def iter_elements(self) -> Iterator[None]:
+        """Walk an array: yields once per element, leaving the reader at it"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield None
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Malformed CrossRef response: expected ',' or ']' at offset {self.pos - 1}")
+
+
+def _read_item(reader: _Reader, fields: Optional[Set[str]]) -> Dict:
+    if fields is None:
+        return reader.read_value()
+    item = {}
+    for key in reader.iter_members():
+        if key in fields:
+            item[key] = reader.read_value()
+        else:
+            reader.skip_value()
+    return item
+
+
+def iter_works(chunks: Iterable[bytes], fields: Optional[Iterable[str]] = None,
+               meta: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Yield the items of a CrossRef works response one at a time, keeping only
+    `fields` (all fields when None). Top-level and message-level values other
+    than the items (status, total-results, next-cursor, ...) are stored in meta.
+    """
+    fields = set(fields) if fields is not None else None
+    meta = meta if meta is not None else {}
+    reader = _Reader(chunks)
+    for key in reader.iter_members():
+        if key != 'message' or reader.peek() != '{':
+            meta[key] = reader.read_value()
+            continue
+        for message_key in reader.iter_members():
+            if message_key == 'items' and reader.peek() == '[':
+                for _ in reader.iter_elements():
+                    yield _read_item(reader, fields)
+            else:
+                meta[message_key] = reader.read_value()
+
+
+def iter_response_works(response, fields: Optional[Iterable[str]] = None,
+                        meta: Optional[Dict] = None) -> Iterator[Dict]:
+    """iter_works over a streamed requests response, closing it when done or abandoned"""
+    chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+    try:
+        yield from iter_works(chunks, fields, meta)
+        # Read past the closing brace to the end of the body, so the shared client can cache it
+        for _ in chunks:
+            pass
+    finally:
+        response.close()
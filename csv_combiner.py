@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 CSV Combiner and Deduplicator
-Combines multiple CSV files and removes duplicates based on title similarity
+Combines multiple CSV files and merges duplicates found by title similarity or DOI
 """
 
 import pandas as pd
@@ -11,45 +11,73 @@ from datetime import datetime
 import argparse
 import logging
 
+from near_duplicates import similar_pairs
+from duplicate_clusters import doi_pairs, fuse_duplicates
+from title_normalization import jaccard, title_similarity, title_tokens
+from similarity_join import similarity_join
+from corpus_index import get_corpus_index
+
 class CSVCombiner:
     def __init__(self):
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
+        self.join_stats = {}  # Candidate-pruning counters of the last exact find_duplicates
 
     def title_similarity(self, title1: str, title2: str) -> float:
         """Calculate similarity between two titles"""
-        if not title1 or not title2:
-            return 0.0
-        
-        # Normalize titles
-        title1 = re.sub(r'[^\w\s]', ' ', str(title1).lower()).strip()
-        title2 = re.sub(r'[^\w\s]', ' ', str(title2).lower()).strip()
-        
-        words1 = set(title1.split())
-        words2 = set(title2.split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union) if union else 0.0
+        return title_similarity(title1, title2)
 
-    def find_duplicates(self, df: pd.DataFrame, similarity_threshold: float = 0.85) -> list:
-        """Find duplicate papers based on title similarity"""
-        duplicates = []
+    def find_duplicate_pairs(self, df: pd.DataFrame, similarity_threshold: float = 0.85, exact: bool = False,
+                             match_doi: bool = False) -> list:
+        """
+        (i, j) row positions, i < j, of duplicate pairs: titles with
+        title_similarity >= similarity_threshold, plus rows sharing a canonical
+        DOI when match_doi is set. exact=True runs a prefix-filtered similarity
+        join instead of the MinHash-LSH candidate search (for audited exports)
+        """
         titles = df['title'].fillna('').tolist()
         
-        for i in range(len(titles)):
-            for j in range(i + 1, len(titles)):
-                if self.title_similarity(titles[i], titles[j]) >= similarity_threshold:
-                    duplicates.append(j)  # Mark the later one as duplicate
-        
-        return list(set(duplicates))
+        if exact:
+            pairs, stats = similarity_join([title_tokens(title) for title in titles], similarity_threshold)
+            self.join_stats = stats
+            self.logger.info(f"Exact join: {stats['pairs']} duplicate pairs from {stats['candidates']} candidates "
+                             f"({stats['possible_pairs']} possible pairs, {stats['pruned_by_length']} postings "
+                             f"pruned by length, {stats['pruned_by_position']} candidates by position)")
+        else:
+            # Each title is looked up among the earlier ones in a MinHash-LSH index and
+            # the candidates are confirmed with title_similarity's Jaccard measure
+            pairs = similar_pairs(titles, similarity_threshold, title_tokens, jaccard, inclusive=True)
+        
+        if match_doi and 'doi' in df.columns:
+            pairs = pairs + doi_pairs(df['doi'].tolist())
+        return pairs
 
-    def combine_csvs(self, input_dir: str, output_path: str) -> pd.DataFrame:
-        """Combine all CSV files in the directory"""
+    def find_duplicates(self, df: pd.DataFrame, similarity_threshold: float = 0.85, exact: bool = False) -> list:
+        """
+        Find duplicate papers based on title similarity (exact: see find_duplicate_pairs)
+        """
+        pairs = self.find_duplicate_pairs(df, similarity_threshold, exact)
+        return [df.index[position] for position in sorted({j for _, j in pairs})]  # Mark the later one as duplicate
+
+    def merge_duplicates(self, df: pd.DataFrame, similarity_threshold: float = 0.85, exact: bool = False) -> pd.DataFrame:
+        """
+        Group duplicate rows (similar titles or the same DOI, transitively) and
+        fuse each group into one row, keeping the abstract, DOI and PDF any copy has
+        """
+        pairs = self.find_duplicate_pairs(df, similarity_threshold, exact, match_doi=True)
+        fused, clusters = fuse_duplicates(df.to_dict('records'), similarity_threshold, pairs=pairs)
+        merged = sum(len(members) for members in clusters if len(members) > 1)
+        self.logger.info(f"Found {len(df) - len(fused)} duplicates: {merged} rows fused into "
+                         f"{sum(1 for members in clusters if len(members) > 1)} records")
+        return pd.DataFrame(fused, columns=df.columns)
+
+    def combine_csvs(self, input_dir: str, output_path: str, exact: bool = False,
+                     use_corpus_index: bool = True) -> pd.DataFrame:
+        """
+        Combine all CSV files in the directory (exact: see find_duplicates).
+        With use_corpus_index, papers an earlier run already let through are
+        left out and written to an _already_in_corpus CSV instead.
+        """
         
         # Find all CSV files
         csv_files = [f for f in os.listdir(input_dir) if f.endswith('.csv')]
@@ -84,21 +112,27 @@ class CSVCombiner:
         
         self.logger.info(f"Combined total: {len(combined_df)} papers")
         
-        # Remove duplicates
+        # Merge duplicates
         self.logger.info("Finding duplicates...")
-        duplicate_indices = self.find_duplicates(combined_df)
-        self.logger.info(f"Found {len(duplicate_indices)} duplicates")
-        
-        # Remove duplicates
-        deduplicated_df = combined_df.drop(index=duplicate_indices).reset_index(drop=True)
+        deduplicated_df = self.merge_duplicates(combined_df, exact=exact)
         self.logger.info(f"After deduplication: {len(deduplicated_df)} papers")
         
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        corpus = get_corpus_index() if use_corpus_index else None
+        if corpus is not None:
+            new, known, run_id = corpus.filter_new(deduplicated_df.to_dict('records'), 'csv_combiner', input_dir)
+            if known:
+                known_path = output_path.replace('.csv', f'_already_in_corpus_{timestamp}.csv')
+                pd.DataFrame(known).to_csv(known_path, index=False)
+                self.logger.info(f"{len(known)} papers already in corpus, listed in {known_path}")
+            deduplicated_df = pd.DataFrame(new, columns=deduplicated_df.columns)
+            self.logger.info(f"New papers (run {run_id}): {len(deduplicated_df)}")
+        
         # Reassign paper IDs
         for idx in range(len(deduplicated_df)):
             deduplicated_df.at[idx, 'paper_id'] = f"paper_{idx+1:03d}"
         
         # Save intermediate result
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         intermediate_path = output_path.replace('.csv', f'_deduplicated_{timestamp}.csv')
         deduplicated_df.to_csv(intermediate_path, index=False)
         self.logger.info(f"Deduplicated file saved: {intermediate_path}")
@@ -111,11 +145,16 @@ def main():
                        help='Directory containing CSV files to combine')
     parser.add_argument('--output', default='/Users/reddy/2025/ResearchHelper/results/combined_papers_deduplicated.csv',
                        help='Output CSV file path')
+    parser.add_argument('--exact', action='store_true',
+                       help='Exact title-similarity join instead of MinHash-LSH candidate search')
+    parser.add_argument('--no-corpus-index', action='store_true',
+                       help='Keep papers that earlier runs already recorded in the corpus index')
     
     args = parser.parse_args()
     
     combiner = CSVCombiner()
-    result_df = combiner.combine_csvs(args.input_dir, args.output)
+    result_df = combiner.combine_csvs(args.input_dir, args.output, exact=args.exact,
+                                      use_corpus_index=not args.no_corpus_index)
     
     # Save final result
     result_df.to_csv(args.output, index=False)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Duplicate Clustering and Field Fusion
+Duplicate pairs (same canonical DOI, or near-duplicate titles) are grouped
+with union-find, and each cluster is fused into one record field by field, so
+an abstract from one copy and a DOI or PDF from another all survive instead
+of whichever row came later being dropped.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from near_duplicates import similar_pairs
+from negative_cache import normalize_doi
+
+# Field-level precedence: by default the earliest non-empty value in the cluster wins
+LONGEST_FIELDS = ('abstract', 'authors', 'original_keywords', 'contributions', 'limitations')
+TRUE_FIELDS = ('pdf_downloaded',)
+JOINED_FIELDS = ('fetch_source',)
+# Fields that travel with another field's chosen value (e.g. where that abstract came from)
+COMPANION_FIELDS = {
+    'abstract_source': 'abstract',
+    'abstract_confidence': 'abstract',
+    'pdf_path': 'pdf_downloaded',
+    'pdf_source': 'pdf_downloaded',
+    'file_size_mb': 'pdf_downloaded',
+}
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, first: int, second: int) -> bool:
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+        return True
+
+    def groups(self) -> List[List[int]]:
+        """Members of each set in ascending order, sets ordered by their first member"""
+        groups: Dict[int, List[int]] = {}
+        for item in range(len(self.parent)):
+            groups.setdefault(self.find(item), []).append(item)
+        return list(groups.values())
+
+
+def is_empty(value) -> bool:
+    if value is None or (isinstance(value, float) and value != value):
+        return True
+    if isinstance(value, str):
+        return value.strip() in ('', 'Not Available', 'nan')
+    return False
+
+
+def _is_true(value) -> bool:
+    return value is True or (isinstance(value, str) and value.strip().lower() == 'true') or value == 1
+
+
+def _chosen(records: List[Dict], field: str) -> Optional[int]:
+    """Index of the record whose value of field wins, or None if every copy is empty"""
+    if field in TRUE_FIELDS:
+        return next((i for i, record in enumerate(records) if _is_true(record.get(field))), None)
+    candidates = [i for i, record in enumerate(records) if not is_empty(record.get(field))]
+    if not candidates:
+        return None
+    if field in LONGEST_FIELDS:
+        # Longest value wins; the earliest copy breaks ties
+        return max(candidates, key=lambda i: (len(str(records[i][field])), -i))
+    return candidates[0]
+
+
+def fuse_records(records: List[Dict]) -> Dict:
+    """One record from a cluster (in input order): the first copy, filled in field by field"""
+    fused = dict(records[0])
+    fields = list(dict.fromkeys(field for record in records for field in record))
+    for field in fields:
+        if field in COMPANION_FIELDS or field in JOINED_FIELDS:
+            continue
+        winner = _chosen(records, field)
+        if winner is None:
+            continue
+        fused[field] = records[winner][field]
+        for companion, leader in COMPANION_FIELDS.items():
+            if leader == field and companion in records[winner]:
+                fused[companion] = records[winner][companion]
+    for field in JOINED_FIELDS:
+        parts = [part for record in records if not is_empty(record.get(field))
+                 for part in str(record[field]).split('+')]
+        if parts:
+            fused[field] = '+'.join(dict.fromkeys(parts))
+    return fused
+
+
+def doi_pairs(dois: Iterable) -> List[Tuple[int, int]]:
+    """(first, j) for every later record j with the same canonical DOI as record first"""
+    first_with_doi: Dict[str, int] = {}
+    pairs = []
+    for position, doi in enumerate(dois):
+        doi = normalize_doi(doi)
+        if doi:
+            first = first_with_doi.setdefault(doi, position)
+            if first != position:
+                pairs.append((first, position))
+    return pairs
+
+
+def duplicate_pairs(titles: List, dois: List, threshold: float,
+                    inclusive: bool = False) -> List[Tuple[int, int]]:
+    """(i, j), i < j, for records sharing a canonical DOI or with near-duplicate titles"""
+    return doi_pairs(dois) + similar_pairs(titles, threshold, inclusive=inclusive)
+
+
+def cluster(size: int, pairs: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    """Connected components of the duplicate pairs over 0..size-1 (singletons included)"""
+    sets = UnionFind(size)
+    for first, second in pairs:
+        sets.union(first, second)
+    return sets.groups()
+
+
+def fuse_duplicates(papers: List[Dict], threshold: float, inclusive: bool = False,
+                    pairs: Optional[Iterable[Tuple[int, int]]] = None) -> Tuple[List[Dict], List[List[int]]]:
+    """
+    (fused papers, clusters): one fused paper per duplicate cluster, in order of
+    each cluster's first member. pairs defaults to duplicate_pairs over the papers.
+    """
+    if pairs is None:
+        pairs = duplicate_pairs([paper.get('title', '') for paper in papers],
+                                [paper.get('doi', '') for paper in papers], threshold, inclusive)
+    clusters = cluster(len(papers), pairs)
+    return [fuse_records([papers[i] for i in members]) for members in clusters], clusters
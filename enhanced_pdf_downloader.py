@@ -6,9 +6,16 @@ Downloads PDFs from multiple sources with advanced fallback mechanisms
 
 import pandas as pd
 import requests
+import http_client
+import negative_cache
+from negative_cache import get_negative_cache
+from arxiv_client import ArxivClient, extract_arxiv_id, pdf_url_for
+from single_flight import single_flight
+from title_normalization import title_similarity
 import time
 import os
 import re
+import threading
 from datetime import datetime
 from urllib.parse import urljoin
 from typing import Dict, Optional, Tuple
@@ -18,8 +25,10 @@ import random
 from bs4 import BeautifulSoup
 
 class EnhancedPDFDownloader:
-    def __init__(self, output_dir: str = "/Users/reddy/2025/ResearchHelper/results"):
+    def __init__(self, output_dir: str = "/Users/reddy/2025/ResearchHelper/results", force_retry: bool = False):
         self.output_dir = output_dir
+        # Ignore the negative cache and walk the full source cascade for every paper
+        self.force_retry = force_retry
         self.pdf_dir = os.path.join(output_dir, "pdf")
         os.makedirs(self.pdf_dir, exist_ok=True)
 
@@ -27,15 +36,11 @@ class EnhancedPDFDownloader:
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
 
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_delay = 0.5
+        # Shared connection-pooled session (per-host rate limits are applied by http_client)
+        self.session = http_client.get_session({'User-Agent': http_client.BROWSER_USER_AGENT})
 
-        # Session for persistent connections
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Errors raised by sources during the cascade running on this thread
+        self._cascade = threading.local()
 
         # Download statistics
         self.stats = {
@@ -46,25 +51,16 @@ class EnhancedPDFDownloader:
             'arxiv_success': 0,
             'direct_url_success': 0,
             'doi_redirect_success': 0,
-            'web_scraping_success': 0
+            'web_scraping_success': 0,
+            'skipped_known_missing': 0
         }
 
-    def rate_limit(self):
-        """Implement rate limiting between requests"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_delay:
-            time.sleep(self.min_delay - time_since_last)
-        self.last_request_time = time.time()
-
     def download_pdf(self, paper_id: str, pdf_url: str, max_size_mb: int = 50) -> Tuple[bool, str, str]:
         """Download PDF from URL with validation"""
         if not pdf_url:
             return False, "", "No PDF URL provided"
 
         try:
-            self.rate_limit()
-
             # Head request first to check content type and size
             head_response = self.session.head(pdf_url, timeout=30, allow_redirects=True)
 
@@ -113,100 +109,110 @@ class EnhancedPDFDownloader:
             return True, filepath, f"Successfully downloaded {downloaded_size/(1024*1024):.1f}MB"
 
         except Exception as e:
+            # A 4xx means the file is not there; anything else says nothing about the paper
+            if not (isinstance(e, requests.exceptions.HTTPError) and e.response is not None
+                    and e.response.status_code < 500):
+                self._source_failed(pdf_url, e)
             return False, "", f"Download error: {str(e)}"
 
+    def _source_failed(self, source: str, error):
+        """Note that a source errored, rather than found no PDF, during this thread's cascade"""
+        errors = getattr(self._cascade, 'errors', None)
+        if errors is not None:
+            errors.append(f"{source}: {error}")
+
     def search_semantic_scholar_pdf(self, title: str, doi: str = "") -> Optional[str]:
         """Search Semantic Scholar for PDF link"""
         try:
-            self.rate_limit()
-
-            # Search by DOI first if available
-            if doi:
-                search_url = f"https://api.semanticscholar.org/graph/v1/paper/DOI:{doi}"
-                params = {'fields': 'openAccessPdf,url'}
-            else:
-                # Search by title
-                clean_title = re.sub(r'[^\w\s]', ' ', title).strip()
-                search_url = f"https://api.semanticscholar.org/graph/v1/paper/search"
-                params = {
-                    'query': clean_title,
-                    'fields': 'openAccessPdf,url,title',
-                    'limit': 5
-                }
-
-            response = self.session.get(search_url, params=params, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-
-                if doi and data.get('openAccessPdf', {}).get('url'):
-                    return data['openAccessPdf']['url']
-                elif not doi and data.get('data'):
-                    # Find best title match
-                    for paper in data['data']:
-                        paper_title = paper.get('title', '')
-                        if self.title_similarity(title, paper_title) > 0.8:
-                            pdf_info = paper.get('openAccessPdf', {})
-                            if pdf_info and pdf_info.get('url'):
-                                return pdf_info['url']
-
+            return self._search_semantic_scholar_pdf(title, doi)
         except Exception as e:
             self.logger.error(f"Semantic Scholar PDF search error: {e}")
-
+            self._source_failed('Semantic Scholar', e)
         return None
 
-    def get_arxiv_pdf_url(self, url: str) -> Optional[str]:
-        """Convert arXiv abstract URL to PDF URL"""
-        if not url or 'arxiv.org' not in url:
-            return None
+    @single_flight('semantic_scholar_pdf', lambda self, title, doi='': (
+        f"doi:{negative_cache.normalize_doi(doi)}" if doi else negative_cache.normalize_title(title) or None))
+    def _search_semantic_scholar_pdf(self, title: str, doi: str = "") -> Optional[str]:
+        """Lookup behind search_semantic_scholar_pdf; errors reach every coalesced caller"""
+        # Search by DOI first if available
+        if doi:
+            search_url = f"https://api.semanticscholar.org/graph/v1/paper/DOI:{doi}"
+            params = {'fields': 'openAccessPdf,url'}
+        else:
+            # Search by title
+            clean_title = re.sub(r'[^\w\s]', ' ', title).strip()
+            search_url = f"https://api.semanticscholar.org/graph/v1/paper/search"
+            params = {
+                'query': clean_title,
+                'fields': 'openAccessPdf,url,title',
+                'limit': 5
+            }
 
-        try:
-            # Extract arXiv ID from URL
-            arxiv_id_match = re.search(r'arxiv\.org/abs/([^/\s]+)', url)
-            if arxiv_id_match:
-                arxiv_id = arxiv_id_match.group(1)
-                return f"https://arxiv.org/pdf/{arxiv_id}.pdf"
-        except Exception as e:
-            self.logger.error(f"arXiv URL conversion error: {e}")
+        response = self.session.get(search_url, params=params, timeout=30)
+        _raise_if_unavailable(response)
+        if response.status_code == 200:
+            data = response.json()
+
+            if doi and data.get('openAccessPdf', {}).get('url'):
+                return data['openAccessPdf']['url']
+            elif not doi and data.get('data'):
+                # Find best title match
+                for paper in data['data']:
+                    paper_title = paper.get('title', '')
+                    if self.title_similarity(title, paper_title) > 0.8:
+                        pdf_info = paper.get('openAccessPdf', {})
+                        if pdf_info and pdf_info.get('url'):
+                            return pdf_info['url']
 
         return None
 
+    def get_arxiv_pdf_url(self, url: str, doi: str = '', title: str = '') -> Optional[str]:
+        """arXiv PDF URL from an arXiv DOI, abstract URL or 'arXiv:' tag in the title (no network calls)"""
+        arxiv_id = extract_arxiv_id(doi, url, title)
+        return pdf_url_for(arxiv_id) if arxiv_id else None
+
     def get_doi_redirect_url(self, doi: str) -> Optional[str]:
         """Try to get PDF URL from DOI redirect"""
         if not doi:
             return None
 
         try:
-            self.rate_limit()
-
-            doi_url = f"https://doi.org/{doi}"
-            response = self.session.head(doi_url, timeout=30, allow_redirects=True)
-
-            final_url = response.url
-
-            # Check if final URL looks like it might have PDF
-            if any(indicator in final_url.lower() for indicator in ['pdf', 'download', 'view']):
-                return final_url
-
-            # Try adding common PDF suffixes
-            possible_urls = [
-                final_url + '.pdf',
-                final_url + '/pdf',
-                final_url.replace('/abstract/', '/pdf/'),
-                final_url.replace('/article/', '/pdf/')
-            ]
-
-            for url in possible_urls:
-                try:
-                    head_resp = self.session.head(url, timeout=10)
-                    if head_resp.status_code == 200:
-                        content_type = head_resp.headers.get('content-type', '').lower()
-                        if 'pdf' in content_type:
-                            return url
-                except:
-                    continue
-
+            return self._get_doi_redirect_url(doi)
         except Exception as e:
             self.logger.error(f"DOI redirect error: {e}")
+            self._source_failed('DOI redirect', e)
+        return None
+
+    @single_flight('doi_redirect', lambda self, doi: negative_cache.normalize_doi(doi) or None)
+    def _get_doi_redirect_url(self, doi: str) -> Optional[str]:
+        """Lookup behind get_doi_redirect_url; errors reach every coalesced caller"""
+        doi_url = f"https://doi.org/{doi}"
+        response = self.session.head(doi_url, timeout=30, allow_redirects=True)
+        _raise_if_unavailable(response)
+
+        final_url = response.url
+
+        # Check if final URL looks like it might have PDF
+        if any(indicator in final_url.lower() for indicator in ['pdf', 'download', 'view']):
+            return final_url
+
+        # Try adding common PDF suffixes
+        possible_urls = [
+            final_url + '.pdf',
+            final_url + '/pdf',
+            final_url.replace('/abstract/', '/pdf/'),
+            final_url.replace('/article/', '/pdf/')
+        ]
+
+        for url in possible_urls:
+            try:
+                head_resp = self.session.head(url, timeout=10)
+                if head_resp.status_code == 200:
+                    content_type = head_resp.headers.get('content-type', '').lower()
+                    if 'pdf' in content_type:
+                        return url
+            except:
+                continue
 
         return None
 
@@ -216,9 +222,8 @@ class EnhancedPDFDownloader:
             return None
 
         try:
-            self.rate_limit()
-
             response = self.session.get(url, timeout=30)
+            _raise_if_unavailable(response)
             if response.status_code != 200:
                 return None
 
@@ -253,27 +258,65 @@ class EnhancedPDFDownloader:
 
         except Exception as e:
             self.logger.error(f"PDF scraping error: {e}")
+            self._source_failed('Web scraping', e)
 
         return None
 
     def title_similarity(self, title1: str, title2: str) -> float:
         """Calculate title similarity"""
-        if not title1 or not title2:
-            return 0.0
-
-        words1 = set(re.findall(r'\w+', title1.lower()))
-        words2 = set(re.findall(r'\w+', title2.lower()))
-
-        if not words1 or not words2:
-            return 0.0
-
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
+        return title_similarity(title1, title2)
+
+    def is_known_missing(self, paper: Dict, force_retry: bool = False) -> bool:
+        """True if a previous run found no PDF for this paper and the entry has not expired"""
+        cache = get_negative_cache()
+        if cache is None:
+            return False
+        return cache.should_skip(negative_cache.PDF, paper.get('doi', ''), paper.get('title', ''),
+                                 force_retry or self.force_retry)
+
+    def record_pdf_outcome(self, paper: Dict, found: bool, errored: bool = False):
+        """
+        Clear or extend the paper's negative cache entry after a full cascade.
+        A miss is only recorded when every source answered; errored=True leaves the entry alone.
+        """
+        cache = get_negative_cache()
+        if cache is None:
+            return
+        if found:
+            cache.clear(negative_cache.PDF, paper.get('doi', ''), paper.get('title', ''))
+        elif not errored:
+            cache.record_miss(negative_cache.PDF, paper.get('doi', ''), paper.get('title', ''))
+
+    def _run_cascade(self, cascade, paper: Dict):
+        """Run a source cascade for paper; returns its result and the errors sources raised along the way"""
+        self._cascade.errors = []
+        try:
+            result = cascade(paper)
+        finally:
+            errors, self._cascade.errors = self._cascade.errors, None
+        if errors:
+            self.logger.info(f"Not caching PDF miss for '{paper.get('title', '')[:60]}': {'; '.join(errors)}"[:300])
+        return result, errors
+
+    def download_paper_pdf(self, paper: Dict, force_retry: bool = False) -> Dict:
+        """Download PDF for a single paper using multiple strategies"""
+        if self.is_known_missing(paper, force_retry):
+            self.stats['skipped_known_missing'] += 1
+            return {
+                'paper_id': paper.get('paper_id', 'unknown'),
+                'pdf_downloaded': False,
+                'pdf_path': '',
+                'pdf_source': '',
+                'download_error': 'Skipped: no PDF found on a previous run',
+                'file_size_mb': 0
+            }
 
-        return len(intersection) / len(union) if union else 0.0
+        result, errors = self._run_cascade(self._download_paper_pdf_from_sources, paper)
+        self.record_pdf_outcome(paper, result['pdf_downloaded'], errored=bool(errors))
+        return result
 
-    def download_paper_pdf(self, paper: Dict) -> Dict:
-        """Download PDF for a single paper using multiple strategies"""
+    def _download_paper_pdf_from_sources(self, paper: Dict) -> Dict:
+        """Try each PDF strategy in turn for download_paper_pdf"""
         paper_id = paper.get('paper_id', 'unknown')
         title = paper.get('title', '')
         doi = paper.get('doi', '')
@@ -305,20 +348,19 @@ class EnhancedPDFDownloader:
                 return result
 
         # Strategy 2: arXiv PDF conversion
-        if url and 'arxiv.org' in url:
-            arxiv_pdf_url = self.get_arxiv_pdf_url(url)
-            if arxiv_pdf_url:
-                success, path, message = self.download_pdf(paper_id, arxiv_pdf_url)
-                if success:
-                    result.update({
-                        'pdf_downloaded': True,
-                        'pdf_path': path,
-                        'pdf_source': 'arXiv',
-                        'file_size_mb': round(os.path.getsize(path) / (1024*1024), 2)
-                    })
-                    self.stats['successful_downloads'] += 1
-                    self.stats['arxiv_success'] += 1
-                    return result
+        arxiv_pdf_url = self.get_arxiv_pdf_url(url, doi, title)
+        if arxiv_pdf_url:
+            success, path, message = self.download_pdf(paper_id, arxiv_pdf_url)
+            if success:
+                result.update({
+                    'pdf_downloaded': True,
+                    'pdf_path': path,
+                    'pdf_source': 'arXiv',
+                    'file_size_mb': round(os.path.getsize(path) / (1024*1024), 2)
+                })
+                self.stats['successful_downloads'] += 1
+                self.stats['arxiv_success'] += 1
+                return result
 
         # Strategy 3: Semantic Scholar
         semantic_pdf_url = self.search_semantic_scholar_pdf(title, doi)
@@ -372,8 +414,18 @@ class EnhancedPDFDownloader:
         result['download_error'] = 'All download strategies failed'
         return result
 
-    def download_pdf_for_paper(self, paper: dict) -> Tuple[bool, str, str]:
+    def download_pdf_for_paper(self, paper: dict, force_retry: bool = False) -> Tuple[bool, str, str]:
         """Try all sources to download PDF for a paper dict (title, url, doi, etc)"""
+        if self.is_known_missing(paper, force_retry):
+            self.stats['skipped_known_missing'] += 1
+            return False, "", "Skipped: no PDF found from any source on a previous run"
+
+        (success, filepath, msg), errors = self._run_cascade(self._download_pdf_for_paper_from_sources, paper)
+        self.record_pdf_outcome(paper, success, errored=bool(errors))
+        return success, filepath, msg
+
+    def _download_pdf_for_paper_from_sources(self, paper: dict) -> Tuple[bool, str, str]:
+        """Source cascade behind download_pdf_for_paper"""
         title = paper.get('title', '')
         pdf_url = paper.get('url', '') or paper.get('pdf_url', '')
         doi = paper.get('doi', '')
@@ -392,15 +444,15 @@ class EnhancedPDFDownloader:
             if success:
                 return True, filepath, f"Semantic Scholar: {msg}"
 
-        # 3. Try arXiv (if arXiv in url or title)
-        arxiv_url = None
-        if 'arxiv.org' in pdf_url or 'arxiv' in title.lower():
-            arxiv_url = self.get_arxiv_pdf_url(pdf_url)
-            if not arxiv_url:
-                # Try arXiv API/web scraping from 4_enhanced_pdf_downloader.py logic
-                arxiv_result = search_arxiv_for_pdf(title)
-                if arxiv_result and arxiv_result.get('found') and arxiv_result.get('pdf_url'):
-                    arxiv_url = arxiv_result['pdf_url']
+        # 3. Try arXiv (ID read locally from DOI, URL or title; search only if that fails)
+        arxiv_url = self.get_arxiv_pdf_url(pdf_url, doi, title)
+        if not arxiv_url and ('arxiv.org' in pdf_url or 'arxiv' in title.lower()):
+            # Try arXiv API/web scraping from 4_enhanced_pdf_downloader.py logic
+            arxiv_result = search_arxiv_for_pdf(title)
+            if arxiv_result and arxiv_result.get('error'):
+                self._source_failed('arXiv search', arxiv_result['error'])
+            if arxiv_result and arxiv_result.get('found') and arxiv_result.get('pdf_url'):
+                arxiv_url = arxiv_result['pdf_url']
         if arxiv_url:
             success, filepath, msg = self.download_pdf(paper_id, arxiv_url)
             if success:
@@ -417,12 +469,15 @@ class EnhancedPDFDownloader:
         # 5. Try Semantic Scholar fallback (from 4_enhanced_pdf_downloader.py)
         try:
             ss_result = search_semantic_scholar_with_fallback(title)
+            if ss_result and ss_result.get('error'):
+                self._source_failed('Semantic Scholar fallback', ss_result['error'])
             if ss_result and ss_result.get('found') and ss_result.get('pdf_url'):
                 success, filepath, msg = self.download_pdf(paper_id, ss_result['pdf_url'])
                 if success:
                     return True, filepath, f"Semantic Scholar fallback: {msg}"
         except Exception as e:
             self.logger.error(f"Semantic Scholar fallback error: {e}")
+            self._source_failed('Semantic Scholar fallback', e)
 
         # 6. Web scraping fallback (future: publisher scraping)
         return False, "", "No PDF found from any source"
@@ -433,12 +488,20 @@ class EnhancedPDFDownloader:
         df = pd.read_csv(csv_path)
         self.logger.info(f"Starting PDF download for {len(df)} papers")
 
-        # Initialize new columns
-        df['pdf_downloaded'] = False
-        df['pdf_path'] = ''
-        df['pdf_source'] = ''
-        df['download_error'] = ''
-        df['file_size_mb'] = 0
+        # Initialize new columns (rows fused from a copy that already has its PDF keep it)
+        for column, default in (('pdf_downloaded', False), ('pdf_path', ''), ('pdf_source', ''),
+                                ('download_error', ''), ('file_size_mb', 0)):
+            if column not in df.columns:
+                df[column] = default
+        for column in ('pdf_path', 'pdf_source', 'download_error'):
+            df[column] = df[column].fillna('').astype(str)
+        have_pdf = (df['pdf_downloaded'].astype(str).str.strip().str.lower() == 'true') & \
+            df['pdf_path'].map(lambda path: bool(path) and os.path.exists(path))
+        df['pdf_downloaded'] = have_pdf
+        df.loc[~have_pdf, ['pdf_path', 'pdf_source']] = ''
+        df.loc[~have_pdf, 'file_size_mb'] = 0
+        if have_pdf.any():
+            self.logger.info(f"Skipping {int(have_pdf.sum())} papers whose PDF is already downloaded")
 
         # Process papers with thread pool
         results = []
@@ -446,7 +509,7 @@ class EnhancedPDFDownloader:
             # Submit all download tasks
             future_to_idx = {
                 executor.submit(self.download_paper_pdf, row.to_dict()): idx
-                for idx, row in df.iterrows()
+                for idx, row in df[~have_pdf].iterrows()
             }
 
             # Process completed tasks
@@ -458,7 +521,7 @@ class EnhancedPDFDownloader:
 
                     # Update progress
                     if len(results) % 10 == 0:
-                        success_rate = self.stats['successful_downloads'] / self.stats['total_attempts'] * 100
+                        success_rate = self.stats['successful_downloads'] / max(1, self.stats['total_attempts']) * 100
                         self.logger.info(f"Processed {len(results)}/{len(df)} papers. Success rate: {success_rate:.1f}%")
 
                 except Exception as e:
@@ -494,83 +557,72 @@ class EnhancedPDFDownloader:
         print(f"Download attempts: {self.stats['total_attempts']}")
         print(f"Successful downloads: {self.stats['successful_downloads']}")
         print(f"Failed downloads: {self.stats['failed_downloads']}")
-        print(f"Success rate: {self.stats['successful_downloads']/self.stats['total_attempts']*100:.1f}%")
+        print(f"Success rate: {self.stats['successful_downloads']/max(1, self.stats['total_attempts'])*100:.1f}%")
         print(f"\n📈 SUCCESS BY SOURCE:")
         print(f"Semantic Scholar: {self.stats['semantic_scholar_success']}")
         print(f"arXiv: {self.stats['arxiv_success']}")
         print(f"Direct URL: {self.stats['direct_url_success']}")
         print(f"DOI Redirect: {self.stats['doi_redirect_success']}")
         print(f"Web Scraping: {self.stats['web_scraping_success']}")
+        print(f"Skipped (no PDF on a previous run): {self.stats['skipped_known_missing']}")
 
 # --- Begin: Helper functions from 4_enhanced_pdf_downloader.py ---
+_ROBUST_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0'
+]
+# Picked once per process so every call reuses the same pooled session
+_ROBUST_HEADERS = {
+    'User-Agent': random.choice(_ROBUST_USER_AGENTS),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0'
+}
+
+def _raise_if_unavailable(response):
+    """Raise for a 429 or 5xx: the source could not answer, which is not the same as having no PDF"""
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+
 def get_robust_session():
-    import requests
-    from requests.adapters import HTTPAdapter
-    from urllib3.util.retry import Retry
-    session = requests.Session()
-    retry_strategy = Retry(
-        total=3,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["HEAD", "GET", "OPTIONS"],
-        backoff_factor=1
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    user_agents = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0'
-    ]
-    session.headers.update({
-        'User-Agent': random.choice(user_agents),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Cache-Control': 'max-age=0'
-    })
-    return session
+    """Shared pooled session with browser-like headers (retries come from http_client)"""
+    return http_client.get_session(_ROBUST_HEADERS)
 
 def search_arxiv_for_pdf(title, authors=""):
     try:
         session = get_robust_session()
         clean_title = re.sub(r'[^\w\s]', ' ', title).strip()
         clean_title = ' '.join(clean_title.split()[:8])
-        arxiv_url = "http://export.arxiv.org/api/query"
-        params = {
-            'search_query': f'all:"{clean_title}"',
-            'start': 0,
-            'max_results': 5
-        }
-        response = session.get(arxiv_url, params=params, timeout=15)
-        if response.status_code == 200:
-            import xml.etree.ElementTree as ET
-            root = ET.fromstring(response.content)
-            for entry in root.findall('{http://www.w3.org/2005/Atom}entry'):
-                arxiv_title = entry.find('{http://www.w3.org/2005/Atom}title').text.strip()
-                title_words = set(w.lower() for w in title.split() if len(w) > 3)
-                arxiv_words = set(w.lower() for w in arxiv_title.split() if len(w) > 3)
+        title_words = set(w.lower() for w in title.split() if len(w) > 3)
+        error = None
+        try:
+            # Entries are parsed as the feed streams in; stop at the first good match
+            for entry in ArxivClient(session=session, timeout=15).search(f'all:"{clean_title}"', max_results=5):
+                arxiv_words = set(w.lower() for w in entry['title'].split() if len(w) > 3)
                 common_words = title_words.intersection(arxiv_words)
-                if len(common_words) >= min(2, int(len(title_words) * 0.4)):
-                    for link in entry.findall('{http://www.w3.org/2005/Atom}link'):
-                        if link.get('type') == 'application/pdf':
-                            pdf_url = link.get('href')
-                            return {
-                                'found': True,
-                                'source': 'arXiv-API',
-                                'title': arxiv_title,
-                                'pdf_url': pdf_url
-                            }
+                if len(common_words) >= min(2, int(len(title_words) * 0.4)) and entry['pdf_url']:
+                    return {
+                        'found': True,
+                        'source': 'arXiv-API',
+                        'title': entry['title'],
+                        'pdf_url': entry['pdf_url']
+                    }
+        except RuntimeError as e:
+            error = str(e)  # Non-200 from the API: fall through to the web search as before
         # Web fallback
         search_terms = '+'.join(title.split()[:4])
         arxiv_search_url = f"https://arxiv.org/search/?query={search_terms}&searchtype=all"
         response = session.get(arxiv_search_url, timeout=15)
+        if response.status_code == 429 or response.status_code >= 500:
+            error = error or f"arXiv web search HTTP {response.status_code}"
         if response.status_code == 200:
             soup = BeautifulSoup(response.content, 'html.parser')
             for result in soup.find_all('li', class_='arxiv-result'):
@@ -589,7 +641,8 @@ def search_arxiv_for_pdf(title, authors=""):
                                     'title': arxiv_title,
                                     'pdf_url': pdf_url
                                 }
-        return {'found': False, 'source': 'arXiv'}
+        # An unavailable search is reported as an error, not as "no PDF"
+        return {'found': False, 'source': 'arXiv', 'error': error} if error else {'found': False, 'source': 'arXiv'}
     except Exception as e:
         return {'found': False, 'source': 'arXiv', 'error': str(e)}
 
@@ -602,12 +655,8 @@ def search_semantic_scholar_with_fallback(title):
             'limit': 3,
             'fields': 'paperId,title,abstract,year,authors,venue,url,openAccessPdf,isOpenAccess,externalIds'
         }
-        import time
-        time.sleep(random.uniform(3, 6))
+        # 429s are backed off and retried by the shared rate limiter (honoring Retry-After)
         response = session.get(search_url, params=params, timeout=20)
-        if response.status_code == 429:
-            time.sleep(30)
-            response = session.get(search_url, params=params, timeout=20)
         if response.status_code == 200:
             data = response.json()
             if 'data' in data and len(data['data']) > 0:
@@ -626,6 +675,9 @@ def search_semantic_scholar_with_fallback(title):
                             'paper_id': paper.get('paperId', ''),
                             'url': paper.get('url', '')
                         }
+        elif response.status_code != 404:
+            # Throttled or unavailable: not an answer, so not a miss either
+            return {'found': False, 'error': f"HTTP {response.status_code}"}
         return {'found': False}
     except Exception as e:
         return {'found': False, 'error': str(e)}
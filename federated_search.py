@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Federated Paper Search
+Fans one query out to several sources (CrossRef, Semantic Scholar, arXiv) at
+once and merges their papers as each source finishes, collapsing cross-source
+duplicates by DOI or arXiv ID along the way. A search takes as long as its
+slowest source rather than the sum of all of them.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from arxiv_client import extract_arxiv_id
+from negative_cache import normalize_doi
+
+# Lower rank wins when the same paper comes from several sources
+SOURCE_PRIORITY = {'CrossRef': 0, 'Semantic Scholar': 1, 'arXiv': 2}
+
+Source = Tuple[str, Callable[[], List[Dict]]]
+
+
+def paper_keys(paper: Dict) -> List[str]:
+    """Identity keys for cross-source matching: canonical DOI and arXiv ID"""
+    keys = []
+    doi = normalize_doi(paper.get('doi', ''))
+    if doi:
+        keys.append(f"doi:{doi}")
+    arxiv_id = extract_arxiv_id(doi, paper.get('url', ''), '')
+    if arxiv_id:
+        keys.append(f"arxiv:{arxiv_id}")
+    return keys
+
+
+def _is_empty(value) -> bool:
+    return value is None or (isinstance(value, str) and value.strip() in ('', 'Not Available'))
+
+
+class PaperMerger:
+    """
+    Accumulates papers from several sources, merging duplicates on arrival.
+    The record from the highest-priority source is kept and its empty fields
+    are filled from the others, so the result does not depend on which source
+    answered first.
+    """
+
+    def __init__(self, priority: Optional[Dict[str, int]] = None):
+        self.priority = priority or SOURCE_PRIORITY
+        self.papers: List[Dict] = []
+        self.ranks: List[Tuple[int, int]] = []
+        self.index: Dict[str, int] = {}
+        self.duplicates = 0
+
+    def _rank(self, source: str) -> int:
+        return self.priority.get(source, len(self.priority))
+
+    def add(self, paper: Dict, source: str, position: int) -> bool:
+        """Add one paper; returns False if it was merged into an existing record"""
+        keys = paper_keys(paper)
+        slot = next((self.index[key] for key in keys if key in self.index), None)
+        if slot is None:
+            slot = len(self.papers)
+            self.papers.append(dict(paper, fetch_source=source))
+            self.ranks.append((self._rank(source), position))
+            for key in keys:
+                self.index[key] = slot
+            return True
+
+        existing = self.papers[slot]
+        rank = (self._rank(source), position)
+        if rank < self.ranks[slot]:
+            base, other = dict(paper), existing
+            self.ranks[slot] = rank
+        else:
+            base, other = existing, paper
+        for field, value in other.items():
+            if field != 'fetch_source' and _is_empty(base.get(field)) and not _is_empty(value):
+                base[field] = value
+        sources = existing['fetch_source'].split('+')
+        if source not in sources:
+            sources.append(source)
+        base['fetch_source'] = '+'.join(sorted(sources, key=self._rank))
+        self.papers[slot] = base
+        for key in keys + paper_keys(base):
+            self.index.setdefault(key, slot)
+        self.duplicates += 1
+        return False
+
+    def add_all(self, papers: List[Dict], source: str):
+        for position, paper in enumerate(papers):
+            self.add(paper, source, position)
+
+    def results(self) -> List[Dict]:
+        """Merged papers in source-priority order, each source in its own ranking order"""
+        order = sorted(range(len(self.papers)), key=lambda slot: self.ranks[slot])
+        return [self.papers[slot] for slot in order]
+
+
+def federated_fetch(sources: List[Source], log: Optional[Callable[[str], None]] = None) -> Tuple[List[Dict], Dict]:
+    """
+    Run every source concurrently and merge papers as each one completes.
+    A failing source is logged and skipped. Returns (papers, per-source counts).
+    """
+    log = log or (lambda msg: None)
+    merger = PaperMerger()
+    counts = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(sources)), thread_name_prefix='federated') as executor:
+        futures = {executor.submit(fetch): name for name, fetch in sources}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                papers = future.result()
+            except Exception as e:
+                log(f"{name} search failed: {e}")
+                counts[name] = 0
+                continue
+            before = merger.duplicates
+            merger.add_all(papers, name)
+            counts[name] = len(papers)
+            log(f"{name}: {len(papers)} papers ({merger.duplicates - before} already found by another source)")
+    counts['duplicates_merged'] = merger.duplicates
+    return merger.results(), counts
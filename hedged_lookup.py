@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Hedged Source Lookups
+Runs a paper's candidate sources (Semantic Scholar, arXiv, CrossRef, web pages)
+concurrently or with staggered hedges and returns the first acceptable answer,
+so per-paper latency tracks the fastest successful source instead of the sum
+of every miss. Rate budgets still apply: each lookup goes through the shared
+per-host limiter in http_client, a hedge only starts early when its source's
+host can take a request right away, and lookups that lost the race give up
+their place in the host's queue.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from rate_limiter import cancel_token, get_rate_limiter
+
+# Seconds to give a source before also starting the next one (0 = start all at once)
+DEFAULT_HEDGE_DELAY = float(os.environ.get('RESEARCHHELPER_HEDGE_DELAY', '1.0'))
+MAX_WORKERS = int(os.environ.get('RESEARCHHELPER_HEDGE_WORKERS', '16'))
+
+SEQUENTIAL = 'sequential'
+HEDGED = 'hedged'
+
+# (source name, lookup) or (source name, lookup, host it queries; None for answers already in hand)
+Lookup = Union[Tuple[str, Callable[[], Dict]], Tuple[str, Callable[[], Dict], Optional[str]]]
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='hedged-lookup')
+
+
+def has_abstract(result: Optional[Dict]) -> bool:
+    """Default acceptance test: the source found the paper and returned abstract text"""
+    return bool(result and result.get('found') and (result.get('abstract') or '').strip())
+
+
+def _call(name: str, lookup: Callable[[], Dict], cancel: Optional[threading.Event] = None) -> Dict:
+    try:
+        if cancel is None:
+            return lookup()
+        with cancel_token(cancel):
+            return lookup()
+    except Exception as e:
+        return {'found': False, 'abstract': '', 'source': name, 'error': str(e)}
+
+
+def _host(lookup: Lookup) -> Optional[str]:
+    return lookup[2] if len(lookup) > 2 else None
+
+
+def resolve_sequential(lookups: List[Lookup],
+                       accept: Callable[[Dict], bool] = has_abstract) -> Tuple[Optional[Dict], List[Dict]]:
+    """Try sources one after another; returns (accepted result or None, every result seen)"""
+    attempts = []
+    for name, lookup, *_ in lookups:
+        result = _call(name, lookup)
+        attempts.append(result)
+        if accept(result):
+            return result, attempts
+    return None, attempts
+
+
+def resolve_hedged(lookups: List[Lookup], hedge_delay: float = DEFAULT_HEDGE_DELAY,
+                   accept: Callable[[Dict], bool] = has_abstract) -> Tuple[Optional[Dict], List[Dict]]:
+    """
+    Start sources in priority order, the next one after hedge_delay seconds or as
+    soon as an earlier one comes back empty. A hedge (a start while earlier sources
+    are still running) waits until its host has a rate token free, rather than
+    queueing behind the limiter. The first accepted result wins; sources not yet
+    started are never started, and lookups still in flight are cancelled before
+    they take a host slot (their results are discarded).
+    Returns (accepted result or None, every result seen).
+    """
+    limiter = get_rate_limiter()
+    cancel = threading.Event()
+    queue = list(lookups)
+    pending = {}
+    attempts = []
+    next_start = time.monotonic()
+
+    while queue or pending:
+        now = time.monotonic()
+        if queue and (now >= next_start or not pending):
+            host = _host(queue[0])
+            ready_in = limiter.ready_in(host) if pending and host else 0.0
+            if ready_in <= 0:
+                name, lookup, *_ = queue.pop(0)
+                pending[_executor.submit(_call, name, lookup, cancel)] = name
+                next_start = now + hedge_delay
+                continue
+            next_start = now + ready_in
+
+        timeout = max(0.0, next_start - now) if queue else None
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.pop(future)
+            result = future.result()
+            attempts.append(result)
+            if accept(result):
+                cancel.set()
+                for other in pending:
+                    other.cancel()
+                return result, attempts
+            # A miss: no reason to keep the next source waiting
+            next_start = time.monotonic()
+
+    return None, attempts
+
+
+def resolve(lookups: List[Lookup], mode: str = HEDGED, hedge_delay: float = DEFAULT_HEDGE_DELAY,
+            accept: Callable[[Dict], bool] = has_abstract) -> Tuple[Optional[Dict], List[Dict]]:
+    """Resolve with the given mode ('hedged' or 'sequential')"""
+    if mode == SEQUENTIAL or len(lookups) < 2:
+        return resolve_sequential(lookups, accept)
+    return resolve_hedged(lookups, hedge_delay, accept)
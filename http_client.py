@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Client
+Process-wide connection-pooled sessions used by every external source (CrossRef,
+Semantic Scholar, arXiv, Unpaywall, doi.org and publisher pages)
+"""
+
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from api_stub import FixtureStore, stub_url
+from circuit_breaker import CircuitOpenError, get_breakers, is_failure_status
+from rate_limiter import (THROTTLE_STATUSES, HostThrottled, RequestCancelled, current_cancel_token,
+                          get_rate_limiter)
+from response_cache import get_response_cache
+
+BROWSER_USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+API_USER_AGENT = 'ResearchHelper/1.0 (mailto:researcher@example.com)'
+
+# Pool sizing: number of distinct hosts kept alive and connections per host
+DEFAULT_POOL_HOSTS = int(os.environ.get('RESEARCHHELPER_HTTP_POOL_HOSTS', '32'))
+DEFAULT_POOL_SIZE = int(os.environ.get('RESEARCHHELPER_HTTP_POOL_SIZE', '20'))
+DEFAULT_RETRIES = int(os.environ.get('RESEARCHHELPER_HTTP_RETRIES', '3'))
+DEFAULT_BACKOFF_FACTOR = float(os.environ.get('RESEARCHHELPER_HTTP_BACKOFF', '1'))
+
+# Offline harness (see api_stub): record responses to fixtures, or send everything to the stub server
+_stub_base: Optional[str] = os.environ.get('RESEARCHHELPER_API_STUB') or None
+_recorder: Optional[FixtureStore] = (FixtureStore(os.environ['RESEARCHHELPER_RECORD_DIR'])
+                                     if os.environ.get('RESEARCHHELPER_RECORD_DIR') else None)
+
+logger = logging.getLogger(__name__)
+
+
+class _TeeBody:
+    """
+    Stands in for a response's urllib3 body: passes every read through to the
+    caller and keeps a copy of the decoded bytes, so the cache and recorder get
+    the body without it being loaded ahead of a streaming parser. Callbacks run
+    once the body has been read to the end; a stream abandoned part-way (or read
+    undecoded) is never handed on.
+    """
+
+    def __init__(self, raw, callbacks: List[Callable[[bytes], None]]):
+        self._raw = raw
+        self.callbacks = callbacks
+        self._chunks: List[bytes] = []
+        self._intact = True
+        self._done = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _keep(self, data: bytes, decode_content) -> bytes:
+        if decode_content is False:
+            self._intact = False
+        elif data and self._intact:
+            self._chunks.append(data)
+        return data
+
+    def _finish(self):
+        if self._done:
+            return
+        self._done = True
+        if not self._intact:
+            return
+        body = b''.join(self._chunks)
+        self._chunks = []
+        for callback in self.callbacks:
+            try:
+                callback(body)
+            except Exception as e:
+                logger.warning(f"Could not keep response body: {e}")
+
+    def stream(self, amt: int = 2 ** 16, decode_content=None):
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            yield self._keep(chunk, decode_content)
+        self._finish()
+
+    def read(self, amt=None, decode_content=None, **kwargs):
+        data = self._keep(self._raw.read(amt, decode_content=decode_content, **kwargs), decode_content)
+        if amt is None or not data:
+            self._finish()
+        return data
+
+
+def _timeout_seconds(timeout) -> Optional[float]:
+    """Longest time a request's timeout (seconds or a (connect, read) tuple) lets it take, or None"""
+    if isinstance(timeout, (int, float)):
+        return float(timeout)
+    if isinstance(timeout, tuple):
+        parts = [part for part in timeout if isinstance(part, (int, float))]
+        return float(sum(parts)) if len(parts) == len(timeout) else None
+    return None
+
+
+def _when_read(response: requests.Response, callback: Callable[[bytes], None]):
+    """Call callback(body) once the caller has read the whole body (right away if it is in memory)"""
+    if response._content is not False or response.raw is None:
+        callback(response.content)
+    elif isinstance(response.raw, _TeeBody):
+        response.raw.callbacks.append(callback)
+    else:
+        response.raw = _TeeBody(response.raw, [callback])
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter shared by every session so keep-alive pools are process-wide.
+
+    Each outgoing request first takes a slot and a token from its host's AIMD
+    controller in the shared rate limiter, so independent hosts proceed in
+    parallel. 429/503 responses are fed back to the controller (which backs
+    off, honoring Retry-After) and re-sent up to throttle_retries times; other
+    transient failures are retried by urllib3. GET lookups against cached API
+    sources are answered from the persistent response cache while fresh, and
+    revalidated with ETag/Last-Modified once stale.
+
+    Every host also has a circuit breaker: while it is open, requests fail
+    immediately with CircuitOpenError (or get the stale cached copy, if any).
+
+    Bodies are cached (and recorded) as the caller reads them, never read ahead
+    of a stream=True caller. In record mode every response handed back is also saved as a fixture; in
+    stub mode requests go on the wire to the local stub server instead of the
+    real host, after rate limiting and breakers have seen the original URL.
+    """
+
+    def __init__(self, pool_hosts: int = DEFAULT_POOL_HOSTS, pool_size: int = DEFAULT_POOL_SIZE,
+                 retries: int = DEFAULT_RETRIES, backoff_factor: float = DEFAULT_BACKOFF_FACTOR):
+        # Throttling statuses are left to the rate limiter so it sees every 429/503
+        retry_strategy = Retry(
+            total=retries,
+            status_forcelist=[500, 502, 504],
+            allowed_methods=["HEAD", "GET", "OPTIONS"],
+            backoff_factor=backoff_factor,
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        super().__init__(pool_connections=pool_hosts, pool_maxsize=pool_size,
+                         max_retries=retry_strategy, pool_block=False)
+        self.throttle_retries = retries
+
+    def send(self, request, **kwargs):
+        response = self._send_cached(request, **kwargs)
+        recorder = _recorder
+        if recorder is not None:
+            _when_read(response, lambda body: recorder.save(request, response, body))
+        return response
+
+    def _send_cached(self, request, **kwargs):
+        # Stubbed runs must not read or write the real-URL entries of the persistent cache
+        cache = get_response_cache() if _stub_base is None else None
+        entry = None
+        if cache is not None and cache.is_cacheable(request):
+            entry = cache.lookup(request)
+            if entry is not None and entry.fresh:
+                cache.record('hits')
+                return cache.build_response(entry, request, self)
+            if entry is not None:
+                request.headers.update(entry.validators)
+        else:
+            cache = None
+
+        breaker = get_breakers().breaker_for(request.url)
+        if not breaker.allow():
+            if entry is not None:
+                cache.record('stale_served')
+                return cache.build_response(entry, request, self)
+            raise CircuitOpenError(f"Circuit open for {breaker.host}; request skipped", request=request)
+        try:
+            response = self._send_throttled(request, **kwargs)
+        except RequestCancelled:
+            breaker.release_probe()
+            raise
+        except HostThrottled:
+            breaker.release_probe()
+            if entry is not None:
+                cache.record('stale_served')
+                return cache.build_response(entry, request, self)
+            raise
+        except Exception as e:
+            breaker.record_failure(f"{type(e).__name__}: {e}"[:200])
+            raise
+        if is_failure_status(response.status_code):
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+
+        if cache is not None:
+            if entry is not None and response.status_code == 304:
+                cache.refresh(entry, request)
+                cache.record('revalidated')
+                response.close()
+                return cache.build_response(entry, request, self)
+            cache.record('misses')
+            if cache.accepts(request, response):
+                # Stored as the caller reads it, so streamed pages still arrive item by item
+                _when_read(response, lambda body: cache.store(request, response, body))
+        return response
+
+    def _send_throttled(self, request, **kwargs):
+        """Send through the host's AIMD controller, re-sending after 429/503 backoffs"""
+        limiter = get_rate_limiter()
+        # Set by hedged lookups: a lookup that already lost gives up its place in the host's queue
+        cancel = current_cancel_token()
+        # A host paused for longer than the caller's timeout fails fast instead of blocking the caller
+        max_pause = _timeout_seconds(kwargs.get('timeout'))
+        pause = limiter.pause_remaining(request.url)
+        if max_pause is not None and pause > max_pause:
+            raise HostThrottled(f"Host backing off for {pause:.0f}s, longer than the {max_pause:.0f}s timeout",
+                                request=request)
+        for attempt in range(self.throttle_retries + 1):
+            limiter.acquire(request.url, cancel)
+            try:
+                response = self._send_wire(request, **kwargs)
+            except Exception:
+                limiter.release(request.url)
+                raise
+            limiter.release(request.url, response.status_code, response.headers.get('Retry-After'))
+            if response.status_code not in THROTTLE_STATUSES or attempt == self.throttle_retries:
+                return response
+            if max_pause is not None and limiter.pause_remaining(request.url) > max_pause:
+                # Hand back the 429/503 rather than waiting out Retry-After
+                return response
+            response.close()
+        return response
+
+    def _send_wire(self, request, **kwargs):
+        """Send over the pool, to the stub server when one is configured"""
+        if _stub_base is None:
+            return super().send(request, **kwargs)
+        stubbed = request.copy()
+        stubbed.url = stub_url(_stub_base, request.url)
+        response = super().send(stubbed, **kwargs)
+        # Callers (and redirect handling) see the original URL
+        response.url = request.url
+        response.request = request
+        return response
+
+
+_lock = threading.Lock()
+_adapter: Optional[PooledHTTPAdapter] = None
+_sessions: Dict[tuple, requests.Session] = {}
+
+
+def get_adapter() -> PooledHTTPAdapter:
+    """Return the process-wide adapter, creating it on first use"""
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            _adapter = PooledHTTPAdapter()
+        return _adapter
+
+
+def configure(pool_hosts: Optional[int] = None, pool_size: Optional[int] = None,
+              retries: Optional[int] = None, backoff_factor: Optional[float] = None) -> PooledHTTPAdapter:
+    """Rebuild the shared adapter with new pool/retry settings and remount it on all sessions"""
+    global _adapter
+    adapter = PooledHTTPAdapter(
+        pool_hosts=pool_hosts if pool_hosts is not None else DEFAULT_POOL_HOSTS,
+        pool_size=pool_size if pool_size is not None else DEFAULT_POOL_SIZE,
+        retries=retries if retries is not None else DEFAULT_RETRIES,
+        backoff_factor=backoff_factor if backoff_factor is not None else DEFAULT_BACKOFF_FACTOR
+    )
+    with _lock:
+        old_adapter = _adapter
+        _adapter = adapter
+        for session in _sessions.values():
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+    if old_adapter is not None:
+        old_adapter.close()
+    return adapter
+
+
+def configure_offline(stub: Optional[str] = None, record_dir: Optional[str] = None):
+    """
+    Route all sessions to a local stub server (base URL) and/or record responses
+    into a fixture directory; None turns the respective mode off
+    """
+    global _stub_base, _recorder
+    _stub_base = stub or None
+    _recorder = FixtureStore(record_dir) if record_dir else None
+
+
+def offline_mode() -> Dict[str, Optional[str]]:
+    """Current stub/record settings, for health endpoints"""
+    return {'api_stub': _stub_base, 'record_dir': _recorder.directory if _recorder is not None else None}
+
+
+def get_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Return a shared session for the given default headers.
+
+    Sessions are cached per header set (e.g. browser vs. API User-Agent) but all of
+    them mount the same adapter, so connections to a host are reused across callers.
+    """
+    if headers is None:
+        headers = {'User-Agent': BROWSER_USER_AGENT}
+    key = tuple(sorted(headers.items()))
+
+    adapter = get_adapter()
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(headers)
+            _sessions[key] = session
+        return session
+
+
+def close_all():
+    """Close every pooled connection (used on shutdown and in tests)"""
+    global _adapter
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        if _adapter is not None:
+            _adapter.close()
+            _adapter = None
@@ -6,9 +6,19 @@ Fetches papers for multiple keywords, combines them, and processes through the f
 
 import pandas as pd
 import requests
+import http_client
+from crossref_fetcher import (DEFAULT_SHARD_MONTHS, RANK_RELEVANCE, CrossRefFetcher, build_works_params, date_shards,
+                              new_scan)
+from arxiv_client import ArxivClient
+from federated_search import federated_fetch
+from near_duplicates import NearDuplicateIndex
+from corpus_index import get_corpus_index
+from duplicate_clusters import fuse_duplicates, fuse_records
+from title_normalization import title_similarity, title_tokens
+from query_watermarks import arxiv_since, crossref_since
+from negative_cache import normalize_doi
 import time
 import os
-import re
 import json
 from datetime import datetime
 from urllib.parse import urlparse, quote
@@ -18,6 +28,99 @@ import hashlib
 import tempfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+S2_SEARCH_URL = 'https://api.semanticscholar.org/graph/v1/paper/search'
+S2_SEARCH_FIELDS = 'title,abstract,authors,year,venue,journal,externalIds,url,publicationTypes,openAccessPdf'
+S2_MAX_PAGE = 100  # Largest limit the search endpoint accepts
+
+# Keyword configurations fetched at once; real request rates are bounded by the per-host limiter
+DEFAULT_CONFIG_WORKERS = int(os.environ.get('RESEARCHHELPER_CONFIG_WORKERS', '4'))
+SAVE_INTERMEDIATE_CSVS = os.environ.get('RESEARCHHELPER_SAVE_INTERMEDIATE', '1') != '0'
+
+
+def sources_ok(status: Dict[str, Dict[str, bool]]) -> bool:
+    """True if every source a query asked answered without errors (results may be cut off at max_results)"""
+    return bool(status) and not any(outcome['failed'] for outcome in status.values())
+
+
+def sources_complete(status: Dict[str, Dict[str, bool]]) -> bool:
+    """True if every source a query asked ran out of results without errors (nothing cut off at max_results)"""
+    return sources_ok(status) and all(outcome['ran_out'] for outcome in status.values())
+
+
+class IncrementalDeduplicator:
+    """
+    Streaming form of remove_duplicates: papers are offered one at a time and
+    kept unless their DOI was already seen or their title's word-set Jaccard
+    similarity to a kept title exceeds threshold (looked up in a MinHash-LSH index).
+    A duplicate is fused into the kept paper it matched, so its abstract or PDF is not lost
+    """
+
+    def __init__(self, threshold: float = 0.85):
+        self.threshold = threshold
+        self.seen_dois: Set[str] = set()
+        self.titles = NearDuplicateIndex(threshold)
+        self.registered = 0
+        self.papers: List[Dict] = []
+        self.offered = 0
+        # Position in self.papers of the paper each DOI / indexed title belongs to (None: seeded)
+        self.doi_owner: Dict[str, Optional[int]] = {}
+        self.title_owner: Dict[int, Optional[int]] = {}
+
+    def _register_title(self, title: str) -> Optional[int]:
+        """Index the title unless it is a near-duplicate of one already indexed; returns the match's key"""
+        self.registered += 1
+        return self.titles.add_unique(self.registered, title_tokens(title))
+
+    def _fuse(self, owner: Optional[int], paper: Dict):
+        if owner is not None:
+            # In place, so callers holding the kept dict see the fused fields
+            self.papers[owner].update(fuse_records([self.papers[owner], paper]))
+
+    def add(self, paper: Dict) -> bool:
+        """Keep the paper unless it duplicates one already kept; returns True if kept"""
+        self.offered += 1
+
+        # Check DOI first (exact match on the canonical form)
+        doi = normalize_doi(paper.get('doi', ''))
+        if doi and doi in self.seen_dois:
+            self._fuse(self.doi_owner.get(doi), paper)
+            return False
+        elif doi:
+            self.seen_dois.add(doi)
+
+        # Check title similarity
+        match = self._register_title(paper.get('title', '').strip())
+        if match is not None:
+            owner = self.title_owner.get(match)
+            if doi:
+                self.doi_owner[doi] = owner
+            self._fuse(owner, paper)
+            return False
+
+        self.title_owner[self.registered] = len(self.papers)
+        if doi:
+            self.doi_owner[doi] = len(self.papers)
+        self.papers.append(paper)
+        return True
+
+    def add_all(self, papers: List[Dict]) -> int:
+        """Offer several papers; returns how many were kept"""
+        return sum(self.add(paper) for paper in papers)
+
+    def seed(self, papers: List[Dict]):
+        """Register already-kept papers (e.g. an existing corpus) without checking them against each other"""
+        for paper in papers:
+            doi = normalize_doi(paper.get('doi', ''))
+            if doi:
+                self.seen_dois.add(doi)
+            self.registered += 1
+            self.titles.add(self.registered, title_tokens(paper.get('title', '')))
+
+    @property
+    def duplicates(self) -> int:
+        return self.offered - len(self.papers)
+
+
 class MultiKeywordPaperFetcher:
     def __init__(self, output_dir: str = "/Users/reddy/2025/ResearchHelper/results"):
         self.output_dir = output_dir
@@ -27,30 +130,22 @@ class MultiKeywordPaperFetcher:
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
 
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_delay = 0.5  # seconds between requests
-
-        # Session for persistent connections
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'ResearchHelper/1.0 (mailto:researcher@example.com)'
-        })
-
-    def rate_limit(self):
-        """Implement rate limiting between API calls"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_delay:
-            time.sleep(self.min_delay - time_since_last)
-        self.last_request_time = time.time()
+        # Shared connection-pooled session (per-host rate limits are applied by http_client)
+        self.session = http_client.get_session({'User-Agent': http_client.API_USER_AGENT})
 
     def fetch_papers_for_keyword(self, primary_keyword: str, secondary_keyword: str = "",
                                 from_year: int = 2020, to_year: int = 2025,
-                                max_results: int = 50) -> List[Dict]:
-        """Fetch papers for a specific keyword combination"""
-        papers = []
-
+                                max_results: int = 50, shard_months: int = DEFAULT_SHARD_MONTHS,
+                                ranking: str = RANK_RELEVANCE, since: Optional[float] = None,
+                                status: Optional[Dict[str, Dict[str, bool]]] = None) -> List[Dict]:
+        """
+        Fetch papers for a specific keyword combination from CrossRef, Semantic Scholar
+        and arXiv concurrently; papers found by several sources are merged by DOI/arXiv ID.
+        With a since watermark (epoch seconds) only works new or updated after it are
+        fetched; Semantic Scholar search has no such filter and is skipped then.
+        status, if given, receives each source's scan outcome (see sources_complete).
+        """
+        status = status if status is not None else {}
         try:
             self.logger.info(f"Fetching papers for: '{primary_keyword}' + '{secondary_keyword}'")
 
@@ -62,97 +157,144 @@ class MultiKeywordPaperFetcher:
                 query = primary_keyword
                 search_term = primary_keyword
 
-            # Fetch from CrossRef
-            crossref_papers = self._fetch_from_crossref(search_term, from_year, to_year, max_results)
-            papers.extend(crossref_papers)
-
-            # Fetch from arXiv
-            arxiv_papers = self._fetch_from_arxiv(query, max_results // 4)
-            papers.extend(arxiv_papers)
+            status.update({'CrossRef': new_scan(), 'arXiv': new_scan()})
+            sources = [
+                ('CrossRef', lambda: self._fetch_from_crossref(search_term, from_year, to_year, max_results,
+                                                               shard_months, ranking, since, status['CrossRef'])),
+                ('arXiv', lambda: self._fetch_from_arxiv(query, max_results // 4, since, status['arXiv'])),
+            ]
+            if since is None:
+                status['Semantic Scholar'] = new_scan()
+                sources.insert(1, ('Semantic Scholar', lambda: self._fetch_from_semantic_scholar(
+                    query, from_year, to_year, max_results // 2, status['Semantic Scholar'])))
+            else:
+                self.logger.info(f"Incremental fetch: works indexed since {crossref_since(since)}")
+            papers, counts = federated_fetch(sources, log=self.logger.info)
 
             # Add keyword source info
-            for paper in papers:
+            for idx, paper in enumerate(papers, 1):
+                paper['paper_id'] = f"paper_{idx:03d}"
                 paper['search_keywords'] = f"{primary_keyword}; {secondary_keyword}".strip('; ')
-                paper['fetch_source'] = 'CrossRef+arXiv'
 
-            self.logger.info(f"Fetched {len(papers)} papers for '{query}'")
+            self.logger.info(f"Fetched {len(papers)} papers for '{query}' "
+                             f"({counts['duplicates_merged']} cross-source duplicates merged)")
             return papers
 
         except Exception as e:
             self.logger.error(f"Error fetching papers for '{primary_keyword}': {e}")
             return []
 
-    def _fetch_from_crossref(self, search_term: str, from_year: int, to_year: int, max_results: int) -> List[Dict]:
-        """Fetch papers from CrossRef API"""
+    def _fetch_from_crossref(self, search_term: str, from_year: int, to_year: int, max_results: int,
+                             shard_months: int = DEFAULT_SHARD_MONTHS, ranking: str = RANK_RELEVANCE,
+                             since: Optional[float] = None,
+                             outcome: Optional[Dict[str, bool]] = None) -> List[Dict]:
+        """
+        Fetch papers from CrossRef API (cursor paging for deep requests, select= projection).
+        With shard_months > 0 the year range is split into publication-date shards
+        fetched in parallel and merged by the given ranking. outcome (see
+        crossref_fetcher.new_scan) records whether CrossRef ran out or a page failed.
+        """
+        outcome = outcome if outcome is not None else new_scan()
         papers = []
-        rows_per_request = 50
-        offset = 0
+        fetcher = CrossRefFetcher(session=self.session, rows_per_page=50, log=self.logger.debug)
+        params = build_works_params(search_term.replace('+', ' '), from_year=from_year, to_year=to_year,
+                                    since=crossref_since(since) if since is not None else None)
 
-        while len(papers) < max_results:
+        shards = date_shards(from_year, to_year, shard_months) if shard_months > 0 else []
+        if len(shards) > 1:
             try:
-                self.rate_limit()
-
-                remaining = max_results - len(papers)
-                current_rows = min(rows_per_request, remaining * 2)  # Fetch more to account for filtering
-
-                url = f"https://api.crossref.org/works?"
-                url += f"query.title={quote(search_term)}"
-                url += f"&filter=from-pub-date:{from_year},until-pub-date:{to_year}"
-                url += ",type:journal-article,type:proceedings-article"
-                url += f"&rows={current_rows}&offset={offset}&sort=relevance"
-
-                response = self.session.get(url, timeout=30)
-                if response.status_code != 200:
-                    break
-
-                data = response.json()
-                items = data.get('message', {}).get('items', [])
-
-                if not items:
-                    break
+                accepted = fetcher.fetch_sharded(params, shards, max_results, ranking=ranking,
+                                                 accept=lambda item: self._extract_crossref_paper(item, 0) is not None)
+                outcome.update(fetcher.last_scan)
+            except Exception as e:
+                self.logger.error(f"CrossRef sharded fetch error: {e}")
+                outcome['failed'] = True
+                accepted = []
+            return [self._extract_crossref_paper(item, idx) for idx, item in enumerate(accepted, 1)]
 
-                for idx, item in enumerate(items):
+        # Scan extra items to account for ones _extract_crossref_paper rejects
+        items = fetcher.iter_items(params, max_scanned=max_results * 2, outcome=outcome)
+        try:
+            for item in items:
+                paper = self._extract_crossref_paper(item, len(papers) + 1)
+                if paper:
+                    papers.append(paper)
                     if len(papers) >= max_results:
                         break
+        except Exception as e:
+            self.logger.error(f"CrossRef fetch error: {e}")
+            outcome['failed'] = True
+        finally:
+            items.close()
 
-                    paper = self._extract_crossref_paper(item, len(papers) + 1)
-                    if paper:
-                        papers.append(paper)
+        return papers[:max_results]
 
-                offset += current_rows
+    def _fetch_from_arxiv(self, query: str, max_results: int, since: Optional[float] = None,
+                          outcome: Optional[Dict[str, bool]] = None) -> List[Dict]:
+        """Fetch papers from arXiv API (only entries updated after since, if given)"""
+        outcome = outcome if outcome is not None else new_scan()
+        papers = []
+        search_query = f"all:{query}"
+        if since is not None:
+            search_query += f" AND lastUpdatedDate:{arxiv_since(since)}"
 
-                # Break if we got fewer results than requested (end of results)
-                if len(items) < current_rows:
-                    break
+        try:
+            # Entries are parsed one at a time as the feed streams in
+            entries = 0
+            for entry in ArxivClient(session=self.session).search(search_query, max_results=max_results):
+                entries += 1
+                paper = self._extract_arxiv_paper(entry, len(papers) + 1)
+                if paper:
+                    papers.append(paper)
+            # A full page may have been cut off at max_results
+            outcome['ran_out'] = entries < max_results
 
-            except Exception as e:
-                self.logger.error(f"CrossRef fetch error: {e}")
-                break
+        except Exception as e:
+            self.logger.error(f"arXiv fetch error: {e}")
+            outcome['failed'] = True
 
-        return papers[:max_results]
+        return papers
 
-    def _fetch_from_arxiv(self, query: str, max_results: int) -> List[Dict]:
-        """Fetch papers from arXiv API"""
+    def _fetch_from_semantic_scholar(self, query: str, from_year: int, to_year: int, max_results: int,
+                                     outcome: Optional[Dict[str, bool]] = None) -> List[Dict]:
+        """Fetch papers from the Semantic Scholar search API"""
+        outcome = outcome if outcome is not None else new_scan()
         papers = []
+        offset = 0
 
         try:
-            self.rate_limit()
-
-            search_query = quote(query)
-            url = f"http://export.arxiv.org/api/query?search_query=all:{search_query}&max_results={max_results}"
-
-            response = self.session.get(url, timeout=30)
-            if response.status_code == 200:
-                from xml.etree import ElementTree as ET
-                root = ET.fromstring(response.content)
+            while len(papers) < max_results:
+                limit = min(S2_MAX_PAGE, max_results - len(papers))
+                params = {
+                    'query': query,
+                    'year': f"{from_year}-{to_year}",
+                    'fields': S2_SEARCH_FIELDS,
+                    'offset': offset,
+                    'limit': limit
+                }
+                response = self.session.get(S2_SEARCH_URL, params=params, timeout=30)
+                if response.status_code != 200:
+                    self.logger.error(f"Semantic Scholar search returned status {response.status_code}")
+                    outcome['failed'] = True
+                    break
 
-                for idx, entry in enumerate(root.findall('{http://www.w3.org/2005/Atom}entry')):
-                    paper = self._extract_arxiv_paper(entry, len(papers) + 1)
+                data = response.json()
+                records = data.get('data', [])
+                for record in records:
+                    paper = self._extract_semantic_scholar_paper(record, len(papers) + 1)
                     if paper:
                         papers.append(paper)
+                        if len(papers) >= max_results:
+                            break
+
+                if 'next' not in data or not records:
+                    outcome['ran_out'] = True
+                    break
+                offset = data['next']
 
         except Exception as e:
-            self.logger.error(f"arXiv fetch error: {e}")
+            self.logger.error(f"Semantic Scholar fetch error: {e}")
+            outcome['failed'] = True
 
         return papers
 
@@ -169,26 +311,26 @@ class MultiKeywordPaperFetcher:
                         authors.append(author['family'])
 
             # Extract title - handle both string and float
+            title = ''
+            if item.get('title'):
                 title_val = item['title'][0] if isinstance(item['title'], list) else item['title']
                 title = str(title_val).strip() if title_val is not None else ''
+
             # Extract journal - handle both string and float
+            journal = ''
+            if item.get('container-title'):
                 journal_val = item['container-title'][0] if isinstance(item['container-title'], list) else item['container-title']
                 journal = str(journal_val).strip() if journal_val is not None else ''
+
             # Handle abstract - ensure it's a string
             abstract_val = item.get('abstract', '')
             abstract = str(abstract_val).strip() if abstract_val is not None else ''
 
-                'title': title,
-                'abstract': abstract,
-                'journal': journal,
-                'volume': str(item.get('volume', '')) if item.get('volume') is not None else '',
-                'issue': str(item.get('issue', '')) if item.get('issue') is not None else '',
-                'pages': str(item.get('page', '')) if item.get('page') is not None else '',
-                'publisher': str(item.get('publisher', '')) if item.get('publisher') is not None else '',
-                'doi': str(item.get('DOI', '')) if item.get('DOI') is not None else '',
-                'url': str(item.get('URL', '')) if item.get('URL') is not None else '',
-                'type': str(item.get('type', '')) if item.get('type') is not None else '',
-            
+            # Extract year
+            year = ''
+            if item.get('published-print', {}).get('date-parts'):
+                year = str(item['published-print']['date-parts'][0][0])
+            elif item.get('published-online', {}).get('date-parts'):
                 year = str(item['published-online']['date-parts'][0][0])
 
             # Skip if essential fields are missing
@@ -198,7 +340,7 @@ class MultiKeywordPaperFetcher:
             return {
                 'paper_id': f"paper_{paper_id:03d}",
                 'title': title.strip(),
-                'abstract': item.get('abstract', '').strip(),
+                'abstract': abstract,
                 'authors': '; '.join(authors) if authors else 'Not Available',
                 'journal': journal.strip(),
                 'year': year,
@@ -221,28 +363,16 @@ class MultiKeywordPaperFetcher:
             self.logger.error(f"Error extracting CrossRef paper: {e}")
             return None
 
-    def _extract_arxiv_paper(self, entry, paper_id: int) -> Optional[Dict]:
-        """Extract paper information from arXiv entry"""
+    def _extract_arxiv_paper(self, entry: Dict, paper_id: int) -> Optional[Dict]:
+        """Extract paper information from a parsed arXiv entry (see arxiv_client)"""
         try:
-            title = entry.find('{http://www.w3.org/2005/Atom}title').text.strip()
-            abstract = entry.find('{http://www.w3.org/2005/Atom}summary').text.strip()
-
-            # Extract authors
-            authors = []
-            for author in entry.findall('{http://www.w3.org/2005/Atom}author'):
-                name = author.find('{http://www.w3.org/2005/Atom}name').text
-                authors.append(name)
-
-            # Extract year from published date
-            published = entry.find('{http://www.w3.org/2005/Atom}published').text
-            year = published.split('-')[0]
-
-            # Extract PDF URL
-            pdf_url = ''
-            for link in entry.findall('{http://www.w3.org/2005/Atom}link'):
-                if link.get('type') == 'application/pdf':
-                    pdf_url = link.get('href')
-                    break
+            title = entry['title']
+            abstract = entry['abstract']
+            authors = [name for name in entry['authors'] if name]
+            year = entry['published'].split('-')[0]
+            pdf_url = entry['pdf_url'] or ''
+            if not title or not year:
+                return None
 
             return {
                 'paper_id': f"paper_{paper_id:03d}",
@@ -270,60 +400,65 @@ class MultiKeywordPaperFetcher:
             self.logger.error(f"Error extracting arXiv paper: {e}")
             return None
 
-    def calculate_similarity(self, title1: str, title2: str, threshold: float = 0.8) -> float:
-        """Calculate similarity between two titles"""
-        if not title1 or not title2:
-            return 0.0
-
-        # Normalize titles
-        title1_clean = re.sub(r'[^\w\s]', ' ', title1.lower()).strip()
-        title2_clean = re.sub(r'[^\w\s]', ' ', title2.lower()).strip()
+    def _extract_semantic_scholar_paper(self, record: Dict, paper_id: int) -> Optional[Dict]:
+        """Extract paper information from a Semantic Scholar search result"""
+        try:
+            title = (record.get('title') or '').strip()
+            year = str(record.get('year') or '')
+            if not title or not year:
+                return None
 
-        words1 = set(title1_clean.split())
-        words2 = set(title2_clean.split())
+            external_ids = record.get('externalIds') or {}
+            journal_info = record.get('journal') or {}
+            authors = [author.get('name', '') for author in record.get('authors') or [] if author.get('name')]
+            abstract = (record.get('abstract') or '').strip()
+            doi = external_ids.get('DOI', '')
+            if not doi and external_ids.get('ArXiv'):
+                doi = f"10.48550/arXiv.{external_ids['ArXiv']}"
+            pdf_info = record.get('openAccessPdf') or {}
 
-        if not words1 or not words2:
-            return 0.0
+            return {
+                'paper_id': f"paper_{paper_id:03d}",
+                'title': title,
+                'abstract': abstract,
+                'authors': '; '.join(authors) if authors else 'Not Available',
+                'journal': journal_info.get('name') or record.get('venue') or '',
+                'year': year,
+                'volume': journal_info.get('volume', ''),
+                'issue': '',
+                'pages': (journal_info.get('pages') or '').strip(),
+                'publisher': '',
+                'doi': doi,
+                'url': pdf_info.get('url') or record.get('url') or '',
+                'type': ', '.join(record.get('publicationTypes') or []),
+                'abstract_source': 'Semantic Scholar' if abstract else '',
+                'abstract_confidence': 'high' if abstract else '',
+                'original_category': '',
+                'original_keywords': '',
+                'contributions': '',
+                'limitations': ''
+            }
 
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
+        except Exception as e:
+            self.logger.error(f"Error extracting Semantic Scholar paper: {e}")
+            return None
 
-        return len(intersection) / len(union) if union else 0.0
+    def calculate_similarity(self, title1: str, title2: str) -> float:
+        """Calculate similarity between two titles (canonical word-set Jaccard)"""
+        return title_similarity(title1, title2)
 
     def remove_duplicates(self, papers: List[Dict]) -> List[Dict]:
-        """Remove duplicate papers based on title similarity and DOI"""
-        unique_papers = []
-        seen_dois = set()
-        processed_titles = []
-
+        """Merge duplicate papers (title similarity or DOI) into one record per cluster"""
         self.logger.info(f"Removing duplicates from {len(papers)} papers...")
 
-        for paper in papers:
-            is_duplicate = False
-
-            # Check DOI first (exact match)
-            doi = paper.get('doi', '').strip()
-            if doi and doi in seen_dois:
-                is_duplicate = True
-            elif doi:
-                seen_dois.add(doi)
-
-            # Check title similarity
-            if not is_duplicate:
-                title = paper.get('title', '').strip()
-                for existing_title in processed_titles:
-                    if self.calculate_similarity(title, existing_title) > 0.85:
-                        is_duplicate = True
-                        break
-
-                if not is_duplicate:
-                    processed_titles.append(title)
-
-            if not is_duplicate:
-                unique_papers.append(paper)
+        # Duplicates (same canonical DOI or title similarity > 0.85, transitively) are
+        # clustered and each cluster fused into one paper rather than the later copies dropped
+        unique_papers, clusters = fuse_duplicates(papers, 0.85)
 
         removed_count = len(papers) - len(unique_papers)
-        self.logger.info(f"Removed {removed_count} duplicates, {len(unique_papers)} unique papers remaining")
+        fused_count = sum(1 for members in clusters if len(members) > 1)
+        self.logger.info(f"Merged {removed_count} duplicates into {fused_count} fused papers, "
+                         f"{len(unique_papers)} unique papers remaining")
 
         return unique_papers
 
@@ -358,66 +493,115 @@ class MultiKeywordPaperFetcher:
 
         return filepath
 
-    def fetch_multi_keyword_papers(self, keyword_configs: List[Dict]) -> str:
+    def fetch_multi_keyword_papers(self, keyword_configs: List[Dict], save_intermediate: Optional[bool] = None,
+                                   max_parallel: Optional[int] = None, allow_empty: bool = False,
+                                   use_corpus_index: bool = False, report: Optional[Dict] = None) -> str:
         """
         Fetch papers for multiple keyword configurations
 
+        Configurations are fetched concurrently (max_parallel at a time, sharing the
+        per-host rate limits) and their papers are deduplicated as they come in.
+
         Args:
             keyword_configs: List of dicts with keys: primary_keyword, secondary_keyword,
-                           from_year, to_year, max_results
+                           from_year, to_year, max_results and optionally shard_months, ranking,
+                           since (watermark, see query_watermarks)
+            save_intermediate: Write one CSV per configuration (default: RESEARCHHELPER_SAVE_INTERMEDIATE)
+            max_parallel: Configurations fetched at once (default: RESEARCHHELPER_CONFIG_WORKERS)
+            allow_empty: Write an empty combined CSV instead of raising when nothing was
+                         fetched (an incremental run with nothing new)
+            use_corpus_index: Leave out papers an earlier run already let through (see
+                              corpus_index); they are listed in an already_in_corpus CSV.
+                              The rest are recorded under report['run_id']: callers that
+                              fail to process them should forget_run it
+            report: Filled in for the caller (the fetcher is shared between requests):
+                    run_id, already_in_corpus, and source_status with one dict per
+                    keyword config of source name -> scan outcome (see sources_complete)
 
         Returns:
             Path to the combined CSV file
         """
-        all_papers = []
+        if save_intermediate is None:
+            save_intermediate = SAVE_INTERMEDIATE_CSVS
         intermediate_files = []
+        deduplicator = IncrementalDeduplicator()
 
         self.logger.info(f"Starting multi-keyword paper fetch for {len(keyword_configs)} configurations")
 
-        # Fetch papers for each keyword configuration
+        report = report if report is not None else {}
+        report.update({'run_id': None, 'already_in_corpus': 0,
+                       'source_status': [{} for _ in keyword_configs]})
+        jobs = []
         for idx, config in enumerate(keyword_configs, 1):
             primary = config.get('primary_keyword', '').strip()
-            secondary = config.get('secondary_keyword', '').strip()
-            from_year = config.get('from_year', 2020)
-            to_year = config.get('to_year', 2025)
-            max_results = config.get('max_results', 50)
-
             if not primary:
                 self.logger.warning(f"Skipping config {idx}: No primary keyword provided")
                 continue
+            jobs.append((idx, config, primary))
+
+        workers = max(1, min(max_parallel or DEFAULT_CONFIG_WORKERS, len(jobs) or 1))
+        # Completed configurations wait here until every earlier one has been
+        # deduplicated, so the papers kept do not depend on completion order
+        completed: Dict[int, List[Dict]] = {}
+        next_position = 0
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='keyword-config') as executor:
+            futures = {
+                executor.submit(
+                    self.fetch_papers_for_keyword,
+                    primary,
+                    config.get('secondary_keyword', '').strip(),
+                    config.get('from_year', 2020),
+                    config.get('to_year', 2025),
+                    config.get('max_results', 50),
+                    int(config.get('shard_months', DEFAULT_SHARD_MONTHS)),
+                    config.get('ranking', RANK_RELEVANCE),
+                    config.get('since'),
+                    report['source_status'][idx - 1]
+                ): position
+                for position, (idx, config, primary) in enumerate(jobs)
+            }
 
-            self.logger.info(f"Processing configuration {idx}/{len(keyword_configs)}")
-
-            # Fetch papers for this configuration
-            papers = self.fetch_papers_for_keyword(
-                primary, secondary, from_year, to_year, max_results
-            )
-
-            if papers:
-                # Save intermediate CSV
-                filename = f"csv_{idx}_{primary.replace(' ', '_').lower()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                filepath = self.save_intermediate_csv(papers, filename)
-                intermediate_files.append(filepath)
+            for future in as_completed(futures):
+                position = futures[future]
+                idx, config, primary = jobs[position]
+                papers = future.result()
+                self.logger.info(f"Configuration {idx}/{len(keyword_configs)} done: {len(papers)} papers")
 
-                all_papers.extend(papers)
-                self.logger.info(f"Added {len(papers)} papers from configuration {idx}")
+                if papers and save_intermediate:
+                    filename = f"csv_{idx}_{primary.replace(' ', '_').lower()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                    intermediate_files.append(self.save_intermediate_csv(papers, filename))
 
-            # Small delay between configurations
-            time.sleep(1)
+                completed[position] = papers
+                while next_position in completed:
+                    kept = deduplicator.add_all(completed.pop(next_position))
+                    if kept:
+                        self.logger.info(f"Added {kept} new papers from configuration {jobs[next_position][0]}")
+                    next_position += 1
 
-        if not all_papers:
+        if not deduplicator.offered and not allow_empty:
             raise ValueError("No papers were fetched from any configuration")
 
-        self.logger.info(f"Total papers fetched before deduplication: {len(all_papers)}")
+        self.logger.info(f"Total papers fetched before deduplication: {deduplicator.offered}")
 
-        # Remove duplicates
-        unique_papers = self.remove_duplicates(all_papers)
+        unique_papers = deduplicator.papers
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # Only papers no earlier run has seen flow downstream
+        corpus = get_corpus_index() if use_corpus_index else None
+        if corpus is not None:
+            label = ', '.join(primary for _, _, primary in jobs)
+            unique_papers, known, report['run_id'] = corpus.filter_new(unique_papers, 'fetch_multi_keyword', label)
+            report['already_in_corpus'] = len(known)
+            if known:
+                known_path = os.path.join(self.output_dir, f"already_in_corpus_{timestamp}.csv")
+                pd.DataFrame(known).to_csv(known_path, index=False)
+                self.logger.info(f"{len(known)} papers already in corpus, listed in {known_path}")
 
         # Reassign paper IDs
         unique_papers = self.reassign_paper_ids(unique_papers)
 
         # Save combined CSV
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         combined_filename = f"combined_papers_deduplicated_{timestamp}.csv"
         combined_filepath = self.save_intermediate_csv(unique_papers, combined_filename)
 
@@ -425,8 +609,9 @@ class MultiKeywordPaperFetcher:
         self.logger.info(f"FETCH SUMMARY:")
         self.logger.info(f"Configurations processed: {len(keyword_configs)}")
         self.logger.info(f"Intermediate CSV files: {len(intermediate_files)}")
-        self.logger.info(f"Total papers before deduplication: {len(all_papers)}")
+        self.logger.info(f"Total papers before deduplication: {deduplicator.offered}")
         self.logger.info(f"Unique papers after deduplication: {len(unique_papers)}")
+        self.logger.info(f"Already in corpus: {report['already_in_corpus']}")
         self.logger.info(f"Combined CSV saved to: {combined_filepath}")
 
         return combined_filepath
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Title Index
+MinHash signatures with LSH banding, so finding the earlier titles similar to a
+new one costs a few bucket lookups instead of a comparison with every title
+seen so far. Candidates from the buckets are confirmed with the exact
+similarity, so a reported duplicate always meets the threshold; the banding is
+sized to miss a pair at the threshold with probability below MAX_MISS_RATE.
+Titles are indexed by their token IDs from title_normalization.
+"""
+
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from title_normalization import jaccard, title_tokens
+
+DEFAULT_NUM_PERM = 128
+MAX_MISS_RATE = 1e-5
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_MAX_HASH = np.uint64(_MERSENNE_PRIME)
+
+Tokens = FrozenSet[int]
+
+
+def overlap_max(words1: Tokens, words2: Tokens) -> float:
+    """Shared words over the larger set (the /api/deduplicate measure)"""
+    if not words1 or not words2:
+        return 0.0
+    return len(words1 & words2) / max(len(words1), len(words2))
+
+
+def lsh_params(threshold: float, num_perm: int = DEFAULT_NUM_PERM,
+               max_miss: float = MAX_MISS_RATE) -> Tuple[int, int]:
+    """
+    (bands, rows) for the threshold: among layouts that miss a pair of exactly
+    the threshold similarity with probability <= max_miss, the one producing
+    the fewest candidates at half the threshold
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 - threshold ** rows) ** bands > max_miss:
+            continue
+        false_candidates = 1 - (1 - (threshold / 2) ** rows) ** bands
+        if best is None or false_candidates < best[0]:
+            best = (false_candidates, bands, rows)
+    # Even one-row bands cannot reach max_miss: use them all for the best recall possible
+    return (best[1], best[2]) if best else (num_perm, 1)
+
+
+class MinHasher:
+    """num_perm universal hash functions ((a*x + b) mod p) over integer token IDs"""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        generator = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: Iterable[int]) -> np.ndarray:
+        hashes = np.fromiter(tokens, dtype=np.uint64) % _MAX_HASH
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % _MAX_HASH).min(axis=1)
+
+
+_hashers: Dict[int, MinHasher] = {}
+
+
+def get_hasher(num_perm: int = DEFAULT_NUM_PERM) -> MinHasher:
+    """Shared hasher per signature length (signatures are only comparable under one hasher)"""
+    hasher = _hashers.get(num_perm)
+    if hasher is None:
+        hasher = _hashers.setdefault(num_perm, MinHasher(num_perm))
+    return hasher
+
+
+class NearDuplicateIndex:
+    """
+    Token sets indexed for near-duplicate lookup.
+
+    similarity(tokens, tokens) confirms candidates against threshold (strictly
+    greater, or >= with inclusive=True). candidate_threshold is the Jaccard level
+    the banding targets; it defaults to threshold and must be lowered for
+    measures that can exceed Jaccard (overlap_max > t implies Jaccard > t / (2 - t)).
+    """
+
+    def __init__(self, threshold: float, similarity: Callable[[Tokens, Tokens], float] = jaccard,
+                 inclusive: bool = False, num_perm: int = DEFAULT_NUM_PERM,
+                 candidate_threshold: Optional[float] = None):
+        self.threshold = threshold
+        self.similarity = similarity
+        self.inclusive = inclusive
+        self.hasher = get_hasher(num_perm)
+        self.bands, self.rows = lsh_params(candidate_threshold if candidate_threshold is not None else threshold,
+                                           num_perm)
+        self.buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bands)]
+        self.tokens: Dict[Hashable, Tokens] = {}
+        self.order: Dict[Hashable, int] = {}
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def _band_keys(self, tokens: Tokens) -> List[bytes]:
+        signature = self.hasher.signature(tokens)
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _matches(self, tokens: Tokens, other: Tokens) -> bool:
+        self.comparisons += 1
+        score = self.similarity(tokens, other)
+        return score >= self.threshold if self.inclusive else score > self.threshold
+
+    def add(self, key: Hashable, tokens: Tokens, band_keys: Optional[List[bytes]] = None):
+        """Index tokens under key (empty token sets never match anything and are not indexed)"""
+        tokens = frozenset(tokens)
+        if not tokens:
+            return
+        self.tokens[key] = tokens
+        self.order[key] = len(self.order)
+        for band, band_key in enumerate(band_keys or self._band_keys(tokens)):
+            self.buckets[band].setdefault(band_key, []).append(key)
+
+    def _confirmed(self, tokens: Tokens, band_keys: List[bytes]) -> List[Hashable]:
+        candidates = set()
+        for band, band_key in enumerate(band_keys):
+            candidates.update(self.buckets[band].get(band_key, ()))
+        found = [key for key in candidates if self._matches(tokens, self.tokens[key])]
+        return sorted(found, key=self.order.__getitem__)
+
+    def matches(self, tokens: Tokens, band_keys: Optional[List[bytes]] = None) -> List[Hashable]:
+        """Every indexed key whose tokens are similar to tokens, in insertion order"""
+        tokens = frozenset(tokens)
+        if not tokens:
+            return []
+        return self._confirmed(tokens, band_keys or self._band_keys(tokens))
+
+    def find(self, tokens: Tokens) -> Optional[Hashable]:
+        """The earliest indexed key similar to tokens, or None"""
+        found = self.matches(tokens)
+        return found[0] if found else None
+
+    def add_unique(self, key: Hashable, tokens: Tokens) -> Optional[Hashable]:
+        """
+        Index tokens unless they duplicate an indexed entry; returns the earliest
+        matching key (the tokens are then not added) or None
+        """
+        tokens = frozenset(tokens)
+        if not tokens:
+            return None
+        band_keys = self._band_keys(tokens)
+        found = self._confirmed(tokens, band_keys)
+        if found:
+            return found[0]
+        self.add(key, tokens, band_keys)
+        return None
+
+
+def similar_pairs(titles: Iterable, threshold: float, tokenize: Callable[[object], Tokens] = title_tokens,
+                  similarity: Callable[[Tokens, Tokens], float] = jaccard,
+                  inclusive: bool = True) -> List[Tuple[int, int]]:
+    """
+    Every (i, j), i < j, of similar titles: the pairs of the pairwise double
+    loop, found by querying each title against those before it
+    """
+    index = NearDuplicateIndex(threshold, similarity, inclusive=inclusive)
+    pairs = []
+    for position, title in enumerate(titles):
+        tokens = tokenize(title)
+        if not tokens:
+            continue
+        band_keys = index._band_keys(tokens)
+        pairs.extend((earlier, position) for earlier in index.matches(tokens, band_keys))
+        index.add(position, tokens, band_keys)
+    return pairs
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Negative Result Cache
+Remembers papers (by DOI and normalized title) whose abstract or PDF could not be
+found, so re-runs skip the full source cascade until the entry expires
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+DAY = 24 * 60 * 60
+DEFAULT_BASE_TTL = DAY          # First miss is remembered for a day...
+DEFAULT_MAX_TTL = 90 * DAY      # ...doubling on every further miss, up to ~3 months
+
+# Kinds of lookups the cascades record
+ABSTRACT = 'abstract'
+PDF = 'pdf'
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'researchhelper')
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_title(title: str) -> str:
+    """Lower-case, strip punctuation and collapse whitespace"""
+    if not isinstance(title, str):
+        return ''
+    return ' '.join(re.sub(r'[^\w\s]', ' ', title.lower()).split())
+
+
+def normalize_doi(doi: str) -> str:
+    if not isinstance(doi, str):
+        return ''
+    doi = doi.strip().lower()
+    return re.sub(r'^(https?://(dx\.)?doi\.org/|doi:)', '', doi)
+
+
+class NegativeCache:
+    """SQLite-backed record of unresolvable papers with exponentially growing TTLs"""
+
+    def __init__(self, path: str, base_ttl: int = DEFAULT_BASE_TTL, max_ttl: int = DEFAULT_MAX_TTL,
+                 force_retry: bool = False):
+        self.path = path
+        self.base_ttl = base_ttl
+        self.max_ttl = max_ttl
+        self.force_retry = force_retry
+        self.lock = threading.Lock()
+        self.stats_counters = {'skipped': 0, 'misses_recorded': 0, 'cleared': 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS negative_results (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                misses INTEGER NOT NULL,
+                last_miss REAL NOT NULL,
+                retry_after REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )
+        ''')
+
+    @staticmethod
+    def keys_for(doi: str = '', title: str = '') -> List[str]:
+        keys = []
+        doi = normalize_doi(doi)
+        if doi:
+            keys.append(f"doi:{doi}")
+        title = normalize_title(title)
+        if title:
+            keys.append(f"title:{title}")
+        return keys
+
+    def should_skip(self, kind: str, doi: str = '', title: str = '', force_retry: bool = False) -> bool:
+        """True if the paper is known to be unresolvable for this kind and the entry has not expired"""
+        if force_retry or self.force_retry:
+            return False
+        keys = self.keys_for(doi, title)
+        if not keys:
+            return False
+        now = time.time()
+        placeholders = ','.join('?' * len(keys))
+        with self.lock:
+            row = self.conn.execute(
+                f'SELECT MAX(retry_after) FROM negative_results WHERE kind = ? AND key IN ({placeholders})',
+                [kind] + keys
+            ).fetchone()
+            skip = bool(row and row[0] and row[0] > now)
+            if skip:
+                self.stats_counters['skipped'] += 1
+        return skip
+
+    def record_miss(self, kind: str, doi: str = '', title: str = '') -> Optional[float]:
+        """Record a failed lookup; returns the TTL (seconds) of the new entry"""
+        keys = self.keys_for(doi, title)
+        if not keys:
+            return None
+        now = time.time()
+        placeholders = ','.join('?' * len(keys))
+        with self.lock:
+            row = self.conn.execute(
+                f'SELECT MAX(misses) FROM negative_results WHERE kind = ? AND key IN ({placeholders})',
+                [kind] + keys
+            ).fetchone()
+            misses = (row[0] or 0) + 1
+            ttl = min(self.max_ttl, self.base_ttl * (2 ** (misses - 1)))
+            for key in keys:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO negative_results (kind, key, misses, last_miss, retry_after) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (kind, key, misses, now, now + ttl)
+                )
+            self.stats_counters['misses_recorded'] += 1
+        return ttl
+
+    def clear(self, kind: str, doi: str = '', title: str = ''):
+        """Forget a paper after it was resolved successfully"""
+        keys = self.keys_for(doi, title)
+        if not keys:
+            return
+        placeholders = ','.join('?' * len(keys))
+        with self.lock:
+            deleted = self.conn.execute(
+                f'DELETE FROM negative_results WHERE kind = ? AND key IN ({placeholders})',
+                [kind] + keys
+            ).rowcount
+            if deleted:
+                self.stats_counters['cleared'] += 1
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT kind, COUNT(*) FROM negative_results WHERE retry_after > ? GROUP BY kind', (now,)
+            ).fetchall()
+            counters = dict(self.stats_counters)
+        counters['active_entries'] = {kind: count for kind, count in rows}
+        return counters
+
+
+_cache: Optional[NegativeCache] = None
+_cache_lock = threading.Lock()
+_cache_failed = False
+
+
+def get_negative_cache() -> Optional[NegativeCache]:
+    """
+    Process-wide negative cache, or None when disabled (RESEARCHHELPER_NEGATIVE_CACHE=0)
+    or unavailable. RESEARCHHELPER_FORCE_RETRY=1 keeps recording misses but never skips.
+    """
+    global _cache, _cache_failed
+    if _cache is not None or _cache_failed:
+        return _cache
+    if os.environ.get('RESEARCHHELPER_NEGATIVE_CACHE', '1') == '0':
+        _cache_failed = True
+        return None
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            cache_dir = os.environ.get('RESEARCHHELPER_CACHE_DIR', DEFAULT_CACHE_DIR)
+            try:
+                _cache = NegativeCache(
+                    os.path.join(cache_dir, 'negative_results.sqlite'),
+                    force_retry=os.environ.get('RESEARCHHELPER_FORCE_RETRY', '0') == '1'
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Negative result cache disabled: {e}")
+                _cache_failed = True
+    return _cache
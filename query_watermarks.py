@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Per-Query Watermarks
+Remembers when each saved keyword query last completed successfully, so re-runs
+only ask CrossRef (from-index-date) and arXiv (lastUpdatedDate) for works that
+are new or updated since then
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from negative_cache import DEFAULT_CACHE_DIR, normalize_title
+
+# Index dates are day-granular and indexing lags a little: re-ask for this much
+# before the watermark so nothing falls between two runs
+OVERLAP_SECONDS = 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def query_key(config: Dict) -> str:
+    """Normalized identity of a keyword configuration (max_results does not change the query)"""
+    return '|'.join([
+        normalize_title(config.get('primary_keyword', '')),
+        normalize_title(config.get('secondary_keyword', '')),
+        str(config.get('from_year', 2020)),
+        str(config.get('to_year', 2025))
+    ])
+
+
+def crossref_since(watermark: float) -> str:
+    """from-index-date value (YYYY-MM-DD) for a watermark, including the overlap"""
+    return datetime.fromtimestamp(watermark - OVERLAP_SECONDS, timezone.utc).strftime('%Y-%m-%d')
+
+
+def arxiv_since(watermark: float) -> str:
+    """lastUpdatedDate range (YYYYMMDDHHMM, UTC) from a watermark up to now"""
+    start = datetime.fromtimestamp(watermark - OVERLAP_SECONDS, timezone.utc).strftime('%Y%m%d%H%M')
+    end = datetime.now(timezone.utc).strftime('%Y%m%d%H%M')
+    return f"[{start} TO {end}]"
+
+
+class WatermarkStore:
+    """SQLite table of query key -> start time of its last successful run"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS query_watermarks (
+                query_key TEXT PRIMARY KEY,
+                watermark REAL NOT NULL,
+                runs INTEGER NOT NULL,
+                last_papers INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+
+    def get(self, key: str) -> Optional[float]:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT watermark FROM query_watermarks WHERE query_key = ?', (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, watermark: float, papers: int = 0):
+        """Advance a query's watermark after a successful run (started at `watermark`)"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO query_watermarks (query_key, watermark, runs, last_papers, updated_at) '
+                'VALUES (?, ?, 1, ?, ?) '
+                'ON CONFLICT(query_key) DO UPDATE SET watermark = excluded.watermark, runs = runs + 1, '
+                'last_papers = excluded.last_papers, updated_at = excluded.updated_at',
+                (key, watermark, papers, time.time())
+            )
+
+    def clear(self, key: Optional[str] = None):
+        """Forget one query's watermark (or all), forcing a full fetch next time"""
+        with self.lock:
+            if key is None:
+                self.conn.execute('DELETE FROM query_watermarks')
+            else:
+                self.conn.execute('DELETE FROM query_watermarks WHERE query_key = ?', (key,))
+
+    def entries(self) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT query_key, watermark, runs, last_papers FROM query_watermarks ORDER BY query_key'
+            ).fetchall()
+        return [{'query': key, 'watermark': datetime.fromtimestamp(mark).isoformat(), 'runs': runs,
+                 'last_papers': papers} for key, mark, runs, papers in rows]
+
+
+_store: Optional[WatermarkStore] = None
+_store_lock = threading.Lock()
+
+
+def get_watermarks() -> WatermarkStore:
+    """Process-wide watermark store in RESEARCHHELPER_CACHE_DIR"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            cache_dir = os.environ.get('RESEARCHHELPER_CACHE_DIR', DEFAULT_CACHE_DIR)
+            _store = WatermarkStore(os.path.join(cache_dir, 'query_watermarks.sqlite'))
+        return _store
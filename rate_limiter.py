@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Per-Host Rate Limiter
+Thread-safe token buckets, one per external host, shared by every pipeline component.
+An AIMD controller on top of each bucket adapts the host's concurrency and rate to
+429/503 feedback and honors Retry-After.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+# (requests per second, burst capacity) for each known source
+SOURCE_LIMITS: Dict[str, Tuple[float, int]] = {
+    'api.crossref.org': (5.0, 5),           # CrossRef public pool
+    'api.semanticscholar.org': (1.0, 1),    # Unauthenticated Semantic Scholar
+    'export.arxiv.org': (1.0 / 3.0, 1),     # arXiv API terms: one request every three seconds
+    'arxiv.org': (1.0, 2),
+    'api.unpaywall.org': (10.0, 5),
+    'doi.org': (5.0, 5),
+}
+DEFAULT_LIMIT: Tuple[float, int] = (2.0, 2)  # Publisher pages and anything else
+
+# Responses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get('RESEARCHHELPER_MAX_CONCURRENCY', '8'))
+BASE_BACKOFF = 1.0      # Pause after a throttle without Retry-After, doubling on repeats...
+MAX_BACKOFF = 300.0     # ...up to five minutes (Retry-After is capped there too)
+CANCEL_POLL = 0.1       # How often a waiting request with a cancel token checks it
+
+
+class RequestCancelled(requests.exceptions.RequestException):
+    """Raised instead of waiting for (or sending on) a host slot once the caller's cancel token is set"""
+
+
+class HostThrottled(requests.exceptions.RequestException):
+    """Raised instead of waiting out a host's backoff pause that is longer than the request's timeout"""
+
+
+_cancel_scope = threading.local()
+
+
+@contextmanager
+def cancel_token(token: threading.Event) -> Iterator[threading.Event]:
+    """Requests this thread makes inside the block give up their rate-limit wait once token is set"""
+    previous = getattr(_cancel_scope, 'token', None)
+    _cancel_scope.token = token
+    try:
+        yield token
+    finally:
+        _cancel_scope.token = previous
+
+
+def current_cancel_token() -> Optional[threading.Event]:
+    return getattr(_cancel_scope, 'token', None)
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations, so waiting happens outside the lock"""
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.total_acquired = 0
+        self.total_wait = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1.0
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.total_acquired += 1
+            self.total_wait += wait
+            return wait
+
+    def acquire(self, cancel: Optional[threading.Event] = None) -> float:
+        """Block until a token is available; returns the time spent waiting (the token is returned if cancel is set)"""
+        wait = self.reserve()
+        if wait > 0:
+            if cancel is None:
+                time.sleep(wait)
+            elif cancel.wait(wait):
+                self.refund()
+                raise RequestCancelled('Cancelled while waiting for a rate-limit token')
+        return wait
+
+    def refund(self):
+        """Give back a reserved token that was never used"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + 1.0)
+            self.total_acquired -= 1
+
+    def time_to_token(self) -> float:
+        """Seconds until a token would be available without waiting"""
+        with self.lock:
+            self._refill(time.monotonic())
+            return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def update(self, rate: float, capacity: int):
+        """Change rate and burst capacity in place"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            self.capacity = max(1, int(capacity))
+            self.tokens = min(self.tokens, self.capacity)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease control of one host.
+
+    Every successful response widens the in-flight window by 1/limit (about +1
+    per window of successes) and nudges the bucket's rate back up towards its
+    configured ceiling. A 429/503 halves both and pauses the host for
+    Retry-After seconds, or an exponential backoff when the header is missing,
+    either way at most MAX_BACKOFF.
+    """
+
+    def __init__(self, bucket: TokenBucket, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 increase: float = 1.0, decrease: float = 0.5):
+        self.bucket = bucket
+        self.max_rate = bucket.rate            # Configured rate is the ceiling
+        self.min_rate = bucket.rate / 64.0
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(min(bucket.capacity, self.max_concurrency))
+        self.increase = increase
+        self.decrease = decrease
+        self.in_flight = 0
+        self.backoff_until = 0.0
+        self.consecutive_throttles = 0
+        self.successes = 0
+        self.throttles = 0
+        self.last_retry_after: Optional[float] = None
+        self.cond = threading.Condition()
+
+    def acquire(self, cancel: Optional[threading.Event] = None) -> float:
+        """
+        Wait for a free slot, any backoff pause and a rate token; returns the time
+        spent waiting. Raises RequestCancelled (holding nothing) once cancel is set.
+        """
+        start = time.monotonic()
+        with self.cond:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise RequestCancelled('Cancelled while waiting for a host slot')
+                now = time.monotonic()
+                if now < self.backoff_until:
+                    self.cond.wait(self.backoff_until - now if cancel is None
+                                   else min(CANCEL_POLL, self.backoff_until - now))
+                elif self.in_flight >= max(1, int(self.limit)):
+                    self.cond.wait(None if cancel is None else CANCEL_POLL)
+                else:
+                    break
+            self.in_flight += 1
+        try:
+            self.bucket.acquire(cancel)
+        except RequestCancelled:
+            with self.cond:
+                self.in_flight = max(0, self.in_flight - 1)
+                self.cond.notify_all()
+            raise
+        return time.monotonic() - start
+
+    def pause_remaining(self) -> float:
+        """Seconds left of the current backoff pause"""
+        with self.cond:
+            return max(0.0, self.backoff_until - time.monotonic())
+
+    def ready_in(self) -> float:
+        """Seconds until a request could start without waiting (0 = now; a full window is re-checked after CANCEL_POLL)"""
+        with self.cond:
+            backoff = max(0.0, self.backoff_until - time.monotonic())
+            window_full = self.in_flight >= max(1, int(self.limit))
+        return max(backoff, self.bucket.time_to_token(), CANCEL_POLL if window_full else 0.0)
+
+    def release(self, status: Optional[int] = None, retry_after: Optional[float] = None):
+        """Return the slot and feed the response status back (None for transport errors)"""
+        with self.cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if status in THROTTLE_STATUSES:
+                self._on_throttle(retry_after)
+            elif status is not None and status < 500:
+                self._on_success()
+            self.cond.notify_all()
+
+    def _on_success(self):
+        self.successes += 1
+        self.consecutive_throttles = 0
+        self.limit = min(float(self.max_concurrency), self.limit + self.increase / max(1.0, self.limit))
+        if self.bucket.rate < self.max_rate:
+            self.bucket.update(min(self.max_rate, self.bucket.rate + self.max_rate / 20.0), self.bucket.capacity)
+
+    def _on_throttle(self, retry_after: Optional[float]):
+        now = time.monotonic()
+        self.throttles += 1
+        self.last_retry_after = retry_after
+        # Responses to requests sent before the current pause began carry no new information
+        if now >= self.backoff_until:
+            self.consecutive_throttles += 1
+            self.limit = max(1.0, self.limit * self.decrease)
+            self.bucket.update(max(self.min_rate, self.bucket.rate * self.decrease), self.bucket.capacity)
+        delay = min(MAX_BACKOFF, retry_after if retry_after is not None
+                    else BASE_BACKOFF * (2 ** (self.consecutive_throttles - 1)))
+        self.backoff_until = max(self.backoff_until, now + delay)
+
+    def set_ceiling(self, rate: float, capacity: int):
+        """Apply a newly configured limit"""
+        with self.cond:
+            self.max_rate = float(rate)
+            self.min_rate = self.max_rate / 64.0
+            self.bucket.update(rate, capacity)
+            self.cond.notify_all()
+
+    def state(self) -> Dict:
+        with self.cond:
+            return {
+                'concurrency_limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'rate': round(self.bucket.rate, 3),
+                'max_rate': self.max_rate,
+                'backoff_seconds_remaining': round(max(0.0, self.backoff_until - time.monotonic()), 2),
+                'consecutive_throttles': self.consecutive_throttles,
+                'throttles': self.throttles,
+                'successes': self.successes,
+                'last_retry_after': self.last_retry_after
+            }
+
+
+class HostRateLimiter:
+    """Registry of token buckets and their AIMD controllers keyed by host"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default: Tuple[float, int] = DEFAULT_LIMIT,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.limits = dict(SOURCE_LIMITS if limits is None else limits)
+        self.default = default
+        self.max_concurrency = max_concurrency
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.controllers: Dict[str, AIMDController] = {}
+        self.lock = threading.Lock()
+
+    def _limit_for(self, host: str) -> Tuple[float, int]:
+        """Exact host match first, then the closest configured parent domain"""
+        parts = host.split('.')
+        for i in range(len(parts) - 1):
+            candidate = '.'.join(parts[i:])
+            if candidate in self.limits:
+                return self.limits[candidate]
+        return self.default
+
+    def controller_for(self, url_or_host: str) -> AIMDController:
+        host = _host_of(url_or_host)
+        with self.lock:
+            controller = self.controllers.get(host)
+            if controller is None:
+                rate, burst = self._limit_for(host)
+                bucket = TokenBucket(rate, burst)
+                controller = AIMDController(bucket, self.max_concurrency)
+                self.buckets[host] = bucket
+                self.controllers[host] = controller
+            return controller
+
+    def bucket_for(self, url_or_host: str) -> TokenBucket:
+        return self.controller_for(url_or_host).bucket
+
+    def acquire(self, url_or_host: str, cancel: Optional[threading.Event] = None) -> float:
+        """
+        Wait for the host's next slot; returns the time spent waiting.
+        Every acquire must be paired with a release once the response (or error) is in,
+        except one that raised RequestCancelled because cancel was set.
+        """
+        return self.controller_for(url_or_host).acquire(cancel)
+
+    def ready_in(self, url_or_host: str) -> float:
+        """Seconds until the host could take a request without waiting (0 = now)"""
+        return self.controller_for(url_or_host).ready_in()
+
+    def pause_remaining(self, url_or_host: str) -> float:
+        """Seconds left of the host's backoff pause (0 when it is not backing off)"""
+        return self.controller_for(url_or_host).pause_remaining()
+
+    def release(self, url_or_host: str, status: Optional[int] = None, retry_after: Optional[str] = None):
+        """Report a request's outcome: HTTP status and raw Retry-After header, or None on errors"""
+        self.controller_for(url_or_host).release(status, parse_retry_after(retry_after))
+
+    def configure(self, host: str, rate: float, burst: int = 1):
+        """Set the limit for a host (and any of its subdomains without their own entry)"""
+        host = host.lower()
+        with self.lock:
+            self.limits[host] = (rate, burst)
+            for controller_host, controller in self.controllers.items():
+                if controller_host == host or controller_host.endswith('.' + host):
+                    controller.set_ceiling(*self._limit_for(controller_host))
+
+    def stats(self) -> Dict[str, Dict]:
+        """Current per-host rate, tokens, cumulative waiting and AIMD/backoff state"""
+        with self.lock:
+            controllers = dict(self.controllers)
+        stats = {}
+        for host, controller in controllers.items():
+            bucket = controller.bucket
+            stats[host] = {
+                'burst': bucket.capacity,
+                'tokens': round(bucket.tokens, 2),
+                'requests': bucket.total_acquired,
+                'total_wait_seconds': round(bucket.total_wait, 2),
+                **controller.state()
+            }
+        return stats
+
+
+def _host_of(url_or_host: str) -> str:
+    if '://' in url_or_host:
+        return (urlparse(url_or_host).hostname or '').lower()
+    return url_or_host.lower()
+
+
+def _parse_env_limits(value: str) -> Dict[str, Tuple[float, int]]:
+    """Parse RESEARCHHELPER_RATE_LIMITS, e.g. 'api.crossref.org=10:10,doi.org=2'"""
+    limits = {}
+    for entry in value.split(','):
+        if '=' not in entry:
+            continue
+        host, spec = entry.split('=', 1)
+        rate, _, burst = spec.partition(':')
+        limits[host.strip().lower()] = (float(rate), int(burst) if burst else 1)
+    return limits
+
+
+_limiter = HostRateLimiter({**SOURCE_LIMITS, **_parse_env_limits(os.environ.get('RESEARCHHELPER_RATE_LIMITS', ''))})
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Process-wide limiter shared across threads and Flask requests"""
+    return _limiter
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Persistent Response Cache
+SQLite-backed cache for CrossRef, Semantic Scholar and arXiv API responses with
+per-source TTLs, ETag/Last-Modified revalidation and LRU size capping
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DAY = 24 * 60 * 60
+
+# Time-to-live in seconds for each cached source; hosts not listed are never cached
+SOURCE_TTLS: Dict[str, int] = {
+    'api.crossref.org': 7 * DAY,
+    'api.semanticscholar.org': 7 * DAY,
+    'export.arxiv.org': 7 * DAY,
+}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'researchhelper')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEntry:
+    """A stored response plus its freshness metadata"""
+
+    def __init__(self, key: str, status: int, headers: Dict[str, str], body: bytes,
+                 url: str, expires_at: float):
+        self.key = key
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating a stale entry"""
+        headers = {}
+        etag = self.headers.get('ETag') or self.headers.get('etag')
+        last_modified = self.headers.get('Last-Modified') or self.headers.get('last-modified')
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+
+class ResponseCache:
+    """Thread-safe SQLite store of GET responses keyed on the normalized request"""
+
+    def __init__(self, path: str, ttls: Optional[Dict[str, int]] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttls = dict(SOURCE_TTLS if ttls is None else ttls)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats_counters = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stale_served': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)')
+        self.total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    # ---- keys and policy ----
+
+    def ttl_for(self, url: str) -> int:
+        """TTL for the URL's host (0 means the source is not cached)"""
+        host = (urlsplit(url).hostname or '').lower()
+        return self.ttls.get(host, 0)
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Lower-case scheme/host and sort query parameters so equivalent requests share a key"""
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
+
+    @classmethod
+    def make_key(cls, method: str, url: str) -> str:
+        return hashlib.sha256(f"{method.upper()} {cls.normalize_url(url)}".encode('utf-8')).hexdigest()
+
+    def is_cacheable(self, request: requests.PreparedRequest) -> bool:
+        return request.method in ('GET', 'HEAD') and self.ttl_for(request.url) > 0
+
+    # ---- storage ----
+
+    def lookup(self, request: requests.PreparedRequest) -> Optional[CachedEntry]:
+        """Return the stored entry for a request (fresh or stale), or None on a miss"""
+        key = self.make_key(request.method, request.url)
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT status, headers, body, url, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        status, headers, body, url, expires_at = row
+        return CachedEntry(key, status, json.loads(headers), body, url, expires_at)
+
+    def accepts(self, request: requests.PreparedRequest, response: requests.Response) -> bool:
+        """Whether a response may be stored: a 200 from a cached source without Cache-Control: no-store"""
+        if response.status_code != 200 or not self.is_cacheable(request):
+            return False
+        return 'no-store' not in response.headers.get('Cache-Control', '').lower()
+
+    def store(self, request: requests.PreparedRequest, response: requests.Response,
+              body: Optional[bytes] = None) -> bool:
+        """Store a successful response (body defaults to response.content); returns False if it is not cacheable"""
+        if not self.accepts(request, response):
+            return False
+
+        if body is None:
+            body = response.content
+        key = self.make_key(request.method, request.url)
+        now = time.time()
+        headers = json.dumps(dict(response.headers))
+        with self.lock:
+            old = self.conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(key, url, status, headers, body, size, stored_at, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, request.url, response.status_code, headers, body, len(body),
+                 now, now + self.ttl_for(request.url), now)
+            )
+            self.total_bytes += len(body) - (old[0] if old else 0)
+            self.stats_counters['stores'] += 1
+            self._evict_locked()
+        return True
+
+    def refresh(self, entry: CachedEntry, request: requests.PreparedRequest):
+        """Extend a stale entry's lifetime after a 304 Not Modified"""
+        now = time.time()
+        entry.expires_at = now + self.ttl_for(request.url)
+        with self.lock:
+            self.conn.execute(
+                'UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?',
+                (entry.expires_at, now, entry.key)
+            )
+
+    def record(self, outcome: str):
+        """Count a lookup outcome: 'hits', 'misses', 'revalidated' or 'stale_served'"""
+        with self.lock:
+            self.stats_counters[outcome] += 1
+
+    def _evict_locked(self):
+        """Drop least-recently-used rows until the cache is under its size cap"""
+        while self.total_bytes > self.max_bytes:
+            rows = self.conn.execute(
+                'SELECT key, size FROM responses ORDER BY accessed_at ASC LIMIT 50'
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                break
+            for key, size in rows:
+                self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.total_bytes -= size
+                self.stats_counters['evictions'] += 1
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM responses')
+            self.total_bytes = 0
+
+    def stats(self) -> Dict:
+        with self.lock:
+            entries = self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            counters = dict(self.stats_counters)
+        lookups = counters['hits'] + counters['misses'] + counters['revalidated']
+        counters.update({
+            'entries': entries,
+            'size_bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hit_rate': round((counters['hits'] + counters['revalidated']) / lookups, 3) if lookups else 0.0
+        })
+        return counters
+
+    # ---- response helpers ----
+
+    @staticmethod
+    def build_response(entry: CachedEntry, request: requests.PreparedRequest, adapter=None) -> requests.Response:
+        """Rebuild a requests.Response from a stored entry"""
+        response = requests.Response()
+        response.status_code = entry.status
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response._content = entry.body
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.reason = 'OK'
+        response.request = request
+        response.connection = adapter
+        response.from_cache = True
+        return response
+
+
+def _parse_env_ttls(value: str) -> Dict[str, int]:
+    """Parse RESEARCHHELPER_CACHE_TTLS, e.g. 'api.crossref.org=86400,export.arxiv.org=0'"""
+    ttls = {}
+    for entry in value.split(','):
+        if '=' in entry:
+            host, seconds = entry.split('=', 1)
+            ttls[host.strip().lower()] = int(seconds)
+    return ttls
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+_cache_failed = False
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache, or None when disabled (RESEARCHHELPER_CACHE=0) or unavailable"""
+    global _cache, _cache_failed
+    if _cache is not None or _cache_failed:
+        return _cache
+    if os.environ.get('RESEARCHHELPER_CACHE', '1') == '0':
+        _cache_failed = True
+        return None
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            cache_dir = os.environ.get('RESEARCHHELPER_CACHE_DIR', DEFAULT_CACHE_DIR)
+            max_mb = int(os.environ.get('RESEARCHHELPER_CACHE_MAX_MB', str(DEFAULT_MAX_BYTES // (1024 * 1024))))
+            try:
+                _cache = ResponseCache(
+                    os.path.join(cache_dir, 'responses.sqlite'),
+                    ttls={**SOURCE_TTLS, **_parse_env_ttls(os.environ.get('RESEARCHHELPER_CACHE_TTLS', ''))},
+                    max_bytes=max_mb * 1024 * 1024
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Response cache disabled: {e}")
+                _cache_failed = True
+    return _cache
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Query-Result Cache
+Keeps the finished paper lists of /api/fetch and /api/fetch-multi-keyword in
+memory, keyed by the normalized request parameters, so re-submitting the same
+search (page reloads, tweaks to later steps) skips the CrossRef pagination.
+A cached fetch also answers any smaller total_results with a prefix slice.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_TTL = int(os.environ.get('RESEARCHHELPER_RESULT_CACHE_TTL', '3600'))
+DEFAULT_MAX_ENTRIES = int(os.environ.get('RESEARCHHELPER_RESULT_CACHE_ENTRIES', '256'))
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Case- and whitespace-insensitive form (punctuation is kept: the title filter matches it)"""
+    return ' '.join((keyword or '').lower().split())
+
+
+def fetch_key(keyword: str, additional_keyword: str, from_year: int, to_year: int,
+              paper_type_filter: bool, title_filter: bool, *extra) -> Tuple:
+    """Cache key for a single-query fetch; total_results is deliberately not part of it"""
+    return ('fetch', normalize_keyword(keyword), normalize_keyword(additional_keyword), int(from_year),
+            int(to_year), bool(paper_type_filter), bool(title_filter)) + tuple(extra)
+
+
+def multi_keyword_key(keyword_configs: List[Dict]) -> Tuple:
+    """Cache key for a list of keyword configurations (order matters for deduplication)"""
+    return ('multi',) + tuple(
+        (normalize_keyword(config.get('primary_keyword', '')), normalize_keyword(config.get('secondary_keyword', '')),
+         int(config.get('from_year', 2020)), int(config.get('to_year', 2025)), int(config.get('max_results', 50)),
+         int(config.get('shard_months', 0)), config.get('ranking', ''),
+         None if config.get('since') is None else float(config['since']),
+         bool(config.get('paper_type_filter', True)))
+        for config in keyword_configs
+    )
+
+
+class _Entry:
+    def __init__(self, results: List[Dict], exhausted: bool, meta: Dict, expires_at: float):
+        self.results = results
+        self.exhausted = exhausted
+        self.meta = meta
+        self.expires_at = expires_at
+
+
+class QueryResultCache:
+    """Thread-safe LRU of result lists with a TTL; max_entries or ttl of 0 disables it"""
+
+    def __init__(self, ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'prefix_hits': 0, 'misses': 0, 'too_short': 0, 'expired': 0,
+                         'stores': 0, 'evictions': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def lookup(self, key: Hashable, count: Optional[int] = None) -> Optional[Tuple[List[Dict], Dict]]:
+        """
+        (results, meta) for key, or None. With count, the first count results are
+        returned; an entry holding fewer only answers if its query was exhausted.
+        """
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            if time.time() >= entry.expires_at:
+                del self.entries[key]
+                self.counters['expired'] += 1
+                return None
+            if count is not None and len(entry.results) < count and not entry.exhausted:
+                self.counters['too_short'] += 1
+                return None
+            self.entries.move_to_end(key)
+            results = entry.results if count is None else entry.results[:count]
+            self.counters['prefix_hits' if count is not None and count < len(entry.results) else 'hits'] += 1
+            meta = dict(entry.meta)
+        # Callers get their own dicts so a cached list is never mutated
+        return [dict(result) for result in results], meta
+
+    def store(self, key: Hashable, results: List[Dict], requested: Optional[int] = None,
+              meta: Optional[Dict] = None, exhausted: Optional[bool] = None):
+        """
+        Cache results; requested is the count that was asked for. An exhausted
+        entry (the source ran out) also answers larger requests; by default a
+        list shorter than requested counts as exhausted
+        """
+        if not self.enabled:
+            return
+        if exhausted is None:
+            exhausted = requested is None or len(results) < requested
+        entry = _Entry([dict(result) for result in results], exhausted,
+                       dict(meta or {}), time.time() + self.ttl)
+        with self.lock:
+            existing = self.entries.get(key)
+            # A concurrent smaller fetch must not replace a longer fresh list
+            if existing is not None and time.time() < existing.expires_at \
+                    and len(existing.results) > len(results) and not entry.exhausted:
+                self.entries.move_to_end(key)
+                return
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self.counters['stores'] += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {'enabled': self.enabled, 'entries': len(self.entries), 'max_entries': self.max_entries,
+                    'ttl_seconds': self.ttl, **self.counters}
+
+
+_cache: Optional[QueryResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> QueryResultCache:
+    """Process-wide query-result cache (RESEARCHHELPER_RESULT_CACHE_TTL / _ENTRIES)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryResultCache()
+        return _cache
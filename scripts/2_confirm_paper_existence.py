@@ -4,6 +4,17 @@ import time
 import json
 from datetime import datetime
 import urllib.parse
+import os
+import sys
+
+# Shared modules live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+from crossref_stream import iter_response_works
+
+# Only these fields are decoded from each item; reference lists etc. are skipped
+CHECK_FIELDS = ['title', 'author', 'published-print', 'published-online', 'container-title',
+                'DOI', 'publisher', 'type', 'score']
 
 def confirm_paper_existence(title):
     """
@@ -17,17 +28,20 @@ def confirm_paper_existence(title):
         print(f"Checking: {title}")
         print(f"API URL: {url}")
 
-        response = requests.get(url, timeout=10)
+        session = http_client.get_session({'User-Agent': http_client.API_USER_AGENT})
+        response = session.get(url, timeout=10, stream=True)
         response.raise_for_status()
 
-        data = response.json()
-
-        if data['status'] == 'ok' and data['message']['total-results'] > 0:
-            items = data['message']['items']
-
+        # Items are decoded one at a time as the page streams in
+        meta = {}
+        items = iter_response_works(response, CHECK_FIELDS, meta)
+        top_title = None
+        try:
             # Check for exact or close matches
             for item in items:
                 api_title = item.get('title', [''])[0] if item.get('title') else ''
+                if top_title is None:
+                    top_title = api_title
 
                 # Simple similarity check (can be improved)
                 if title.lower() in api_title.lower() or api_title.lower() in title.lower():
@@ -56,15 +70,18 @@ def confirm_paper_existence(title):
                     print("-" * 80)
 
                     return result
+        finally:
+            items.close()
 
+        if meta.get('status') == 'ok' and top_title is not None:
             # If no close match found
             print(f"❌ NOT FOUND: No close match for '{title}'")
-            print(f"   Top result: {items[0].get('title', [''])[0] if items[0].get('title') else 'No title'}")
+            print(f"   Top result: {top_title or 'No title'}")
             print("-" * 80)
 
             return {
                 'found': False,
-                'api_title': items[0].get('title', [''])[0] if items else '',
+                'api_title': top_title,
                 'reason': 'No close match found'
             }
         else:
@@ -124,9 +141,6 @@ def main():
 
             results.append(result)
 
-            # Rate limiting - be nice to the API
-            time.sleep(1)
-
         # Create results DataFrame
         results_df = pd.DataFrame(results)
 
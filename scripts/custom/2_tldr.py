@@ -4,6 +4,12 @@ import time
 import json
 from datetime import datetime
 import urllib.parse
+import os
+import sys
+
+# Shared modules live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import http_client
 
 def get_paper_tldr_from_semantic_scholar(title):
     """
@@ -21,7 +27,8 @@ def get_paper_tldr_from_semantic_scholar(title):
         print(f"Searching: {title}")
         print(f"API URL: {search_url}")
         
-        response = requests.get(search_url, params=params, timeout=15)
+        session = http_client.get_session({'User-Agent': http_client.API_USER_AGENT})
+        response = session.get(search_url, params=params, timeout=15)
         response.raise_for_status()
         
         data = response.json()
@@ -168,9 +175,6 @@ def main():
             result['original_keywords'] = row['keywords']
             
             results.append(result)
-            
-            # Rate limiting - be respectful to the API
-            time.sleep(2)  # 2 seconds between requests
         
         # Create results DataFrame
         results_df = pd.DataFrame(results)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Semantic Scholar Batch Lookup
+Resolves papers that already carry a DOI or arXiv ID through the
+/graph/v1/paper/batch endpoint, a few hundred IDs per request, instead of one
+title search per paper
+"""
+
+import os
+from typing import Callable, Dict, Iterable, List, Optional
+
+import http_client
+from arxiv_client import extract_arxiv_id
+from negative_cache import normalize_doi
+
+S2_BATCH_URL = 'https://api.semanticscholar.org/graph/v1/paper/batch'
+MAX_BATCH_SIZE = 500  # Hard limit of the batch endpoint
+DEFAULT_BATCH_SIZE = min(MAX_BATCH_SIZE, int(os.environ.get('RESEARCHHELPER_S2_BATCH_SIZE', '500')))
+DEFAULT_FIELDS = 'title,abstract,externalIds'
+
+
+def paper_identifier(doi: str = '', url: str = '', title: str = '') -> Optional[str]:
+    """Batch endpoint ID for a paper ('ARXIV:...' or 'DOI:...'), or None if it has neither"""
+    # arXiv DOIs (10.48550/arXiv.*) resolve more reliably by arXiv ID
+    arxiv_id = extract_arxiv_id(doi, url, title)
+    if arxiv_id:
+        return f"ARXIV:{arxiv_id}"
+    doi = normalize_doi(doi)
+    if doi:
+        return f"DOI:{doi}"
+    return None
+
+
+class SemanticScholarBatch:
+    """Chunked POST lookups against the Semantic Scholar paper batch endpoint"""
+
+    def __init__(self, session=None, batch_size: int = DEFAULT_BATCH_SIZE, fields: str = DEFAULT_FIELDS,
+                 timeout: int = 60, log: Optional[Callable[[str], None]] = None):
+        self.session = session or http_client.get_session({'User-Agent': http_client.API_USER_AGENT})
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.fields = fields
+        self.timeout = timeout
+        self.log = log or (lambda msg: None)
+        self.requests_made = 0
+        self.failed_ids: List[str] = []
+
+    def fetch_batch(self, ids: List[str]) -> List[Optional[Dict]]:
+        """One batch request; the result list is aligned with ids (None for unknown papers)"""
+        response = self.session.post(S2_BATCH_URL, params={'fields': self.fields},
+                                     json={'ids': ids}, timeout=self.timeout)
+        self.requests_made += 1
+        if response.status_code != 200:
+            raise RuntimeError(f"Semantic Scholar batch returned status {response.status_code}")
+        return response.json()
+
+    def lookup(self, ids: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Map every ID to its Semantic Scholar record (None when the paper is unknown).
+        IDs from batches that failed are left out and collected in failed_ids, so
+        callers can fall back to title search for them.
+        """
+        unique_ids = list(dict.fromkeys(i for i in ids if i))
+        results: Dict[str, Optional[Dict]] = {}
+        for start in range(0, len(unique_ids), self.batch_size):
+            chunk = unique_ids[start:start + self.batch_size]
+            self.log(f"[DEBUG] Semantic Scholar batch lookup: {len(chunk)} IDs")
+            try:
+                records = self.fetch_batch(chunk)
+            except Exception as e:
+                self.log(f"[ERROR] Semantic Scholar batch error: {e}")
+                self.failed_ids.extend(chunk)
+                continue
+            for paper_id, record in zip(chunk, records):
+                results[paper_id] = record
+        return results
+
+    def lookup_abstracts(self, ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Abstract lookup results in the same shape as search_semantic_scholar, keyed by ID.
+        Papers Semantic Scholar knows but has no abstract for come back with found=False,
+        so callers can skip the (equally empty) title search and go to the next source.
+        """
+        results = {}
+        for paper_id, record in self.lookup(ids).items():
+            if record is None:
+                continue
+            abstract = (record.get('abstract') or '').strip()
+            results[paper_id] = {
+                'found': bool(abstract),
+                'abstract': abstract,
+                'paper_data': record,
+                'source': 'Semantic Scholar'
+            }
+        return results
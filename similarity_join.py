@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Exact Set-Similarity Join
+All pairs of token sets with Jaccard >= threshold, in the style of
+All-Pairs/PPJoin: tokens are renumbered by global frequency (rarest first),
+records are visited in size order and only a short prefix of each is indexed.
+Candidates must survive length, prefix and position filters, and every
+survivor is verified exactly, so the result equals the pairwise double loop.
+"""
+
+import math
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, List, Sequence, Set, Tuple
+
+# Guards the ceil() bounds against float error: bounds only ever get looser
+_EPSILON = 1e-9
+
+
+def _ceil(value: float) -> int:
+    return math.ceil(value - _EPSILON)
+
+
+def order_tokens(records: Sequence[FrozenSet[str]]) -> List[List[int]]:
+    """Each record as a sorted list of token IDs, IDs assigned in ascending document frequency"""
+    frequency = Counter(token for record in records for token in record)
+    ranking = sorted(frequency, key=lambda token: (frequency[token], token))
+    token_ids = {token: rank for rank, token in enumerate(ranking)}
+    return [sorted(token_ids[token] for token in record) for record in records]
+
+
+def similarity_join(records: Sequence[FrozenSet[str]], threshold: float) -> Tuple[List[Tuple[int, int]], Dict]:
+    """
+    (pairs, stats): every (i, j), i < j, whose Jaccard similarity is >= threshold
+    (empty sets match nothing), plus counts of how many candidates each filter pruned
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError('threshold must be in (0, 1]')
+
+    ordered = order_tokens(records)
+    visit = sorted((position for position, tokens in enumerate(ordered) if tokens),
+                   key=lambda position: len(ordered[position]))
+    coefficient = threshold / (1 + threshold)
+
+    index: Dict[int, List[Tuple[int, int]]] = defaultdict(list)  # token -> [(record, position in record)]
+    start: Dict[int, int] = defaultdict(int)  # first posting whose record is still long enough
+    stats = {'records': len(records), 'possible_pairs': len(records) * (len(records) - 1) // 2,
+             'postings_scanned': 0, 'pruned_by_length': 0, 'pruned_by_position': 0,
+             'candidates': 0, 'verified': 0, 'pairs': 0}
+    pairs = []
+
+    for x in visit:
+        tokens = ordered[x]
+        size = len(tokens)
+        min_size = _ceil(threshold * size)
+        probe_prefix = size - min_size + 1
+        overlaps: Dict[int, int] = {}
+        pruned: Set[int] = set()
+
+        for i in range(probe_prefix):
+            postings = index.get(tokens[i])
+            if not postings:
+                continue
+            # Records are visited by size, so postings too short for this one stay too short
+            first = start[tokens[i]]
+            while first < len(postings) and len(ordered[postings[first][0]]) < min_size:
+                first += 1
+                stats['pruned_by_length'] += 1
+            start[tokens[i]] = first
+
+            for y, j in postings[first:]:
+                stats['postings_scanned'] += 1
+                if y in pruned:
+                    continue
+                other_size = len(ordered[y])
+                alpha = _ceil(coefficient * (size + other_size))
+                bound = 1 + min(size - i - 1, other_size - j - 1)
+                if overlaps.get(y, 0) + bound >= alpha:
+                    overlaps[y] = overlaps.get(y, 0) + 1
+                else:
+                    overlaps.pop(y, None)
+                    pruned.add(y)
+                    stats['pruned_by_position'] += 1
+
+        # Records visited later are at least as long: a shorter index prefix suffices
+        index_prefix = size - _ceil(2 * coefficient * size) + 1
+        for i in range(index_prefix):
+            index[tokens[i]].append((x, i))
+
+        stats['candidates'] += len(overlaps)
+        for y in overlaps:
+            stats['verified'] += 1
+            first_set, second_set = records[x], records[y]
+            intersection = len(first_set & second_set)
+            if intersection / (len(first_set) + len(second_set) - intersection) >= threshold:
+                pairs.append((min(x, y), max(x, y)))
+
+    pairs.sort()
+    stats['pairs'] = len(pairs)
+    return pairs, stats
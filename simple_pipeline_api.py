@@ -16,9 +16,24 @@ import requests
 import time
 import re
 import urllib.parse
-import xml.etree.ElementTree as ET
 import json
 from category_keyword_extractor import CategoryKeywordExtractor
+import http_client
+from response_cache import get_response_cache
+from rate_limiter import get_rate_limiter
+from circuit_breaker import OPEN, get_breakers
+import hedged_lookup
+from single_flight import get_single_flight, single_flight
+import negative_cache
+from negative_cache import get_negative_cache
+from result_cache import fetch_key, get_result_cache
+from corpus_index import get_corpus_index
+from near_duplicates import NearDuplicateIndex, overlap_max
+from title_normalization import title_similarity, title_tokens
+from crossref_fetcher import (DEFAULT_SHARD_MONTHS, MAX_TOTAL_RESULTS, RANK_RELEVANCE, CrossRefFetcher,
+                              build_works_params, date_shards)
+from semantic_scholar_batch import SemanticScholarBatch, paper_identifier
+from arxiv_client import ArxivClient, extract_arxiv_id, pdf_url_for
 import subprocess
 from flask import stream_with_context
 import queue
@@ -54,30 +69,52 @@ def stream_logs():
     })
 
 def get_session():
-    """Create a session with proper headers"""
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    """Return the shared connection-pooled session with browser headers"""
+    return http_client.get_session({'User-Agent': http_client.BROWSER_USER_AGENT})
+
+@app.route('/api/health')
+def health():
+    """Per-source circuit breaker state plus rate-limit metrics (cache metrics: /api/cache-stats)"""
+    breakers = get_breakers().stats()
+    return jsonify({
+        'status': 'degraded' if any(b['state'] == OPEN for b in breakers.values()) else 'healthy',
+        'circuit_breakers': breakers,
+        'rate_limits': get_rate_limiter().stats(),
+        'offline': http_client.offline_mode()
     })
-    return session
+
+@app.route('/api/rate-limits')
+def rate_limits():
+    """Per-host AIMD concurrency/rate limits and backoff state"""
+    return jsonify(get_rate_limiter().stats())
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Hit/miss counters and size of the response, negative-result and query-result caches, plus coalesced lookups"""
+    cache = get_response_cache()
+    negative = get_negative_cache()
+    stats = {'enabled': True, **cache.stats()} if cache is not None else {'enabled': False}
+    stats['negative_results'] = negative.stats() if negative is not None else {'enabled': False}
+    stats['single_flight'] = get_single_flight().stats()
+    stats['query_results'] = get_result_cache().stats()
+    corpus = get_corpus_index()
+    stats['corpus_index'] = corpus.stats() if corpus is not None else {'enabled': False}
+    return jsonify(stats)
 
 def calculate_similarity(title1, title2):
     """Calculate similarity between titles"""
-    if not title1 or not title2:
-        return 0.0
-
-    # Simple word-based similarity
-    words1 = set(title1.lower().split())
-    words2 = set(title2.lower().split())
-
-    if not words1 or not words2:
-        return 0.0
+    return title_similarity(title1, title2)
 
-    intersection = len(words1.intersection(words2))
-    union = len(words1.union(words2))
+# Titles more similar than this are treated as the same paper during deduplication
+TITLE_DUPLICATE_THRESHOLD = 0.8
 
-    return intersection / union if union > 0 else 0.0
+def unique_by_title(papers, threshold=TITLE_DUPLICATE_THRESHOLD):
+    """Papers whose title is not a near-duplicate (calculate_similarity > threshold) of an earlier kept one"""
+    titles = NearDuplicateIndex(threshold)
+    return [paper for position, paper in enumerate(papers)
+            if titles.add_unique(position, title_tokens(paper.get('title', ''))) is None]
 
+@single_flight('semantic_scholar', lambda title: negative_cache.normalize_title(title) or None)
 def search_semantic_scholar(title):
     """Search Semantic Scholar for abstract"""
     try:
@@ -105,47 +142,53 @@ def search_semantic_scholar(title):
                             'abstract': paper['abstract'],
                             'source': 'Semantic Scholar'
                         }
-
-        time.sleep(1)  # Rate limiting
+        elif response.status_code != 404:
+            # Throttled or unavailable: not an answer, so not a miss either
+            return {'found': False, 'abstract': '', 'source': 'Semantic Scholar',
+                    'error': f"HTTP {response.status_code}"}
 
     except Exception as e:
         print(f"Semantic Scholar error: {e}")
+        return {'found': False, 'abstract': '', 'source': 'Semantic Scholar', 'error': str(e)}
 
     return {'found': False, 'abstract': '', 'source': 'Semantic Scholar'}
 
+@single_flight('arxiv', lambda title: negative_cache.normalize_title(title) or None)
 def search_arxiv(title):
     """Search arXiv for abstract"""
     try:
-        session = get_session()
         clean_title = re.sub(r'[^\w\s]', ' ', title).strip()
-        search_query = urllib.parse.quote(clean_title)
-
-        url = f"http://export.arxiv.org/api/query?search_query=ti:{search_query}&max_results=5"
-
-        response = session.get(url, timeout=30)
-        if response.status_code == 200:
-            root = ET.fromstring(response.content)
-
-            for entry in root.findall('{http://www.w3.org/2005/Atom}entry'):
-                entry_title = entry.find('{http://www.w3.org/2005/Atom}title')
-                summary = entry.find('{http://www.w3.org/2005/Atom}summary')
 
-                if entry_title is not None and summary is not None:
-                    similarity = calculate_similarity(title, entry_title.text.strip())
-                    if similarity > 0.6:
-                        return {
-                            'found': True,
-                            'abstract': summary.text.strip(),
-                            'source': 'arXiv'
-                        }
-
-        time.sleep(1)  # Rate limiting
+        # Entries are parsed as the feed streams in; stop at the first good match
+        for entry in ArxivClient(session=get_session()).search(f"ti:{clean_title}", max_results=5):
+            if entry['abstract'] and calculate_similarity(title, entry['title']) > 0.6:
+                return {
+                    'found': True,
+                    'abstract': entry['abstract'],
+                    'source': 'arXiv'
+                }
 
     except Exception as e:
         print(f"arXiv error: {e}")
+        return {'found': False, 'abstract': '', 'source': 'arXiv', 'error': str(e)}
 
     return {'found': False, 'abstract': '', 'source': 'arXiv'}
 
+def known_missing(kind, paper, force_retry=False):
+    """True if a previous run already failed to resolve this paper (negative cache)"""
+    cache = get_negative_cache()
+    return cache is not None and cache.should_skip(kind, paper.get('doi', ''), paper.get('title', ''), force_retry)
+
+def record_lookup_outcome(kind, paper, found, errored=False):
+    """Clear the negative cache on success; record a miss only if no source errored"""
+    cache = get_negative_cache()
+    if cache is None:
+        return
+    if found:
+        cache.clear(kind, paper.get('doi', ''), paper.get('title', ''))
+    elif not errored:
+        cache.record_miss(kind, paper.get('doi', ''), paper.get('title', ''))
+
 def categorize_paper(title, abstract):
     """Simple categorization based on keywords"""
     text = f"{title} {abstract}".lower()
@@ -197,86 +240,77 @@ def fetch_papers():
         additional_keyword = data.get('additional_keyword', '').strip()
         from_year = int(data.get('from_year', 2020))
         to_year = int(data.get('to_year', 2025))
-        total_results = min(int(data.get('total_results', 20)), 100)
+        total_results = max(1, int(data.get('total_results', 20)))
+        if total_results > MAX_TOTAL_RESULTS:
+            return jsonify({'success': False, 'error': f'total_results may be at most {MAX_TOTAL_RESULTS}'}), 400
         title_filter = data.get('title_filter', True)
         paper_type_filter = data.get('paper_type_filter', True)
+        # Split the year range into publication-date shards fetched in parallel (0 = one scan)
+        shard_months = int(data.get('shard_months', DEFAULT_SHARD_MONTHS))
+        ranking = data.get('ranking', RANK_RELEVANCE)
+        use_cache = data.get('use_cache', True)
 
         stream_log(f"[DEBUG] Fetching papers: {keyword} + {additional_keyword}, {from_year}-{to_year}, {total_results} results")
 
-        papers = []
-        session = get_session()
-
-        rows_per_request = 20
-        offset = 0
-        fetched_count = 0
-        max_attempts = total_results * 3
-        processed_count = 0
+        # Repeat searches (reloads, tweaks to later steps) are answered from the query-result cache
+        result_cache = get_result_cache()
+        cache_key = fetch_key(keyword, additional_keyword, from_year, to_year, paper_type_filter, title_filter,
+                              shard_months, ranking)
+        cached = result_cache.lookup(cache_key, total_results) if use_cache else None
+        if cached is not None:
+            papers = cached[0]
+            stream_log(f"[DEBUG] Served {len(papers)} papers from the query-result cache")
+            return jsonify({
+                'success': True,
+                'papers': papers,
+                'total': len(papers),
+                'cached': True,
+                'message': f'Successfully fetched {len(papers)} papers'
+            })
 
         keyword_lower = keyword.lower().strip()
         additional_keyword_lower = additional_keyword.lower().strip()
 
-        while fetched_count < total_results and processed_count < max_attempts:
-            try:
-                remaining = total_results - fetched_count
-                current_rows = min(rows_per_request, remaining * 2)
-
-                if additional_keyword.strip():
-                    url = f'https://api.crossref.org/works?query.title={urllib.parse.quote(keyword)}+{urllib.parse.quote(additional_keyword)}'
-                else:
-                    url = f'https://api.crossref.org/works?query.title={urllib.parse.quote(keyword)}'
-
-                url += f'&filter=from-pub-date:{from_year},until-pub-date:{to_year}'
-                if paper_type_filter:
-                    url += ',type:journal-article,type:proceedings-article'
-                url += f'&rows={current_rows}&offset={offset}&sort=relevance'
-
-                stream_log(f"[DEBUG] Fetching batch: offset={offset}, rows={current_rows}")
-                response = session.get(url, timeout=30)
-                if not response.ok:
-                    stream_log(f"[ERROR] CrossRef API returned status {response.status_code}")
-                    break
-
-                data_response = response.json()
-                items = data_response.get('message', {}).get('items', [])
-
-                stream_log(f"[DEBUG] Items fetched in this batch: {len(items)}")
-                if not items:
-                    stream_log("[DEBUG] No more items returned from CrossRef API.")
-                    break
-
-                for item in items:
-                    processed_count += 1
-                    if fetched_count >= total_results:
-                        break
-
-                    title = ''
-                    if item.get('title') and len(item['title']) > 0:
-                        title = item['title'][0] if isinstance(item['title'], list) else item['title']
-
-                    if title_filter and title:
-                        title_lower = title.lower()
-                        keyword_in_title = keyword_lower in title_lower
-                        additional_in_title = not additional_keyword_lower or additional_keyword_lower in title_lower
-
-                        if not (keyword_in_title and additional_in_title):
-                            continue
-
-                    paper = extract_paper_info(item, fetched_count + 1)
-                    papers.append(paper)
-                    fetched_count += 1
-
-                offset += current_rows
-                time.sleep(0.2)
-
-            except Exception as e:
-                stream_log(f"[ERROR] Error fetching batch: {e}")
-                break
+        def passes_title_filter(item):
+            title = ''
+            if item.get('title') and len(item['title']) > 0:
+                title = item['title'][0] if isinstance(item['title'], list) else item['title']
+            if title_filter and title:
+                title_lower = title.lower()
+                keyword_in_title = keyword_lower in title_lower
+                additional_in_title = not additional_keyword_lower or additional_keyword_lower in title_lower
+                return keyword_in_title and additional_in_title
+            return True
+
+        # Several CrossRef pages are kept in flight (within the per-host rate limit);
+        # outstanding pages are cancelled once enough papers pass the filter.
+        # Deep requests switch to cursor paging, so there is no result cap.
+        fetcher = CrossRefFetcher(session=get_session(), log=stream_log)
+        # With the title filter on, quote multi-word keywords so CrossRef ranks phrase matches first
+        params = build_works_params(keyword, additional_keyword, from_year, to_year, paper_type_filter,
+                                    phrase=bool(title_filter))
+        shards = date_shards(from_year, to_year, shard_months) if shard_months > 0 else []
+        if len(shards) > 1:
+            stream_log(f"[DEBUG] Sharded fetch: {len(shards)} shards of {shard_months} months, {ranking} ranking")
+            items = fetcher.fetch_sharded(params, shards, total_results, accept=passes_title_filter, ranking=ranking)
+        elif title_filter:
+            # Page sizes follow the observed filter pass rate, so few round trips are needed
+            items = fetcher.fetch_adaptive(params, total_results, accept=passes_title_filter)
+        else:
+            items = fetcher.fetch(params, total_results, max_scanned=total_results)
+        papers = [extract_paper_info(item, idx) for idx, item in enumerate(items, 1)]
+        # Only a complete scan is cached; a short list is final only if CrossRef ran out
+        if fetcher.last_scan['failed']:
+            stream_log("[DEBUG] Not caching results: a CrossRef page failed")
+        else:
+            result_cache.store(cache_key, papers, requested=total_results, exhausted=fetcher.last_scan['ran_out'])
 
         stream_log(f"[DEBUG] Total papers fetched: {len(papers)}")
         return jsonify({
             'success': True,
             'papers': papers,
             'total': len(papers),
+            'cached': False,
             'message': f'Successfully fetched {len(papers)} papers'
         })
 
@@ -341,64 +375,137 @@ def deduplicate_papers():
         if not papers:
             return jsonify({'error': 'No papers provided'}), 400
 
+        threshold = float(data.get('similarity_threshold', TITLE_DUPLICATE_THRESHOLD))
+
         unique_papers = []
         seen_dois = set()
-        seen_titles = set()
+        # Shared words over the larger title; such pairs have Jaccard > t / (2 - t), which the index targets
+        seen_titles = NearDuplicateIndex(threshold, overlap_max, candidate_threshold=threshold / (2 - threshold))
         removed_count = 0
 
-        for paper in papers:
-            is_duplicate = False
+        for position, paper in enumerate(papers):
             doi = paper.get('doi', '').strip()
-            if doi and doi in seen_dois:
-                is_duplicate = True
-            title = paper.get('title', '').strip().lower()
-            if title:
-                title_words = set(title.split())
-                for seen_title in seen_titles:
-                    seen_words = set(seen_title.split())
-                    if len(title_words) > 0 and len(seen_words) > 0:
-                        overlap = len(title_words.intersection(seen_words))
-                        similarity = overlap / max(len(title_words), len(seen_words))
-                        if similarity > 0.8:
-                            is_duplicate = True
-                            break
+            tokens = title_tokens(paper.get('title', ''))
+            is_duplicate = bool(doi and doi in seen_dois) or seen_titles.find(tokens) is not None
             if not is_duplicate:
                 unique_papers.append(paper)
                 if doi:
                     seen_dois.add(doi)
-                if title:
-                    seen_titles.add(title)
+                seen_titles.add(position, tokens)
             else:
                 removed_count += 1
 
-        stream_log(f"[DEBUG] Deduplication complete: {removed_count} duplicates removed, {len(unique_papers)} unique papers remaining")
+        # Opt-in (use_corpus_index): papers screened by an earlier run are returned
+        # separately, tagged 'already in corpus', and this run's papers are recorded
+        already_in_corpus = []
+        corpus = get_corpus_index() if data.get('use_corpus_index', False) else None
+        if corpus is not None:
+            unique_papers, already_in_corpus, _ = corpus.filter_new(unique_papers, 'api_deduplicate')
+
+        stream_log(f"[DEBUG] Deduplication complete: {removed_count} duplicates removed, {len(already_in_corpus)} already in corpus, {len(unique_papers)} unique papers remaining")
 
         return jsonify({
             'success': True,
             'papers': unique_papers,
             'removed': removed_count,
             'removed_count': removed_count,
+            'already_in_corpus': already_in_corpus,
+            'already_in_corpus_count': len(already_in_corpus),
             'remaining': len(unique_papers),
             'deduplicated_count': len(unique_papers),
             'original_count': len(papers),
-            'message': f'{removed_count} duplicates removed, {len(unique_papers)} unique papers remaining'
+            'message': f'{removed_count} duplicates removed, {len(already_in_corpus)} already in corpus, {len(unique_papers)} unique papers remaining'
         })
 
     except Exception as e:
         stream_log(f"[ERROR] Deduplication error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def batch_lookup_abstracts(papers, indices):
+    """
+    Resolve the papers at the given indices that carry a DOI or arXiv ID in bulk:
+    Semantic Scholar's batch endpoint first, then arXiv id_list queries for arXiv
+    papers still without an abstract. Returns ({index: S2 result}, {index: arXiv result})
+    for the papers each source answered.
+    """
+    s2_results, arxiv_results = {}, {}
+    ids = {}
+    for i in indices:
+        paper_id = paper_identifier(papers[i].get('doi', ''), papers[i].get('url', ''), papers[i].get('title', ''))
+        if paper_id:
+            ids[i] = paper_id
+    if ids:
+        batch = SemanticScholarBatch(session=get_session(), log=stream_log)
+        found = batch.lookup_abstracts(ids.values())
+        s2_results = {i: found[paper_id] for i, paper_id in ids.items() if paper_id in found}
+        stream_log(f"[DEBUG] Batch lookup resolved {sum(r['found'] for r in s2_results.values())}/{len(ids)} "
+                   f"identified papers in {batch.requests_made} requests")
+
+    arxiv_ids = {}
+    for i in indices:
+        if i in s2_results and s2_results[i]['found']:
+            continue
+        arxiv_id = extract_arxiv_id(papers[i].get('doi', ''), papers[i].get('url', ''), papers[i].get('title', ''))
+        if arxiv_id:
+            arxiv_ids[i] = arxiv_id
+    if arxiv_ids:
+        client = ArxivClient(session=get_session(), log=stream_log)
+        found = client.lookup_abstracts(arxiv_ids.values())
+        arxiv_results = {i: found[arxiv_id] for i, arxiv_id in arxiv_ids.items() if arxiv_id in found}
+        stream_log(f"[DEBUG] arXiv id_list lookup resolved {len(arxiv_results)}/{len(arxiv_ids)} "
+                   f"arXiv papers in {client.requests_made} requests")
+    return s2_results, arxiv_results
+
+def resolve_abstract(i, paper, batch_results, arxiv_results, mode=hedged_lookup.HEDGED,
+                     hedge_delay=hedged_lookup.DEFAULT_HEDGE_DELAY):
+    """
+    Find an abstract for papers[i]: a batch hit is used directly, otherwise
+    Semantic Scholar and arXiv are raced (or tried in turn in 'sequential' mode).
+    Returns (result or None, whether any source errored).
+    """
+    batch_result = batch_results.get(i)
+    if batch_result and batch_result['found']:
+        return batch_result, False
+
+    title = paper.get('title', '')
+    # (source, lookup, host it queries): hedges only start when that host has a token free
+    lookups = []
+    # A batch answer without an abstract means the title search would come back empty too
+    if batch_result is None:
+        lookups.append(('Semantic Scholar', lambda: search_semantic_scholar(title), 'api.semanticscholar.org'))
+    arxiv_result = arxiv_results.get(i)
+    if arxiv_result:
+        lookups.append(('arXiv', lambda: arxiv_result, None))
+    else:
+        lookups.append(('arXiv', lambda: search_arxiv(title), 'export.arxiv.org'))
+
+    result, attempts = hedged_lookup.resolve(lookups, mode, hedge_delay)
+    return result, any(attempt.get('error') for attempt in attempts)
+
 @app.route('/api/extract-abstracts', methods=['POST'])
 def extract_abstracts():
     """Extract abstracts from multiple sources"""
     try:
         data = request.get_json()
         papers = data.get('papers', [])
+        force_retry = data.get('force_retry', False)
+        bulk_lookup = data.get('bulk_lookup', True)
+        resolution_mode = data.get('resolution_mode', hedged_lookup.HEDGED)
+        hedge_delay = float(data.get('hedge_delay', hedged_lookup.DEFAULT_HEDGE_DELAY))
 
         if not papers:
             return jsonify({'error': 'No papers provided'}), 400
 
         found_abstracts = 0
+        skipped_known_missing = 0
+
+        # Papers with a DOI or arXiv ID are resolved in bulk; title search is the fallback
+        needs_abstract = [i for i, paper in enumerate(papers)
+                          if not (paper.get('abstract') and paper['abstract'].strip())]
+        skipped = {i for i in needs_abstract if known_missing(negative_cache.ABSTRACT, papers[i], force_retry)}
+        batch_results, arxiv_results = {}, {}
+        if bulk_lookup:
+            batch_results, arxiv_results = batch_lookup_abstracts(papers, [i for i in needs_abstract if i not in skipped])
 
         for i, paper in enumerate(papers):
             stream_log(f"[DEBUG] Processing paper {i+1}/{len(papers)}: {paper.get('title', 'No title')[:50]}...")
@@ -410,45 +517,40 @@ def extract_abstracts():
 
             title = paper.get('title', '')
             abstract_found = False
+            lookup_errored = False
 
-            # Try Semantic Scholar first
-            if title:
-                try:
-                    result = search_semantic_scholar(title)
-                    if result.get('found') and result.get('abstract'):
-                        paper['abstract'] = result['abstract']
-                        paper['abstract_source'] = 'Semantic Scholar'
-                        paper['abstract_confidence'] = 'high'
-                        abstract_found = True
-                        found_abstracts += 1
-                        stream_log(f"[DEBUG] Found abstract via Semantic Scholar for paper {i+1}")
-                except Exception as e:
-                    print(f"[ERROR] Semantic Scholar error for paper {i+1}: {e}")
+            if i in skipped:
+                paper['abstract_source'] = 'none'
+                paper['abstract_confidence'] = 'none'
+                skipped_known_missing += 1
+                stream_log(f"[DEBUG] Skipping paper {i+1}: no abstract found on a previous run")
+                continue
 
-            # Try arXiv if no abstract found
-            if not abstract_found and title:
-                try:
-                    result = search_arxiv(title)
-                    if result.get('found') and result.get('abstract'):
-                        paper['abstract'] = result['abstract']
-                        paper['abstract_source'] = 'arXiv'
-                        paper['abstract_confidence'] = 'medium'
-                        abstract_found = True
-                        found_abstracts += 1
-                        stream_log(f"[DEBUG] Found abstract via arXiv for paper {i+1}")
-                except Exception as e:
-                    print(f"[ERROR] arXiv error for paper {i+1}: {e}")
+            # Batch hit, or Semantic Scholar and arXiv raced per resolution_mode
+            if title:
+                result, lookup_errored = resolve_abstract(i, paper, batch_results, arxiv_results,
+                                                          resolution_mode, hedge_delay)
+                if result:
+                    paper['abstract'] = result['abstract']
+                    paper['abstract_source'] = result['source']
+                    paper['abstract_confidence'] = 'high' if result['source'] == 'Semantic Scholar' else 'medium'
+                    abstract_found = True
+                    found_abstracts += 1
+                    stream_log(f"[DEBUG] Found abstract via {result['source']} for paper {i+1}")
 
             # Set default values if no abstract found
             if not abstract_found:
                 paper['abstract_source'] = 'none'
                 paper['abstract_confidence'] = 'none'
+            if title:
+                record_lookup_outcome(negative_cache.ABSTRACT, paper, abstract_found, lookup_errored)
 
         stream_log(f"[DEBUG] Abstract extraction complete: {found_abstracts}/{len(papers)} papers now have abstracts")
 
         return jsonify({
             'papers': papers,
             'found': found_abstracts,
+            'skipped_known_missing': skipped_known_missing,
             'total': len(papers)
         })
 
@@ -462,6 +564,10 @@ def process_complete():
     try:
         data = request.json
         papers = data.get('papers', [])
+        force_retry = data.get('force_retry', False)
+        bulk_lookup = data.get('bulk_lookup', True)
+        resolution_mode = data.get('resolution_mode', hedged_lookup.HEDGED)
+        hedge_delay = float(data.get('hedge_delay', hedged_lookup.DEFAULT_HEDGE_DELAY))
 
         if not papers:
             return jsonify({'success': False, 'error': 'No papers provided'}), 400
@@ -469,21 +575,15 @@ def process_complete():
         print(f"Processing {len(papers)} papers...")
 
         # Simple deduplication based on title similarity
-        unique_papers = []
-        seen_titles = []
-
-        for paper in papers:
-            title = paper.get('title', '').strip()
-            is_duplicate = False
-
-            for seen_title in seen_titles:
-                if calculate_similarity(title, seen_title) > 0.8:
-                    is_duplicate = True
-                    break
+        unique_papers = unique_by_title(papers, float(data.get('similarity_threshold', TITLE_DUPLICATE_THRESHOLD)))
 
-            if not is_duplicate:
-                seen_titles.append(title)
-                unique_papers.append(paper)
+        # Papers with a DOI or arXiv ID are resolved in bulk before the per-paper loop
+        needs_abstract = [i for i, paper in enumerate(unique_papers)
+                          if not paper.get('abstract') or len(paper['abstract'].strip()) < 50]
+        skipped = {i for i in needs_abstract if known_missing(negative_cache.ABSTRACT, unique_papers[i], force_retry)}
+        batch_results, arxiv_results = {}, {}
+        if bulk_lookup:
+            batch_results, arxiv_results = batch_lookup_abstracts(unique_papers, [i for i in needs_abstract if i not in skipped])
 
         # Process each unique paper
         processed_papers = []
@@ -493,22 +593,21 @@ def process_complete():
 
             # Extract abstract if not available
             if not paper.get('abstract') or len(paper['abstract'].strip()) < 50:
-                # Try Semantic Scholar first
-                result = search_semantic_scholar(paper.get('title', ''))
-                if result['found']:
-                    paper['abstract'] = result['abstract']
-                    paper['abstract_source'] = result['source']
-                    paper['abstract_confidence'] = 'high'
+                if i in skipped:
+                    paper['abstract_source'] = 'Not found'
+                    paper['abstract_confidence'] = 'low'
                 else:
-                    # Try arXiv
-                    result = search_arxiv(paper.get('title', ''))
-                    if result['found']:
+                    # Batch hit, or Semantic Scholar and arXiv raced per resolution_mode
+                    result, lookup_errored = resolve_abstract(i, paper, batch_results, arxiv_results,
+                                                              resolution_mode, hedge_delay)
+                    if result:
                         paper['abstract'] = result['abstract']
                         paper['abstract_source'] = result['source']
                         paper['abstract_confidence'] = 'high'
                     else:
                         paper['abstract_source'] = 'Not found'
                         paper['abstract_confidence'] = 'low'
+                    record_lookup_outcome(negative_cache.ABSTRACT, paper, result is not None, lookup_errored)
             else:
                 paper['abstract_source'] = 'Original'
                 paper['abstract_confidence'] = 'high'
@@ -557,6 +656,11 @@ def process_stream():
     try:
         data = request.json
         papers = data.get('papers', [])
+        force_retry = data.get('force_retry', False)
+        bulk_lookup = data.get('bulk_lookup', True)
+        resolution_mode = data.get('resolution_mode', hedged_lookup.HEDGED)
+        hedge_delay = float(data.get('hedge_delay', hedged_lookup.DEFAULT_HEDGE_DELAY))
+        threshold = float(data.get('similarity_threshold', TITLE_DUPLICATE_THRESHOLD))
 
         if not papers:
             return jsonify({'success': False, 'error': 'No papers provided'}), 400
@@ -565,24 +669,19 @@ def process_stream():
             yield f"data: {json.dumps({'type': 'start', 'message': f'Processing {len(papers)} papers...'})}\n\n"
 
             # Simple deduplication based on title similarity
-            unique_papers = []
-            seen_titles = []
-
-            for paper in papers:
-                title = paper.get('title', '').strip()
-                is_duplicate = False
-
-                for seen_title in seen_titles:
-                    if calculate_similarity(title, seen_title) > 0.8:
-                        is_duplicate = True
-                        break
-
-                if not is_duplicate:
-                    seen_titles.append(title)
-                    unique_papers.append(paper)
+            unique_papers = unique_by_title(papers, threshold)
 
             yield f"data: {json.dumps({'type': 'dedup', 'message': f'Deduplicated: {len(unique_papers)} unique papers from {len(papers)} total'})}\n\n"
 
+            # Papers with a DOI or arXiv ID are resolved in bulk before the per-paper loop
+            pending = [i for i, paper in enumerate(unique_papers)
+                       if not paper.get('abstract') or len(paper['abstract'].strip()) < 50]
+            skipped = {i for i in pending if known_missing(negative_cache.ABSTRACT, unique_papers[i], force_retry)}
+            batch_results, arxiv_results = {}, {}
+            if bulk_lookup:
+                batch_results, arxiv_results = batch_lookup_abstracts(unique_papers, [i for i in pending if i not in skipped])
+                yield f"data: {json.dumps({'type': 'abstract', 'message': f'Batch lookup answered for {len(batch_results) + len(arxiv_results)} papers with identifiers'})}\n\n"
+
             # Process each unique paper
             processed_papers = []
 
@@ -593,30 +692,28 @@ def process_stream():
                 yield f"data: {json.dumps({'type': 'processing', 'message': f'Processing paper {i+1}/{len(unique_papers)}: {short_title}'})}\n\n"
 
                 # Extract abstract if not available
-                if not paper.get('abstract') or len(paper['abstract'].strip()) < 50:
+                needs_abstract = not paper.get('abstract') or len(paper['abstract'].strip()) < 50
+                if needs_abstract and i in skipped:
+                    paper['abstract_source'] = 'Not found'
+                    paper['abstract_confidence'] = 'low'
+                    yield f"data: {json.dumps({'type': 'abstract', 'message': f'Skipping abstract search for paper {i+1}: not found on a previous run'})}\n\n"
+                elif needs_abstract:
                     yield f"data: {json.dumps({'type': 'abstract', 'message': f'Searching for abstract for paper {i+1}...'})}\n\n"
 
-                    # Try Semantic Scholar first
-                    result = search_semantic_scholar(paper.get('title', ''))
-                    if result['found']:
+                    # Batch hit, or Semantic Scholar and arXiv raced per resolution_mode
+                    result, lookup_errored = resolve_abstract(i, paper, batch_results, arxiv_results,
+                                                              resolution_mode, hedge_delay)
+                    if result:
                         paper['abstract'] = result['abstract']
                         paper['abstract_source'] = result['source']
                         paper['abstract_confidence'] = 'high'
                         message = f'Abstract found via {result["source"]} for paper {i+1}'
                         yield f"data: {json.dumps({'type': 'abstract', 'message': message})}\n\n"
                     else:
-                        # Try arXiv
-                        result = search_arxiv(paper.get('title', ''))
-                        if result['found']:
-                            paper['abstract'] = result['abstract']
-                            paper['abstract_source'] = result['source']
-                            paper['abstract_confidence'] = 'high'
-                            message = f'Abstract found via {result["source"]} for paper {i+1}'
-                            yield f"data: {json.dumps({'type': 'abstract', 'message': message})}\n\n"
-                        else:
-                            paper['abstract_source'] = 'Not found'
-                            paper['abstract_confidence'] = 'low'
-                            yield f"data: {json.dumps({'type': 'abstract', 'message': f'No abstract found for paper {i+1}'})}\n\n"
+                        paper['abstract_source'] = 'Not found'
+                        paper['abstract_confidence'] = 'low'
+                        yield f"data: {json.dumps({'type': 'abstract', 'message': f'No abstract found for paper {i+1}'})}\n\n"
+                    record_lookup_outcome(negative_cache.ABSTRACT, paper, result is not None, lookup_errored)
                 else:
                     paper['abstract_source'] = 'Original'
                     paper['abstract_confidence'] = 'high'
@@ -731,6 +828,7 @@ def download_pdfs_stream():
     try:
         data = request.get_json()
         papers = data.get('papers', [])
+        force_retry = data.get('force_retry', False)
 
         if not papers:
             return jsonify({'success': False, 'error': 'No papers provided'}), 400
@@ -744,10 +842,7 @@ def download_pdfs_stream():
             results = []
             successful_downloads = 0
 
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
+            session = get_session()
 
             for i, paper in enumerate(papers):
                 paper_id = paper.get('paper_id', f'paper_{i+1}')
@@ -756,8 +851,14 @@ def download_pdfs_stream():
 
                 yield f"data: {json.dumps({'type': 'processing', 'message': f'Processing paper {i+1}/{len(papers)}: {title[:60]}...'})}\n\n"
 
+                if known_missing(negative_cache.PDF, paper, force_retry):
+                    yield f"data: {json.dumps({'type': 'failed', 'message': f'⏭️ Skipped (no PDF found on a previous run): {safe_title}'})}\n\n"
+                    results.append({'paper_id': paper_id, 'success': False, 'filepath': None, 'title': safe_title})
+                    continue
+
                 pdf_downloaded = False
                 pdf_path = None
+                lookup_errored = False
 
                 # Try multiple sources for PDF download
                 sources_to_try = []
@@ -774,17 +875,10 @@ def download_pdfs_stream():
                     # Try DOI redirect
                     sources_to_try.append(('DOI Redirect', f'https://doi.org/{doi}'))
 
-                # 3. arXiv if detected
-                if 'arxiv' in title.lower() or (paper.get('url') and 'arxiv.org' in paper.get('url')):
-                    # Extract arXiv ID and construct PDF URL
-                    arxiv_id = None
-                    if paper.get('url') and 'arxiv.org' in paper.get('url'):
-                        arxiv_match = re.search(r'arxiv\.org/abs/([^/\s]+)', paper.get('url'))
-                        if arxiv_match:
-                            arxiv_id = arxiv_match.group(1)
-
-                    if arxiv_id:
-                        sources_to_try.append(('arXiv', f'https://arxiv.org/pdf/{arxiv_id}.pdf'))
+                # 3. arXiv if an ID can be read from the DOI, URL or title
+                arxiv_id = extract_arxiv_id(doi, paper.get('url', ''), title)
+                if arxiv_id:
+                    sources_to_try.append(('arXiv', pdf_url_for(arxiv_id)))
 
                 # Try each source
                 for source_name, url in sources_to_try:
@@ -797,6 +891,8 @@ def download_pdfs_stream():
                         if source_name == 'Unpaywall':
                             # Special handling for Unpaywall API
                             response = session.get(url, timeout=30)
+                            if response.status_code not in (200, 404):
+                                lookup_errored = True
                             if response.status_code == 200:
                                 unpaywall_data = response.json()
                                 if unpaywall_data.get('is_oa') and unpaywall_data.get('best_oa_location'):
@@ -810,6 +906,9 @@ def download_pdfs_stream():
 
                         # Download the actual PDF
                         response = session.get(url, timeout=60, stream=True)
+                        # Throttling and outages say nothing about the paper (a 403 paywall does)
+                        if response.status_code == 429 or response.status_code >= 500:
+                            lookup_errored = True
                         if response.status_code == 200:
                             content_type = response.headers.get('content-type', '').lower()
 
@@ -840,14 +939,14 @@ def download_pdfs_stream():
                                     os.remove(pdf_path)
                                     pdf_path = None
 
-                        time.sleep(0.5)  # Rate limiting
-
                     except Exception as e:
+                        lookup_errored = True
                         yield f"data: {json.dumps({'type': 'failed', 'message': f'❌ {source_name} failed for {safe_title}: {str(e)}'})}\n\n"
                         continue
 
                 if not pdf_downloaded:
                     yield f"data: {json.dumps({'type': 'failed', 'message': f'❌ No PDF found for: {safe_title}'})}\n\n"
+                record_lookup_outcome(negative_cache.PDF, paper, pdf_downloaded, lookup_errored)
 
                 results.append({
                     'paper_id': paper_id,
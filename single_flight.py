@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Single-Flight Lookup Coalescing
+When several requests (browser tabs, users, pipeline threads) look up the same
+title or DOI at the same moment, only the first call goes to the external API;
+the others wait for it and share its result
+"""
+
+import copy
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from rate_limiter import current_cancel_token
+
+
+class _Call:
+    """One in-flight lookup and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key; nothing is cached once a call completes"""
+
+    def __init__(self):
+        self.calls: Dict[Hashable, _Call] = {}
+        self.lock = threading.Lock()
+        self.counters = {'executed': 0, 'coalesced': 0, 'leader_cancelled': 0}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs), or wait for an identical call already in flight.
+        If the leader's own caller cancelled it (a hedge that lost its race), its
+        result is not an answer: the waiting callers run the call again themselves.
+        """
+        while True:
+            with self.lock:
+                call = self.calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _Call()
+                    self.calls[key] = call
+                    self.counters['executed'] += 1
+                else:
+                    self.counters['coalesced'] += 1
+
+            if leader:
+                break
+            call.done.wait()
+            if call.cancelled:
+                continue
+            if call.error is not None:
+                raise call.error
+            # Followers get their own copy so nobody mutates a shared result dict
+            return copy.copy(call.result)
+
+        cancel = current_cancel_token()
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            call.cancelled = cancel is not None and cancel.is_set()
+            with self.lock:
+                del self.calls[key]
+                if call.cancelled:
+                    self.counters['leader_cancelled'] += 1
+            call.done.set()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {'in_flight': len(self.calls), **self.counters}
+
+
+_group = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Process-wide group shared by every resolver"""
+    return _group
+
+
+def single_flight(namespace: str, key_func: Callable[..., Optional[Hashable]]):
+    """
+    Decorator: coalesce concurrent calls whose key_func(*args, **kwargs) matches.
+    A None key (e.g. an empty title) bypasses coalescing.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = key_func(*args, **kwargs)
+            if key is None:
+                return fn(*args, **kwargs)
+            return _group.do((namespace, key), fn, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,123 @@
+"""Circuit breaker state machine and its use by the pooled HTTP adapter"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import circuit_breaker  # noqa: E402
+import http_client  # noqa: E402
+import rate_limiter  # noqa: E402
+import response_cache  # noqa: E402
+from circuit_breaker import CLOSED, HALF_OPEN, MAX_RESET_TIMEOUT, OPEN, BreakerRegistry, CircuitBreaker  # noqa: E402
+from circuit_breaker import is_failure_status  # noqa: E402
+from rate_limiter import HostRateLimiter, HostThrottled, RequestCancelled, cancel_token  # noqa: E402
+
+# Nothing listens here; every request in these tests is stopped before it is sent
+URL = 'http://127.0.0.1:9/works'
+
+
+def _cool_down(breaker):
+    """Pretend the breaker's cool-down has passed"""
+    breaker.opened_at -= breaker.reset_timeout + 1
+
+
+def test_trips_after_consecutive_failures():
+    breaker = CircuitBreaker('example.org', failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # A success in between resets the count
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()['rejected'] == 1
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker('example.org', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    _cool_down(breaker)
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Everyone else waits for the probe
+
+
+def test_successful_probe_closes():
+    breaker = CircuitBreaker('example.org', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    _cool_down(breaker)
+    breaker.allow()
+    breaker.record_failure()  # Probe failed: cool-down doubled
+    _cool_down(breaker)
+    breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.reset_timeout == 30
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_with_longer_cool_down():
+    breaker = CircuitBreaker('example.org', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    for expected in (60, 120, 240, 480, MAX_RESET_TIMEOUT, MAX_RESET_TIMEOUT):
+        _cool_down(breaker)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.reset_timeout == expected
+        assert not breaker.allow()
+
+
+def test_only_server_errors_count_as_failures():
+    assert is_failure_status(500) and is_failure_status(503)
+    assert not is_failure_status(404) and not is_failure_status(429) and not is_failure_status(None)
+
+
+@pytest.fixture
+def half_open(monkeypatch):
+    """A tripped breaker whose cool-down is over, with an isolated limiter and no response cache"""
+    breakers = BreakerRegistry(failure_threshold=1, reset_timeout=0)
+    limiter = HostRateLimiter({})
+    monkeypatch.setattr(circuit_breaker, '_registry', breakers)
+    monkeypatch.setattr(rate_limiter, '_limiter', limiter)
+    monkeypatch.setattr(response_cache, '_cache', None)
+    monkeypatch.setattr(response_cache, '_cache_failed', True)
+    monkeypatch.setattr(http_client, '_stub_base', None)
+    monkeypatch.setattr(http_client, '_recorder', None)
+    breaker = breakers.breaker_for(URL)
+    breaker.record_failure('boom')
+    return breaker, limiter
+
+
+def test_throttled_probe_frees_half_open_slot(half_open):
+    breaker, limiter = half_open
+    limiter.release(URL, 429, '120')
+
+    with pytest.raises(HostThrottled):
+        http_client.get_session().get(URL, timeout=1)
+
+    assert breaker.state == HALF_OPEN
+    assert not breaker.probe_in_flight
+    assert breaker.allow()
+
+
+def test_cancelled_probe_frees_half_open_slot(half_open):
+    breaker, _ = half_open
+    cancel = threading.Event()
+    cancel.set()
+
+    with cancel_token(cancel), pytest.raises(RequestCancelled):
+        http_client.get_session().get(URL, timeout=1)
+
+    assert breaker.state == HALF_OPEN
+    assert not breaker.probe_in_flight
+    assert breaker.allow()
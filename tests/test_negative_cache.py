@@ -0,0 +1,95 @@
+"""Negative cache: misses back off exponentially, and a cascade that errored records no miss"""
+
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import enhanced_pdf_downloader  # noqa: E402
+import negative_cache  # noqa: E402
+from negative_cache import PDF, NegativeCache  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = NegativeCache(str(tmp_path / 'negative.sqlite'), base_ttl=100, max_ttl=350)
+    monkeypatch.setattr(negative_cache, '_cache', cache)
+    return cache
+
+
+def test_misses_back_off_and_clear(cache):
+    assert not cache.should_skip(PDF, '10.1/abc', 'A Paper')
+    assert [cache.record_miss(PDF, '10.1/abc', 'A Paper') for _ in range(4)] == [100, 200, 350, 350]
+
+    # Either key finds the entry, whatever form the DOI is written in
+    assert cache.should_skip(PDF, 'https://doi.org/10.1/ABC')
+    assert cache.should_skip(PDF, title='a paper')
+    assert not cache.should_skip(PDF, '10.1/abc', force_retry=True)
+
+    cache.clear(PDF, '10.1/abc', 'A Paper')
+    assert not cache.should_skip(PDF, '10.1/abc', 'A Paper')
+
+
+class _Response:
+    def __init__(self, status_code, url=''):
+        self.status_code = status_code
+        self.url = url
+        self.headers = {}
+
+    def json(self):
+        return {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+
+class _Session:
+    """Every source answers with status; Semantic Scholar raises instead when s2_down"""
+
+    def __init__(self, status, s2_down=False):
+        self.status = status
+        self.s2_down = s2_down
+
+    def get(self, url, **kwargs):
+        if self.s2_down and 'semanticscholar' in url:
+            raise requests.ConnectionError('connection refused')
+        return _Response(self.status, url)
+
+    def head(self, url, **kwargs):
+        return _Response(self.status, url)
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch, cache):
+    monkeypatch.setattr(enhanced_pdf_downloader, 'search_semantic_scholar_with_fallback',
+                        lambda title: {'found': False})
+    return enhanced_pdf_downloader.EnhancedPDFDownloader(output_dir=str(tmp_path))
+
+
+PAPER = {'title': 'Cold starts in serverless platforms', 'doi': '10.1/cold', 'url': 'https://pub.example/cold'}
+
+
+@pytest.mark.parametrize('session', [_Session(404, s2_down=True), _Session(503), _Session(429)],
+                         ids=['exception', 'unavailable', 'throttled'])
+def test_errored_cascade_records_no_miss(downloader, cache, session):
+    downloader.session = session
+    success, _, _ = downloader.download_pdf_for_paper(dict(PAPER))
+    result = downloader.download_paper_pdf(dict(PAPER))
+
+    assert not success and not result['pdf_downloaded']
+    assert cache.stats_counters['misses_recorded'] == 0
+    assert not downloader.is_known_missing(PAPER)
+
+
+def test_clean_cascade_records_miss(downloader, cache):
+    downloader.session = _Session(404)
+    success, _, _ = downloader.download_pdf_for_paper(dict(PAPER))
+
+    assert not success
+    assert cache.stats_counters['misses_recorded'] == 1
+    assert downloader.is_known_missing(PAPER)
+    assert downloader.download_pdf_for_paper(dict(PAPER))[2].startswith('Skipped')
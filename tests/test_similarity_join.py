@@ -0,0 +1,59 @@
+"""similarity_join returns exactly the pairs of the pairwise double loop"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from similarity_join import similarity_join  # noqa: E402
+
+
+def brute_force(records, threshold):
+    pairs = []
+    for i in range(len(records)):
+        for j in range(i + 1, len(records)):
+            first, second = records[i], records[j]
+            if first and second and len(first & second) / len(first | second) >= threshold:
+                pairs.append((i, j))
+    return pairs
+
+
+def random_records(seed, count=300, vocabulary=40):
+    """Titles from a small vocabulary, with near-copies mixed in so there are pairs at every threshold"""
+    rng = random.Random(seed)
+    words = [f"w{n}" for n in range(vocabulary)]
+    records = []
+    for _ in range(count):
+        if records and rng.random() < 0.3:
+            base = set(rng.choice(records))
+            base.symmetric_difference_update(rng.sample(words, rng.randint(0, 2)))
+            records.append(frozenset(base))
+        else:
+            records.append(frozenset(rng.sample(words, rng.randint(0, 10))))
+    return records
+
+
+@pytest.mark.parametrize('threshold', [0.3, 0.5, 2 / 3, 0.8, 0.85, 1.0])
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_matches_brute_force(seed, threshold):
+    records = random_records(seed)
+    pairs, stats = similarity_join(records, threshold)
+
+    assert pairs == brute_force(records, threshold)
+    assert stats['pairs'] == len(pairs)
+    assert stats['verified'] <= stats['possible_pairs']
+
+
+def test_empty_sets_and_duplicates():
+    records = [frozenset(), frozenset({'a', 'b'}), frozenset(), frozenset({'a', 'b'}), frozenset({'a'})]
+    assert similarity_join(records, 1.0)[0] == [(1, 3)]
+    assert similarity_join(records, 0.5)[0] == [(1, 3), (1, 4), (3, 4)]
+
+
+@pytest.mark.parametrize('threshold', [0, -0.5, 1.5])
+def test_rejects_threshold_outside_unit_interval(threshold):
+    with pytest.raises(ValueError):
+        similarity_join([frozenset({'a'})], threshold)
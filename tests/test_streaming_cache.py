@@ -0,0 +1,79 @@
+"""Streamed responses reach the parser as they arrive and are still cached once fully read"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client  # noqa: E402
+import response_cache  # noqa: E402
+from crossref_stream import CHUNK_SIZE, iter_response_works  # noqa: E402
+
+# The second item is split across the pause, after several full chunks have gone out
+PADDING = b'x' * (3 * CHUNK_SIZE)
+
+
+class _SlowWorksHandler(BaseHTTPRequestHandler):
+    """Sends the first item, then holds the rest of the body until the test releases it"""
+    protocol_version = 'HTTP/1.1'
+    release = threading.Event()
+    finished = threading.Event()
+
+    def do_GET(self):
+        head = (b'{"status":"ok","message":{"items":[' + json.dumps({'DOI': '10.1/first'}).encode()
+                + b',{"DOI":"10.1/second","abstract":"' + PADDING)
+        tail = PADDING + b'"}],"total-results":2}}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(head) + len(tail)))
+        self.end_headers()
+        self.wfile.write(head)
+        self.wfile.flush()
+        self.release.wait(10)
+        self.wfile.write(tail)
+        self.wfile.flush()
+        self.finished.set()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _SlowWorksHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    cache = response_cache.ResponseCache(str(tmp_path / 'responses.sqlite'), ttls={'127.0.0.1': 60})
+    monkeypatch.setattr(response_cache, '_cache', cache)
+    monkeypatch.setattr(http_client, '_stub_base', None)
+    monkeypatch.setattr(http_client, '_recorder', None)
+    _SlowWorksHandler.release.clear()
+    _SlowWorksHandler.finished.clear()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/works", cache
+    _SlowWorksHandler.release.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_first_item_yielded_before_body_finished(server):
+    url, cache = server
+    response = http_client.get_session().get(url, stream=True, timeout=10)
+    items = iter_response_works(response)
+
+    first = next(items)
+    assert first == {'DOI': '10.1/first'}
+    assert not _SlowWorksHandler.finished.is_set()
+    assert cache.stats()['stores'] == 0
+
+    _SlowWorksHandler.release.set()
+    assert list(items) == [{'DOI': '10.1/second', 'abstract': (PADDING * 2).decode()}]
+    assert cache.stats()['stores'] == 1
+
+    cached = http_client.get_session().get(url, timeout=10)
+    assert getattr(cached, 'from_cache', False)
+    assert json.loads(cached.content)['message']['total-results'] == 2
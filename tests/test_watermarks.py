@@ -0,0 +1,87 @@
+"""Incremental runs: when a query's watermark advances and what the next run asks for"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import comprehensive_pipeline  # noqa: E402
+import query_watermarks  # noqa: E402
+from crossref_fetcher import new_scan  # noqa: E402
+from multi_keyword_fetcher import MultiKeywordPaperFetcher, sources_complete, sources_ok  # noqa: E402
+from query_watermarks import WatermarkStore, query_key  # noqa: E402
+
+CONFIG = {'primary_keyword': 'serverless', 'secondary_keyword': 'cold start'}
+
+
+def _scan(ran_out=False, failed=False):
+    outcome = new_scan()
+    outcome.update(ran_out=ran_out, failed=failed)
+    return outcome
+
+
+def test_source_status_helpers():
+    assert sources_ok({'CrossRef': _scan(), 'arXiv': _scan(ran_out=True)})
+    assert not sources_ok({'CrossRef': _scan(failed=True), 'arXiv': _scan(ran_out=True)})
+    assert not sources_ok({})
+    assert sources_complete({'CrossRef': _scan(ran_out=True), 'arXiv': _scan(ran_out=True)})
+    assert not sources_complete({'CrossRef': _scan(), 'arXiv': _scan(ran_out=True)})
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """
+    Pipeline whose CrossRef fetch follows a script of (outcome, DOIs) per run; arXiv
+    and Semantic Scholar always run out empty. Returns (run, since values CrossRef saw).
+    """
+    store = WatermarkStore(str(tmp_path / 'watermarks.sqlite'))
+    monkeypatch.setattr(query_watermarks, '_store', store)
+    monkeypatch.setattr(comprehensive_pipeline, 'CategoryKeywordExtractor', lambda output_dir: None)
+    script, seen_since = [], []
+
+    def crossref(self, search_term, from_year, to_year, max_results, shard_months, ranking, since, outcome):
+        mode, dois = script.pop(0)
+        seen_since.append(since)
+        outcome['failed'] = mode == 'failed'
+        outcome['ran_out'] = mode == 'complete'
+        return [{'title': f"Paper {doi}", 'doi': doi, 'year': '2024'} for doi in dois]
+
+    def empty(self, *args):
+        args[-1]['ran_out'] = True
+        return []
+
+    monkeypatch.setattr(MultiKeywordPaperFetcher, '_fetch_from_crossref', crossref)
+    monkeypatch.setattr(MultiKeywordPaperFetcher, '_fetch_from_arxiv', empty)
+    monkeypatch.setattr(MultiKeywordPaperFetcher, '_fetch_from_semantic_scholar', empty)
+    runner = comprehensive_pipeline.ComprehensivePaperPipeline(str(tmp_path))
+
+    def run(mode, dois=()):
+        script.append((mode, list(dois)))
+        result = runner.run_complete_pipeline([CONFIG], False, False, False, incremental=True)
+        assert result['success'], result
+        return store.get(query_key(CONFIG))
+
+    return run, seen_since
+
+
+def test_failed_first_run_sets_no_watermark(pipeline):
+    run, seen_since = pipeline
+    assert run('failed') is None
+    assert run('truncated', ['10.1/a']) is not None
+    assert seen_since == [None, None]
+
+
+def test_truncated_first_run_sets_baseline(pipeline):
+    run, seen_since = pipeline
+    baseline = run('truncated', ['10.1/a', '10.1/b'])
+    assert baseline is not None
+
+    # Delta runs ask from the watermark; one that failed or was cut off keeps it
+    assert run('failed') == baseline
+    assert run('truncated', ['10.1/c']) == baseline
+    advanced = run('complete', ['10.1/d'])
+    assert advanced > baseline
+    assert run('complete') > advanced
+    assert seen_since == [None, baseline, baseline, baseline, advanced]
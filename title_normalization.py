@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Title Normalization
+One canonical form per title, shared by every title-similarity check and
+duplicate index: Unicode compatibility folding with accents removed, case
+folding, punctuation stripped, and the words hashed to integer token IDs.
+Fingerprints are memoized per title string, so a title is normalized once no
+matter how many comparisons it takes part in.
+"""
+
+import hashlib
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple
+
+FINGERPRINT_CACHE_SIZE = int(os.environ.get('RESEARCHHELPER_TITLE_CACHE_SIZE', '200000'))
+
+_NON_WORD = re.compile(r'[^\w\s]')
+
+
+class TitleFingerprint(NamedTuple):
+    canonical: str               # folded, punctuation-free, single-spaced title
+    words: FrozenSet[str]
+    token_ids: FrozenSet[int]    # words as 64-bit integer IDs (cheap to hash and intersect)
+
+
+def token_id(word: str) -> int:
+    """
+    Integer ID of a canonical word: a 64-bit hash of its UTF-8 form, so IDs are the
+    same in every process and run and no vocabulary has to be kept
+    """
+    return int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def canonical_title(title) -> str:
+    """NFKD-fold, drop accents, case-fold, strip punctuation and collapse whitespace"""
+    if isinstance(title, float) and title != title:  # NaN from pandas
+        return ''
+    if not isinstance(title, str):
+        title = '' if title is None else str(title)
+    folded = ''.join(char for char in unicodedata.normalize('NFKD', title) if not unicodedata.combining(char))
+    return ' '.join(_NON_WORD.sub(' ', folded.casefold()).split())
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def _fingerprint(title: str) -> TitleFingerprint:
+    canonical = canonical_title(title)
+    words = frozenset(canonical.split())
+    return TitleFingerprint(canonical, words, frozenset(token_id(word) for word in words))
+
+
+def fingerprint(title) -> TitleFingerprint:
+    """Fingerprint of a title (an existing fingerprint is returned as is)"""
+    if isinstance(title, TitleFingerprint):
+        return title
+    if not isinstance(title, str):
+        return _fingerprint(canonical_title(title))
+    return _fingerprint(title)
+
+
+def fingerprints(records: Iterable[Dict], field: str = 'title') -> List[TitleFingerprint]:
+    """Fingerprints for a batch of records, in order"""
+    return [fingerprint(record.get(field, '')) for record in records]
+
+
+def title_tokens(title) -> FrozenSet[int]:
+    return fingerprint(title).token_ids
+
+
+def jaccard(tokens1: FrozenSet, tokens2: FrozenSet) -> float:
+    if not tokens1 or not tokens2:
+        return 0.0
+    intersection = len(tokens1 & tokens2)
+    return intersection / (len(tokens1) + len(tokens2) - intersection)
+
+
+def title_similarity(title1, title2) -> float:
+    """Jaccard similarity of two titles' canonical word sets (titles or fingerprints)"""
+    return jaccard(fingerprint(title1).token_ids, fingerprint(title2).token_ids)